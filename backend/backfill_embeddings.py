@@ -0,0 +1,80 @@
+"""Compute the similar-days embeddings of journals that were written before them.
+
+create_or_update_journal embeds every journal it writes. This script covers the
+journals saved before embeddings existed, and all journals again after the
+embedding method changes (a new EMBEDDING_MODEL or EMBEDDING_DIMENSIONS).
+
+Journals are read across all users in chunks ordered by id, embedded locally in
+one batch per chunk and written with one bulk upsert per chunk. After every chunk
+the last id is saved to --checkpoint, so an interrupted run continues where it
+stopped when started again. The checkpoint is removed once a run finishes.
+
+Usage:
+    python backfill_embeddings.py
+    python backfill_embeddings.py --chunk-size 5000
+"""
+import argparse
+import asyncio
+import time
+from typing import Any, Dict
+
+from checkpoints import read_checkpoint, remove_checkpoint, save_checkpoint
+from services import embedding_service
+from services.repository import get_repository
+
+def load_checkpoint(path: str) -> Dict[str, Any]:
+    """Load the checkpoint of an interrupted run with the same embedding model, or start a new one."""
+    checkpoint = {"model": embedding_service.EMBEDDING_MODEL, "after": None, "embedded": 0}
+    saved = read_checkpoint(path)
+    if saved is None:
+        return checkpoint
+    if saved["model"] != embedding_service.EMBEDDING_MODEL:
+        print(f"Ignoring checkpoint {path} for embedding model {saved['model']}")
+        return checkpoint
+    print(f"Resuming after journal {saved['after']} ({saved['embedded']} embedded so far)")
+    return saved
+
+async def run(args) -> None:
+    repository = get_repository()
+    await repository.open()
+    try:
+        checkpoint = load_checkpoint(args.checkpoint)
+        print(f"Embedding journals with {embedding_service.EMBEDDING_MODEL}...")
+        columns = ["id", "user_id", "date", "entry"]
+        started, embedded = time.perf_counter(), 0
+
+        journals = await repository.scan_journals(columns, checkpoint["after"], args.chunk_size)
+        while journals:
+            # Read the next chunk while this one is embedded and written
+            next_chunk = asyncio.create_task(repository.scan_journals(columns, journals[-1]["id"], args.chunk_size))
+            try:
+                await embedding_service.store_embeddings(journals)
+            except BaseException:
+                next_chunk.cancel()
+                raise
+
+            embedded += len(journals)
+            checkpoint["after"] = journals[-1]["id"]
+            checkpoint["embedded"] += len(journals)
+            save_checkpoint(args.checkpoint, checkpoint)
+            print(f"  {checkpoint['embedded']} embedded ({embedded / (time.perf_counter() - started):.0f} journals/s)")
+            journals = await next_chunk
+
+        print(f"Done: {checkpoint['embedded']} embedded in {time.perf_counter() - started:.1f}s")
+        remove_checkpoint(args.checkpoint)
+    finally:
+        await repository.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute the similar-days embeddings of all journals")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Journals read, embedded and written together (default: 1000)")
+    parser.add_argument("--checkpoint", default="embeddings_checkpoint.json", help="Progress file for resuming (default: embeddings_checkpoint.json)")
+    args = parser.parse_args()
+
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1")
+
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Prompt size, Gemini calls and latency for days with many snippets.
+
+For each day size the benchmark generates the journal from scratch, then adds one
+snippet and regenerates it, as happens when a user keeps adding snippets.
+``single prompt`` is the old behaviour of joining every snippet into one prompt;
+``hierarchical`` is the chunked path used for days over SUMMARY_TOKEN_BUDGET.
+The fake Gemini latency grows with prompt length to mimic the real model.
+
+Usage:
+    python benchmarks/bench_hierarchical_summary.py --sizes 10 100 1000
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+import uuid
+
+import common  # noqa: F401  (sets up sys.path and placeholder env vars)
+from fakes import FakeGemini, Latency
+
+from services import ai_service
+from populate_sample_data import MORNING_ACTIVITIES, AFTERNOON_ACTIVITIES, EVENING_ACTIVITIES
+
+def make_snippets(count: int, rng: random.Random):
+    sentences = MORNING_ACTIVITIES + AFTERNOON_ACTIVITIES + EVENING_ACTIVITIES
+    return [{"id": str(uuid.uuid4()), "entry": f"{rng.choice(sentences)} ({i})"} for i in range(count)]
+
+async def measure(generate, snippets, model):
+    model.calls, model.max_prompt_tokens = 0, 0
+    start = time.perf_counter()
+    await generate(snippets)
+    return time.perf_counter() - start, model.calls, model.max_prompt_tokens
+
+async def single_prompt(snippets):
+    # With no budget every day fits in one prompt, which is how every day was summarised before
+    budget = ai_service.SUMMARY_TOKEN_BUDGET
+    ai_service.SUMMARY_TOKEN_BUDGET = sys.maxsize
+    try:
+        await ai_service.generate_journal(snippets)
+    finally:
+        ai_service.SUMMARY_TOKEN_BUDGET = budget
+
+async def run(args):
+    async def analyze_sentiment(text):
+        return 0.5, {}
+
+    ai_service.analyze_sentiment = analyze_sentiment
+    model = FakeGemini(Latency(args.base_latency), per_token_latency=args.per_token_latency)
+    ai_service.model = model
+    rng = random.Random(args.seed)
+
+    print(f"{'snippets':>8}  {'mode':<13} {'step':<10} {'calls':>5} {'max prompt':>11} {'latency':>10}")
+    for size in args.sizes:
+        snippets = make_snippets(size, rng)
+        extra = make_snippets(1, rng)
+        for mode, generate in (("single prompt", single_prompt), ("hierarchical", ai_service.generate_journal)):
+            ai_service.summary_cache.clear()
+            for step, day in (("cold", snippets), ("+1 snippet", snippets + extra)):
+                elapsed, calls, max_tokens = await measure(generate, day, model)
+                print(f"{size:>8}  {mode:<13} {step:<10} {calls:>5} {max_tokens:>7} tok {elapsed * 1000:>8.0f}ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hierarchical summarization of long days")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000], help="Snippets per day to measure")
+    parser.add_argument("--base-latency", type=float, default=0.2, help="Fake Gemini base latency in seconds")
+    parser.add_argument("--per-token-latency", type=float, default=0.0002, help="Fake Gemini latency per prompt token")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
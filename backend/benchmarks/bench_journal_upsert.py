@@ -0,0 +1,66 @@
+"""Latency of concurrent journal upserts against the configured database.
+
+Fires many parallel create_or_update_journal calls for the same user and day, then
+checks that exactly one journal row exists for that day and reports write latency.
+tests/test_journal_upsert.py checks the single-row guarantee on SQLite; this script
+measures it against the real database from .env (DATABASE_BACKEND, run it from the
+backend directory), because the latency of the upsert depends on the database. It
+writes to a far-future date and deletes the row afterwards.
+
+Usage:
+    python benchmarks/bench_journal_upsert.py --user-id <existing user uuid> --writers 20
+"""
+import argparse
+import asyncio
+import os
+import time
+import uuid
+from datetime import date
+
+from dotenv import load_dotenv
+
+# Load the real credentials from .env (as config does) before common fills in placeholders
+# for any that are missing, so --help works without a .env
+load_dotenv(dotenv_path=os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), ".env"))
+
+import common  # noqa: F401  (sets up sys.path and placeholder env vars)
+from common import summarize, format_summary
+from services import journals_service
+from services.repository import get_repository
+
+TEST_DATE = date(2999, 12, 31)
+
+async def timed_write(user_id: uuid.UUID, index: int):
+    start = time.perf_counter()
+    await journals_service.create_or_update_journal(user_id, TEST_DATE, f"Concurrent write {index}", index / 100)
+    return time.perf_counter() - start
+
+async def run(user_id: uuid.UUID, writers: int):
+    # The writes share this event loop, and with it the repository's connections
+    repository = get_repository()
+    await repository.open()
+    try:
+        latencies = await asyncio.gather(*[timed_write(user_id, i) for i in range(writers)])
+        print(format_summary(f"{writers} parallel upserts ({repository.name})", summarize(latencies)))
+
+        day = TEST_DATE.isoformat()
+        try:
+            rows = await repository.list_journals(str(user_id), ["id", "entry"], day, day)
+            if len(rows) != 1:
+                raise SystemExit(f"FAILED: expected 1 journal for {TEST_DATE}, found {len(rows)}")
+            print(f"OK: one journal row for {TEST_DATE} ({rows[0]['entry']!r})")
+        finally:
+            await repository.delete_journal(str(user_id), day)
+    finally:
+        await repository.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that parallel journal writes for one day produce one row")
+    parser.add_argument("--user-id", required=True, type=uuid.UUID, help="Existing user ID to write test journals for")
+    parser.add_argument("--writers", type=int, default=20, help="Number of parallel writes (default: 20)")
+    args = parser.parse_args()
+
+    asyncio.run(run(args.user_id, args.writers))
+
+if __name__ == "__main__":
+    main()
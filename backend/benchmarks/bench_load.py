@@ -0,0 +1,323 @@
+"""End-to-end load test of the API against local fakes.
+
+Starts three processes: a fake Supabase/HuggingFace server (see fakes.py) seeded
+with synthetic history, the real FastAPI app under uvicorn with Gemini replaced by
+a fake, and this driver, which sends a weighted mix of requests and records the
+latency of each one. Each fake has its own latency and failure rate.
+
+Results (p50/p95/p99, RPS and errors per endpoint, plus the configuration) are
+written as JSON to --output; pass an earlier file with --compare to print the
+change against that run.
+
+Usage:
+    python benchmarks/bench_load.py --duration 30 --concurrency 32
+    python benchmarks/bench_load.py --rate 200 --db-latency 0.02 --gemini-failure-rate 0.1
+    python benchmarks/bench_load.py --mix post=1,with_summary=1 --compare results/load-previous.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List
+
+import common  # noqa: F401  (sets up sys.path and placeholder env vars)
+from common import summarize
+
+import httpx
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# Request kinds and the endpoint they are reported under
+ENDPOINTS = {
+    "post": "POST /snippets",
+    "batch": "POST /snippets/batch",
+    "with_summary": "POST /snippets/with-summary",
+    "list_snippets": "GET /snippets/{user_id}",
+    "list_journals": "GET /journals/{user_id}",
+    "get_journal": "GET /journals/{user_id}/{date}",
+}
+DEFAULT_MIX = "post=30,with_summary=5,batch=2,list_snippets=25,list_journals=25,get_journal=13"
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"Unknown request kind {name!r}; choose from {', '.join(ENDPOINTS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+# Child processes
+
+def serve_fakes(config: Dict) -> None:
+    """Run the fake Supabase and HuggingFace server, seeded with synthetic history."""
+    import uvicorn
+    from fakes import Latency, create_fake_services_app
+    from generate_bulk_data import generate_rows, generate_user_ids
+
+    app, database, _ = create_fake_services_app(
+        Latency(config["db_latency"], config["db_jitter"], config["db_failure_rate"], config["seed"]),
+        Latency(config["sentiment_latency"], config["sentiment_jitter"], config["sentiment_failure_rate"], config["seed"] + 1),
+    )
+    user_ids = generate_user_ids(config["seed"], config["users"])
+    rows = defaultdict(list)
+    for table, row in generate_rows(user_ids, config["seed"], date.today() - timedelta(days=1), config["history_days"], 2, 10, 0.1):
+        rows[table].append(row)
+    for table, table_rows in rows.items():
+        database.load(table, table_rows)
+
+    uvicorn.run(app, host="127.0.0.1", port=config["fakes_port"], log_level="warning", access_log=False)
+
+def serve_app(config: Dict) -> None:
+    """Run the real app with its external services pointed at the fakes."""
+    fakes_url = f"http://127.0.0.1:{config['fakes_port']}"
+    os.environ["SUPABASE_URL"] = fakes_url
+    os.environ["HUGGINGFACE_API_URL"] = f"{fakes_url}/hf"
+    os.environ["SENTIMENT_BACKEND"] = "huggingface"
+    os.environ["AI_CACHE_DIR"] = ""
+
+    import uvicorn
+    from fakes import FakeGemini, Latency
+    from services import ai_service
+    import main
+
+    ai_service.model = FakeGemini(Latency(config["gemini_latency"], config["gemini_jitter"], config["gemini_failure_rate"], config["seed"] + 2))
+    uvicorn.run(main.app, host="127.0.0.1", port=config["app_port"], log_level="warning", access_log=False)
+
+# Load driver
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+
+    def record(self, endpoint: str, status: int, elapsed: float) -> None:
+        self.statuses[endpoint][status] += 1
+        if status < 400 or status == 404:
+            self.latencies[endpoint].append(elapsed)
+
+class TrafficGenerator:
+    """Builds requests for a weighted mix of request kinds over a set of users."""
+
+    def __init__(self, user_ids: List[str], mix: Dict[str, float], history_days: int, page_size: int, seed: int):
+        self.user_ids = user_ids
+        self.kinds = list(mix)
+        self.weights = [mix[kind] for kind in self.kinds]
+        self.history_days = history_days
+        self.page_size = page_size
+        self.rng = random.Random(seed)
+
+    def next_request(self):
+        kind = self.rng.choices(self.kinds, self.weights)[0]
+        user_id = self.rng.choice(self.user_ids)
+        entry = f"Load test snippet {self.rng.getrandbits(32)}"
+        if kind == "post":
+            return kind, "POST", "/snippets", {"json": {"user_id": user_id, "entry": entry}}
+        if kind == "with_summary":
+            return kind, "POST", "/snippets/with-summary", {"json": {"user_id": user_id, "entry": entry}}
+        if kind == "batch":
+            now = datetime.now(timezone.utc)
+            snippets = [{"entry": f"{entry} ({i})", "created_at": (now - timedelta(minutes=i)).isoformat(),
+                         "idempotency_key": str(uuid.uuid4())} for i in range(10)]
+            return kind, "POST", "/snippets/batch", {"json": {"user_id": user_id, "snippets": snippets}}
+        if kind == "list_snippets":
+            return kind, "GET", f"/snippets/{user_id}", {"params": {"limit": self.page_size}}
+        if kind == "list_journals":
+            return kind, "GET", f"/journals/{user_id}", {"params": {"limit": self.page_size, "view": "summary"}}
+        day = date.today() - timedelta(days=self.rng.randint(1, self.history_days))
+        return kind, "GET", f"/journals/{user_id}/{day.isoformat()}", {}
+
+async def send(client: httpx.AsyncClient, traffic: TrafficGenerator, recorder: Recorder, start: float = None) -> None:
+    kind, method, path, kwargs = traffic.next_request()
+    start = start or time.perf_counter()
+    try:
+        response = await client.request(method, path, **kwargs)
+        status = response.status_code
+    except httpx.HTTPError:
+        status = 599
+    recorder.record(ENDPOINTS[kind], status, time.perf_counter() - start)
+
+async def closed_loop(client, traffic, recorder, concurrency: int, duration: float) -> None:
+    """Each of concurrency workers sends its next request as soon as the last one finishes."""
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            await send(client, traffic, recorder)
+
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+
+async def open_loop(client, traffic, recorder, rate: float, duration: float, max_in_flight: int) -> None:
+    """
+    Send requests as a Poisson process at rate per second, whether or not earlier ones finished.
+
+    Unlike the closed loop this measures queueing delay when the app falls behind.
+    """
+    semaphore = asyncio.Semaphore(max_in_flight)
+    tasks = set()
+    rng = random.Random(traffic.rng.random())
+    deadline = time.perf_counter() + duration
+    next_send = time.perf_counter()
+
+    async def limited(scheduled: float):
+        # Latency counts from the scheduled send time, so waiting for a free slot is included
+        async with semaphore:
+            await send(client, traffic, recorder, scheduled)
+
+    while next_send < deadline:
+        await asyncio.sleep(max(0.0, next_send - time.perf_counter()))
+        task = asyncio.create_task(limited(next_send))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        next_send += rng.expovariate(rate)
+    await asyncio.gather(*tasks)
+
+async def wait_until_ready(url: str, timeout: float = 120) -> None:
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.perf_counter() < deadline:
+            try:
+                await client.get(url)
+                return
+            except httpx.HTTPError:
+                await asyncio.sleep(0.2)
+    raise SystemExit(f"Timed out waiting for {url}")
+
+async def drive(config: Dict) -> Dict:
+    from generate_bulk_data import generate_user_ids
+
+    app_url = f"http://127.0.0.1:{config['app_port']}"
+    await wait_until_ready(f"http://127.0.0.1:{config['fakes_port']}/stats")
+    await wait_until_ready(app_url + "/")
+
+    started_at = datetime.now(timezone.utc).isoformat()
+    traffic = TrafficGenerator(generate_user_ids(config["seed"], config["users"]), config["mix"],
+                               config["history_days"], config["page_size"], config["seed"])
+    limits = httpx.Limits(max_connections=config["max_in_flight"], max_keepalive_connections=config["max_in_flight"])
+    async with httpx.AsyncClient(base_url=app_url, limits=limits, timeout=config["timeout"]) as client:
+        if config["warmup"] > 0:
+            await closed_loop(client, traffic, Recorder(), config["concurrency"], config["warmup"])
+
+        recorder = Recorder()
+        start = time.perf_counter()
+        if config["rate"]:
+            await open_loop(client, traffic, recorder, config["rate"], config["duration"], config["max_in_flight"])
+        else:
+            await closed_loop(client, traffic, recorder, config["concurrency"], config["duration"])
+        elapsed = time.perf_counter() - start
+
+    endpoints = {}
+    for endpoint in sorted(recorder.statuses):
+        statuses = recorder.statuses[endpoint]
+        total = sum(statuses.values())
+        stats = summarize(recorder.latencies[endpoint])
+        stats.update({
+            "requests": total,
+            "rps": total / elapsed,
+            "errors": sum(count for status, count in statuses.items() if status >= 400 and status != 404),
+            "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        })
+        endpoints[endpoint] = stats
+
+    total = sum(stats["requests"] for stats in endpoints.values())
+    return {
+        "started_at": started_at,
+        "config": {key: value for key, value in config.items() if not key.endswith("_port")},
+        "elapsed_seconds": elapsed,
+        "total_requests": total,
+        "total_rps": total / elapsed,
+        "endpoints": endpoints,
+    }
+
+def print_report(results: Dict, previous: Dict = None) -> None:
+    print(f"\n{results['total_requests']} requests in {results['elapsed_seconds']:.1f}s ({results['total_rps']:.0f} req/s)\n")
+    header = f"{'endpoint':<32} {'reqs':>7} {'rps':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'errors':>7}"
+    print(header)
+    print("-" * len(header))
+    for endpoint, stats in results["endpoints"].items():
+        print(f"{endpoint:<32} {stats['requests']:>7} {stats['rps']:>8.1f} {stats['p50_ms']:>7.1f}ms "
+              f"{stats['p95_ms']:>7.1f}ms {stats['p99_ms']:>7.1f}ms {stats['errors']:>7}")
+        old = (previous or {}).get("endpoints", {}).get(endpoint)
+        if old:
+            def change(key):
+                return f"{(stats[key] - old[key]) / old[key] * 100:+.0f}%" if old[key] else "n/a"
+            print(f"{'  vs previous':<32} {'':>7} {change('rps'):>8} {change('p50_ms'):>9} "
+                  f"{change('p95_ms'):>9} {change('p99_ms'):>9} {stats['errors'] - old['errors']:>+7}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the API end to end against local fakes")
+    parser.add_argument("--duration", type=float, default=20, help="Measured seconds of load (default: 20)")
+    parser.add_argument("--warmup", type=float, default=3, help="Unmeasured seconds of load first (default: 3)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Closed-loop workers (default: 16)")
+    parser.add_argument("--rate", type=float, help="Send requests at this rate per second (open loop) instead")
+    parser.add_argument("--max-in-flight", type=int, default=256, help="Open-loop cap on outstanding requests (default: 256)")
+    parser.add_argument("--timeout", type=float, default=30, help="Client timeout per request (default: 30)")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"Weighted request kinds (default: {DEFAULT_MIX})")
+    parser.add_argument("--users", type=int, default=50, help="Synthetic users (default: 50)")
+    parser.add_argument("--history-days", type=int, default=90, help="Days of seeded history per user (default: 90)")
+    parser.add_argument("--page-size", type=int, default=50, help="Limit used by list reads (default: 50)")
+    for name, latency, help_name in (("db", 0.005, "Supabase"), ("sentiment", 0.05, "HuggingFace"), ("gemini", 1.0, "Gemini")):
+        parser.add_argument(f"--{name}-latency", type=float, default=latency, help=f"Fake {help_name} base latency in seconds (default: {latency})")
+        parser.add_argument(f"--{name}-jitter", type=float, help=f"Mean extra fake {help_name} latency (default: a fifth of the base latency)")
+        parser.add_argument(f"--{name}-failure-rate", type=float, default=0.0, help=f"Fraction of fake {help_name} calls that fail (default: 0)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    parser.add_argument("--output", help="Where to save the JSON results (default: results/load-<timestamp>.json)")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    parser.add_argument("--role", choices=["driver", "fakes", "app"], default="driver", help=argparse.SUPPRESS)
+    parser.add_argument("--config", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.role == "fakes":
+        serve_fakes(json.loads(args.config))
+        return
+    if args.role == "app":
+        serve_app(json.loads(args.config))
+        return
+
+    config = {key: value for key, value in vars(args).items() if key not in ("role", "config", "output", "compare")}
+    for name in ("db", "sentiment", "gemini"):
+        if config[f"{name}_jitter"] is None:
+            config[f"{name}_jitter"] = config[f"{name}_latency"] / 5
+    config.update({"fakes_port": free_port(), "app_port": free_port()})
+
+    script = os.path.abspath(__file__)
+    children = [
+        subprocess.Popen([sys.executable, script, "--role", role, "--config", json.dumps(config)])
+        for role in ("fakes", "app")
+    ]
+    try:
+        results = asyncio.run(drive(config))
+    finally:
+        # Stop the app first: it finishes queued summaries on shutdown and still needs the fakes
+        for child in reversed(children):
+            child.terminate()
+            child.wait()
+
+    previous = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            previous = json.load(f)
+    print_report(results, previous)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"load-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nSaved results to {output}")
+
+if __name__ == "__main__":
+    main()
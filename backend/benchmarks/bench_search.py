@@ -0,0 +1,88 @@
+"""Full-text search latency against the length of a user's history.
+
+For each history length, loads one user with that many years of snippets and
+journals (plus --other-users users with a year each, so the index holds other
+people's entries too) into a fresh SQLite database, and times:
+
+* ``fts``: SqliteRepository.search_entries, i.e. the FTS5 index with bm25
+  ranking and highlighted excerpts, for the first page and the page after it
+* ``like scan``: the unindexed alternative, a LIKE match over every entry of the
+  user, without ranking or highlights
+
+The Postgres backend answers the same queries from the GIN indexes in
+supabase/migrations/007_full_text_search.sql and is not covered here.
+
+Usage:
+    python benchmarks/bench_search.py --years 1 3 5 --queries guitar "walked the dog" "felt great"
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+
+import common  # noqa: F401  (sets up sys.path and placeholder env vars)
+from common import summarize
+
+from generate_bulk_data import generate_rows, generate_user_ids
+from services.sqlite_repository import SqliteRepository
+
+async def load(repository: SqliteRepository, user_ids, seed: int, days: int) -> int:
+    """Insert days of history for the users and return the number of entries."""
+    snippets, journals = [], []
+    for table, row in generate_rows(user_ids, seed, date.today() - timedelta(days=1), days, 2, 10, 0.1):
+        (snippets if table == "snippets" else journals).append(row)
+    await repository.insert_snippets(snippets)
+    for journal in journals:
+        await repository.upsert_journal({key: journal[key] for key in ("user_id", "date", "entry", "sentiment_score")})
+    return len(snippets) + len(journals)
+
+async def time_query(function, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = await function()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples), rows
+
+async def run(args) -> None:
+    print(f"{'years':<6} {'entries':>8} {'query':<18} {'strategy':<15} {'matches':>8} {'p50':>9} {'p95':>9}")
+    for years in args.years:
+        with tempfile.TemporaryDirectory() as directory:
+            repository = SqliteRepository(os.path.join(directory, "search.db"))
+            await repository.open()
+            user_id, *others = generate_user_ids(args.seed, 1 + args.other_users)
+            entries = await load(repository, [user_id], args.seed, years * 365)
+            if others:
+                await load(repository, others, args.seed, 365)
+
+            for query in args.queries:
+                first_stats, first_page = await time_query(lambda: repository.search_entries(user_id, query, None, args.limit), args.repeat)
+                after = (first_page[-1]["rank"], first_page[-1]["id"]) if first_page else None
+                next_stats, _ = await time_query(lambda: repository.search_entries(user_id, query, after, args.limit), args.repeat)
+                like = f"%{query}%"
+                scan_stats, matches = await time_query(lambda: repository._fetch(
+                    "select id from journals where user_id = ? and entry like ? "
+                    "union all select id from snippets where user_id = ? and entry like ?",
+                    [user_id, like, user_id, like],
+                ), args.repeat)
+                for strategy, stats, count in (("fts", first_stats, len(first_page)), ("fts next page", next_stats, ""),
+                                               ("like scan", scan_stats, len(matches))):
+                    print(f"{years:<6} {entries:>8} {query[:18]:<18} {strategy:<15} {count:>8} "
+                          f"{stats['p50_ms']:>7.2f}ms {stats['p95_ms']:>7.2f}ms")
+            await repository.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark full-text search latency against history length")
+    parser.add_argument("--years", type=int, nargs="+", default=[1, 3, 5], help="Years of history for the searched user")
+    parser.add_argument("--queries", nargs="+", default=["guitar", "walked the dog", "felt great", "zebra"], help="Search queries")
+    parser.add_argument("--other-users", type=int, default=5, help="Users with a year of history each also in the database (default: 5)")
+    parser.add_argument("--limit", type=int, default=20, help="Results per page (default: 20)")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed queries per measurement (default: 20)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Throughput of the local lexicon sentiment backend, in texts per second.
+
+Compares scoring texts one call at a time with scoring them in batches of
+increasing size. The hosted HuggingFace backend is not measured here because its
+cost is dominated by network latency.
+
+Usage:
+    python benchmarks/bench_sentiment_backends.py --texts 5000
+"""
+import argparse
+import asyncio
+import random
+import time
+
+import common  # noqa: F401  (sets up sys.path and placeholder env vars)
+
+from services.lexicon_sentiment import LexiconSentimentBackend
+from populate_sample_data import MORNING_ACTIVITIES, AFTERNOON_ACTIVITIES, EVENING_ACTIVITIES
+
+EXTRA_SENTENCES = [
+    "I was really tired after the long meeting.",
+    "Not a great day, but dinner was lovely.",
+    "Felt anxious about the deadline and didn't sleep well.",
+    "So grateful for the sunny weather and a relaxing walk.",
+]
+
+def make_texts(count: int, seed: int):
+    rng = random.Random(seed)
+    sentences = MORNING_ACTIVITIES + AFTERNOON_ACTIVITIES + EVENING_ACTIVITIES + EXTRA_SENTENCES
+    return [" ".join(rng.sample(sentences, rng.randint(3, 8))) for _ in range(count)]
+
+async def run(texts, batch_sizes):
+    backend = LexiconSentimentBackend()
+
+    start = time.perf_counter()
+    for text in texts:
+        await backend.analyze(text)
+    elapsed = time.perf_counter() - start
+    print(f"{'single':<12} {len(texts) / elapsed:12.0f} texts/sec")
+
+    for batch_size in batch_sizes:
+        start = time.perf_counter()
+        for offset in range(0, len(texts), batch_size):
+            await backend.analyze_batch(texts[offset:offset + batch_size])
+        elapsed = time.perf_counter() - start
+        print(f"{'batch=' + str(batch_size):<12} {len(texts) / elapsed:12.0f} texts/sec")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark local sentiment scoring throughput")
+    parser.add_argument("--texts", type=int, default=5000, help="Number of texts to score (default: 5000)")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[16, 128, 1024], help="Batch sizes to measure")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the generated texts")
+    args = parser.parse_args()
+
+    asyncio.run(run(make_texts(args.texts, args.seed), args.batch_sizes))
+
+if __name__ == "__main__":
+    main()
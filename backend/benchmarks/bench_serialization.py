@@ -0,0 +1,96 @@
+"""CPU cost of serializing list responses, by number of rows.
+
+Compares, for snippet and journal rows as the repositories return them:
+
+* ``response_model``: what FastAPI does for an endpoint with
+  ``response_model=List[...]``: validate every row against the model, dump it back
+  to JSON-compatible Python and encode that with the standard json module
+* ``validate+dump_json``: the old journal list path, validating with a
+  TypeAdapter and encoding with pydantic's dump_json
+* ``orjson``: encoding the rows as they are (services.serialization.encode_rows)
+* ``orjson chunks``: the chunked stream sent for long lists (iter_rows)
+
+Usage:
+    python benchmarks/bench_serialization.py --sizes 10 100 1000 10000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import date, timedelta
+from typing import List
+
+import common  # noqa: F401  (sets up sys.path and placeholder env vars)
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from pydantic import TypeAdapter
+
+from generate_bulk_data import generate_rows, generate_user_ids
+from models import JournalListItem, SnippetListItem
+from services.serialization import encode_rows, iter_rows
+
+def make_rows(count: int, seed: int):
+    """At least count snippet and journal rows for one synthetic user, in the repository JSON shape."""
+    user_ids = generate_user_ids(seed, 1)
+    rows = {"snippets": [], "journals": []}
+    days = count
+    while len(rows["snippets"]) < count or len(rows["journals"]) < count:
+        rows = {"snippets": [], "journals": []}
+        for table, row in generate_rows(user_ids, seed, date.today() - timedelta(days=1), days, 2, 10, 0.0):
+            rows[table].append({key: row[key] for key in ("id", "user_id", "created_at", "entry", "date", "sentiment_score") if key in row})
+        days *= 2
+    return rows["snippets"][:count], rows["journals"][:count]
+
+def time_call(function, repeat: int) -> float:
+    """Median seconds per call."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+# One loop for all measurements; asyncio.run per call would dominate the small sizes
+loop = asyncio.new_event_loop()
+
+def collect_chunks(rows) -> bytes:
+    async def collect():
+        return b"".join([chunk async for chunk in iter_rows(rows)])
+    return loop.run_until_complete(collect())
+
+def strategies(model, rows):
+    field = create_model_field(name="Response", type_=List[model], mode="serialization")
+    adapter = TypeAdapter(List[model])
+
+    def response_model():
+        content = loop.run_until_complete(serialize_response(field=field, response_content=rows, exclude_unset=True))
+        return JSONResponse(content).body
+
+    return {
+        "response_model": response_model,
+        "validate+dump_json": lambda: adapter.dump_json(adapter.validate_python(rows), exclude_unset=True),
+        "orjson": lambda: encode_rows(rows),
+        "orjson chunks": lambda: collect_chunks(rows),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark list response serialization against list size")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000], help="Rows per response")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed calls per measurement, the median is reported (default: 20)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    args = parser.parse_args()
+
+    print(f"{'rows':<8} {'table':<9} {'strategy':<19} {'per call':>11} {'per row':>10} {'speed-up':>9}")
+    for size in args.sizes:
+        snippets, journals = make_rows(size, args.seed)
+        for table, model, rows in (("snippets", SnippetListItem, snippets), ("journals", JournalListItem, journals)):
+            baseline = None
+            for name, function in strategies(model, rows).items():
+                seconds = time_call(function, args.repeat)
+                baseline = baseline or seconds
+                print(f"{size:<8} {table:<9} {name:<19} {seconds * 1000:>9.3f}ms {seconds / size * 1e6:>8.2f}us {baseline / seconds:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Similar-days lookup latency against the length of a user's history.
+
+For each history length (days with a journal), embeds synthetic journals with
+embedding_service and times:
+
+* ``embed``: embedding one journal entry, as create_or_update_journal does on write
+* ``top-k``: EmbeddingIndex.top_k on a cached index (matrix-vector product and
+  partial sort), i.e. a similar-days request on a warm worker
+* ``python loop``: the same search as a per-row Python dot product, for comparison
+* ``cold load``: list_journal_embeddings from SQLite plus building the index, which a
+  request pays once per user per EMBEDDING_CACHE_TTL_SECONDS
+
+Usage:
+    python benchmarks/bench_similar_days.py --days 365 1825 3650 7300 --k 5
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+
+import common  # noqa: F401  (sets up sys.path and placeholder env vars)
+from common import summarize
+
+from generate_bulk_data import generate_rows, generate_user_ids
+from services.embedding_service import EMBEDDING_MODEL, EmbeddingIndex, embed_texts, encode_embedding
+from services.sqlite_repository import SqliteRepository
+
+def journal_entries(seed: int, days: int):
+    """Entries and dates of one synthetic user with a journal on every day."""
+    user_id = generate_user_ids(seed, 1)[0]
+    rows = [row for table, row in generate_rows([user_id], seed, date.today() - timedelta(days=1), days, 2, 10, 0.0) if table == "journals"]
+    return user_id, [row["date"] for row in rows], [row["entry"] for row in rows]
+
+def time_call(function, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+def python_top_k(rows, query, k):
+    scores = [(sum(a * b for a, b in zip(vector, query)), day) for day, vector in rows]
+    return sorted(scores, reverse=True)[:k]
+
+async def cold_load(repository: SqliteRepository, user_id: str) -> EmbeddingIndex:
+    return EmbeddingIndex.from_rows(await repository.list_journal_embeddings(user_id, EMBEDDING_MODEL))
+
+async def run(args) -> None:
+    rng = random.Random(args.seed)
+    print(f"{'days':<7} {'step':<12} {'p50':>10} {'p95':>10}")
+    for days in args.days:
+        user_id, dates, entries = journal_entries(args.seed, days)
+        vectors = embed_texts(entries)
+        index = EmbeddingIndex(dates, vectors)
+        queries = [vectors[rng.randrange(len(dates))] for _ in range(args.repeat)]
+
+        results = {
+            "embed": time_call(lambda: embed_texts([entries[rng.randrange(len(entries))]]), args.repeat),
+            "top-k": time_call(lambda: index.top_k(queries[rng.randrange(len(queries))], args.k), args.repeat),
+        }
+        if days <= args.python_max_days:
+            rows = [(day, vector.tolist()) for day, vector in zip(dates, vectors)]
+            results["python loop"] = time_call(lambda: python_top_k(rows, queries[0].tolist(), args.k), min(args.repeat, 5))
+
+        with tempfile.TemporaryDirectory() as directory:
+            repository = SqliteRepository(os.path.join(directory, "similar.db"))
+            await repository.open()
+            await repository._fetch(
+                "insert into journals (id, user_id, entry, date) values (?, ?, ?, ?)",
+                [(f"{user_id}-{day}", user_id, entry, day) for day, entry in zip(dates, entries)], many=True,
+            )
+            await repository.upsert_journal_embeddings([
+                {"user_id": user_id, "date": day, "model": EMBEDDING_MODEL, "embedding": encode_embedding(vector)}
+                for day, vector in zip(dates, vectors)
+            ])
+            samples = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                await cold_load(repository, user_id)
+                samples.append(time.perf_counter() - start)
+            results["cold load"] = summarize(samples)
+            await repository.close()
+
+        for step, stats in results.items():
+            print(f"{days:<7} {step:<12} {stats['p50_ms']:>8.3f}ms {stats['p95_ms']:>8.3f}ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark similar-days lookups against history length")
+    parser.add_argument("--days", type=int, nargs="+", default=[365, 1825, 3650, 7300], help="Journals in the user's history")
+    parser.add_argument("--k", type=int, default=5, help="Similar days per lookup (default: 5)")
+    parser.add_argument("--repeat", type=int, default=50, help="Timed calls per measurement (default: 50)")
+    parser.add_argument("--python-max-days", type=int, default=3650, help="Largest history to time the Python loop on (default: 3650)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Worker start-up time, from process start to the first answered request.
+
+Each run starts a fresh interpreter (``--role child``) that times, in order:
+
+* ``import``: ``import main``, i.e. config, the services and everything they build at import
+* ``startup``: the app lifespan start-up (caches, repository, sentiment client)
+* ``first_request``: GET /journals/<user>/<date> through the supabase repository,
+  against the fake PostgREST server from fakes.py
+* ``gemini_client``: building the Gemini model, which the first summary pays for
+
+``total`` is measured by the parent, from spawning the process to the first
+response, so it includes interpreter start-up. This is the time a new uvicorn
+worker or a serverless cold start spends before it can answer.
+
+Usage:
+    python benchmarks/bench_startup.py --runs 10
+"""
+import time
+
+STARTED = time.perf_counter()
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+
+import common  # noqa: F401  (sets up sys.path and placeholder env vars)
+from common import summarize
+
+STEPS = ["import", "startup", "first_request", "gemini_client", "total"]
+
+async def child(config) -> dict:
+    os.environ["SUPABASE_URL"] = f"http://127.0.0.1:{config['fakes_port']}"
+    os.environ["DATABASE_BACKEND"] = "supabase"
+    os.environ["AI_CACHE_DIR"] = ""
+    timings = {}
+
+    import main
+    timings["import"] = time.perf_counter() - STARTED
+
+    import httpx
+    from services import ai_service
+    from generate_bulk_data import generate_user_ids
+
+    start = time.perf_counter()
+    async with main.lifespan(main.app):
+        timings["startup"] = time.perf_counter() - start
+
+        user_id = generate_user_ids(config["seed"], 1)[0]
+        start = time.perf_counter()
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://app") as client:
+            response = await client.get(f"/journals/{user_id}/{config['date']}")
+        response.raise_for_status()
+        timings["first_request"] = time.perf_counter() - start
+        timings["first_response_at"] = time.time()
+
+        start = time.perf_counter()
+        await ai_service.get_model()
+        timings["gemini_client"] = time.perf_counter() - start
+    return timings
+
+def run_child(script: str, config) -> dict:
+    spawned_at = time.time()
+    output = subprocess.run(
+        [sys.executable, script, "--role", "child", "--config", json.dumps(config)],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    timings = json.loads(output.strip().splitlines()[-1])
+    timings["total"] = timings.pop("first_response_at") - spawned_at
+    return timings
+
+async def run(args) -> None:
+    from datetime import date, timedelta
+    from bench_load import free_port, wait_until_ready
+
+    config = {"fakes_port": free_port(), "seed": args.seed, "users": 1, "history_days": 30,
+              "db_latency": 0.0, "db_jitter": 0.0, "db_failure_rate": 0.0,
+              "sentiment_latency": 0.0, "sentiment_jitter": 0.0, "sentiment_failure_rate": 0.0,
+              "date": (date.today() - timedelta(days=1)).isoformat()}
+    directory = os.path.dirname(os.path.abspath(__file__))
+    server = subprocess.Popen([sys.executable, os.path.join(directory, "bench_load.py"), "--role", "fakes", "--config", json.dumps(config)])
+    try:
+        await wait_until_ready(f"http://127.0.0.1:{config['fakes_port']}/stats")
+        runs = []
+        for i in range(args.runs):
+            runs.append(await asyncio.to_thread(run_child, os.path.abspath(__file__), config))
+            print(f"run {i + 1}/{args.runs}: total {runs[-1]['total'] * 1000:.0f}ms")
+    finally:
+        server.terminate()
+
+    print(f"\n{'step':<15} {'p50':>9} {'p95':>9} {'max':>9}")
+    for step in STEPS:
+        stats = summarize([timings[step] for timings in runs])
+        print(f"{step:<15} {stats['p50_ms']:>7.0f}ms {stats['p95_ms']:>7.0f}ms {stats['max_ms']:>7.0f}ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark worker start-up, from process start to the first request")
+    parser.add_argument("--role", choices=["parent", "child"], default="parent", help=argparse.SUPPRESS)
+    parser.add_argument("--config", help=argparse.SUPPRESS)
+    parser.add_argument("--runs", type=int, default=10, help="Fresh processes to start (default: 10)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    args = parser.parse_args()
+
+    if args.role == "child":
+        print(json.dumps(asyncio.run(child(json.loads(args.config)))))
+    else:
+        asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
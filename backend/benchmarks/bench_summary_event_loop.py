@@ -0,0 +1,108 @@
+"""Measure how summary generation affects the latency of other endpoints.
+
+Runs ``GET /`` probes against the app while a burst of ``POST /snippets/with-summary``
+requests and the summary jobs they queue are in flight. Gemini, the database and the sentiment API are replaced by
+in-process fakes with a fixed latency, so only event loop behaviour is measured.
+
+The ``blocking`` mode reproduces the old behaviour (a synchronous ``generate_content``
+call inside the handler); ``async`` uses the current non-blocking path.
+
+Usage:
+    python benchmarks/bench_summary_event_loop.py --summaries 8 --gemini-latency 1.0
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+import common  # noqa: F401  (sets up sys.path and placeholder env vars)
+from common import summarize, format_summary
+from fakes import FakeGemini, Latency
+
+import httpx
+
+import main
+from services import ai_service, journals_service, snippets_service
+from services.summary_queue_service import summary_queue
+
+def install_fakes(gemini_latency: float, blocking: bool) -> None:
+    async def create_snippet(user_id, entry):
+        return {"id": str(uuid.uuid4()), "user_id": str(user_id), "entry": entry, "created_at": "2025-01-01T00:00:00"}
+
+    async def get_snippets_for_date(user_id, snippet_date):
+        # A unique snippet per call keeps every request a summary cache miss
+        return [{"entry": "Went for a walk"}, {"entry": f"Cooked dinner ({uuid.uuid4()})"}]
+
+    async def create_or_update_journal(user_id, journal_date, entry, sentiment_score=None, snippet_count=None):
+        return {"id": str(uuid.uuid4()), "user_id": str(user_id), "date": journal_date.isoformat(),
+                "entry": entry, "sentiment_score": sentiment_score}
+
+    snippets_service.create_snippet = create_snippet
+    journals_service.get_snippets_for_date = get_snippets_for_date
+    journals_service.create_or_update_journal = create_or_update_journal
+    async def analyze_sentiment(text):
+        return 0.5, {}
+
+    ai_service.analyze_sentiment = analyze_sentiment
+    # In blocking mode the synchronous SDK call runs on the event loop thread, as it used to
+    ai_service.model = FakeGemini(Latency(gemini_latency), blocking=blocking)
+    # Each mode runs in its own event loop, so give it a fresh semaphore
+    ai_service.gemini_semaphore = asyncio.Semaphore(ai_service.GEMINI_MAX_CONCURRENT_REQUESTS)
+    summary_queue.debounce_seconds = 0
+
+async def probe(client: httpx.AsyncClient, stop: asyncio.Event, interval: float):
+    samples = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = await client.get("/")
+        response.raise_for_status()
+        samples.append(time.perf_counter() - start)
+        await asyncio.sleep(interval)
+    return samples
+
+async def run_mode(blocking: bool, summaries: int, gemini_latency: float, interval: float):
+    install_fakes(gemini_latency, blocking)
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        # Baseline: probes with nothing else running
+        stop = asyncio.Event()
+        probe_task = asyncio.create_task(probe(client, stop, interval))
+        await asyncio.sleep(gemini_latency)
+        stop.set()
+        baseline = await probe_task
+
+        # Under load: probes while a burst of summaries is generated
+        stop = asyncio.Event()
+        probe_task = asyncio.create_task(probe(client, stop, interval))
+        start = time.perf_counter()
+        # One user per request so the summary queue does not coalesce them into one job
+        responses = await asyncio.gather(*[
+            client.post("/snippets/with-summary", json={"user_id": str(uuid.uuid4()), "entry": f"snippet {i}"})
+            for i in range(summaries)
+        ])
+        await summary_queue.drain()
+        elapsed = time.perf_counter() - start
+        stop.set()
+        loaded = await probe_task
+
+    # A request is accepted before its summary runs, so also count the jobs that failed
+    failures = sum(1 for r in responses if r.status_code >= 400 or summary_queue.get_job(r.json()["job_id"])["status"] == "failed")
+    label = "blocking (sync generate_content)" if blocking else "async (generate_content_async)"
+    print(f"\n== {label}: {summaries} summaries in {elapsed:.2f}s, {failures} failures")
+    if failures:
+        raise SystemExit(f"FAILED: {failures} of {summaries} summaries failed, so the timings do not measure summaries")
+    print(format_summary("GET / idle", summarize(baseline)))
+    print(format_summary("GET / during summaries", summarize(loaded)))
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Benchmark event loop latency during summary generation")
+    parser.add_argument("--summaries", type=int, default=8, help="Concurrent summary requests (default: 8)")
+    parser.add_argument("--gemini-latency", type=float, default=1.0, help="Fake Gemini latency in seconds (default: 1.0)")
+    parser.add_argument("--probe-interval", type=float, default=0.01, help="Delay between probe requests in seconds")
+    args = parser.parse_args()
+
+    for blocking in (True, False):
+        asyncio.run(run_mode(blocking, args.summaries, args.gemini_latency, args.probe_interval))
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,103 @@
+"""Gemini calls and request latency for bursty snippet input.
+
+Each simulated user adds a burst of snippets a few hundred milliseconds apart.
+``direct`` regenerates the journal inside every request, as the endpoint used to;
+``queued`` creates the snippet and hands the regeneration to the summary queue,
+which coalesces the burst into one job per user and day.
+
+Usage:
+    python benchmarks/bench_summary_queue.py --users 20 --snippets 5 --debounce 1.0
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime
+
+import common  # noqa: F401  (sets up sys.path and placeholder env vars)
+from common import summarize, format_summary
+from fakes import FakeGemini, Latency
+
+from services import ai_service, journals_service, snippets_service
+from services.summary_queue_service import SummaryQueue
+
+def install_fakes(gemini_latency: float) -> FakeGemini:
+    snippets = defaultdict(list)
+
+    async def create_snippet(user_id, entry):
+        snippet = {"id": str(uuid.uuid4()), "user_id": str(user_id), "entry": entry, "created_at": "2025-01-01T00:00:00"}
+        snippets[str(user_id)].append(snippet)
+        return snippet
+
+    async def get_snippets_for_date(user_id, snippet_date):
+        return list(snippets[str(user_id)])
+
+    async def create_or_update_journal(user_id, journal_date, entry, sentiment_score=None, snippet_count=None):
+        return {"id": str(uuid.uuid4()), "user_id": str(user_id), "date": journal_date.isoformat(),
+                "entry": entry, "sentiment_score": sentiment_score}
+
+    async def analyze_sentiment(text):
+        return 0.5, {}
+
+    model = FakeGemini(Latency(gemini_latency))
+    snippets_service.create_snippet = create_snippet
+    journals_service.get_snippets_for_date = get_snippets_for_date
+    journals_service.create_or_update_journal = create_or_update_journal
+    ai_service.analyze_sentiment = analyze_sentiment
+    ai_service.model = model
+    ai_service.gemini_semaphore = asyncio.Semaphore(ai_service.GEMINI_MAX_CONCURRENT_REQUESTS)
+    ai_service.summary_cache.clear()
+    ai_service.sentiment_cache.clear()
+    return model
+
+async def simulate_user(mode: str, queue: SummaryQueue, snippets: int, gap: float, rng: random.Random, latencies, jobs):
+    user_id = uuid.uuid4()
+    for i in range(snippets):
+        await asyncio.sleep(rng.uniform(0, gap))
+        start = time.perf_counter()
+        await snippets_service.create_snippet(user_id, f"snippet {i}")
+        if mode == "direct":
+            await journals_service.create_journal_from_snippets(user_id)
+        else:
+            jobs.append(queue.enqueue(user_id, datetime.utcnow().date()))
+        latencies.append(time.perf_counter() - start)
+
+async def run_mode(mode: str, args) -> None:
+    model = install_fakes(args.gemini_latency)
+    queue = SummaryQueue(debounce_seconds=args.debounce, max_delay_seconds=args.debounce * 6)
+    rng = random.Random(args.seed)
+    latencies, jobs = [], []
+
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        simulate_user(mode, queue, args.snippets, args.gap, rng, latencies, jobs) for _ in range(args.users)
+    ])
+    await queue.drain()
+    elapsed = time.perf_counter() - start
+
+    # Queued summaries fail inside their job rather than in the request
+    failed = {job["job_id"]: job["error"] for job in jobs if job["status"] == "failed"}
+    if failed:
+        raise SystemExit(f"FAILED: {len(failed)} {mode} summary jobs failed ({next(iter(failed.values()))})")
+
+    print(f"\n== {mode}: {args.users} users x {args.snippets} snippets, {model.calls} Gemini calls, "
+          f"all journals up to date after {elapsed:.2f}s")
+    print(format_summary("request latency", summarize(latencies)))
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark coalescing of bursty summary requests")
+    parser.add_argument("--users", type=int, default=20, help="Simulated users (default: 20)")
+    parser.add_argument("--snippets", type=int, default=5, help="Snippets per user burst (default: 5)")
+    parser.add_argument("--gap", type=float, default=0.4, help="Maximum gap between a user's snippets in seconds")
+    parser.add_argument("--debounce", type=float, default=1.0, help="Summary queue debounce window in seconds")
+    parser.add_argument("--gemini-latency", type=float, default=0.5, help="Fake Gemini latency in seconds")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    for mode in ("direct", "queued"):
+        asyncio.run(run_mode(mode, args))
+
+if __name__ == "__main__":
+    main()
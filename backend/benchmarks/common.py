@@ -0,0 +1,43 @@
+"""Shared setup for the benchmark scripts.
+
+Importing this module puts the backend directory on the Python path and fills in
+placeholder credentials so that ``config`` can be imported without a real ``.env``.
+Benchmarks never talk to the real Supabase, Gemini or HuggingFace services.
+"""
+import os
+import statistics
+import sys
+from typing import Dict, List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:54321")
+# supabase-py only checks that the key is shaped like a JWT
+os.environ.setdefault("SUPABASE_SERVICE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.benchmark")
+os.environ.setdefault("GEMINI_API_KEY", "benchmark-gemini-key")
+os.environ.setdefault("GEMINI_RATE_LIMIT_PER_USER", "100000/minute")
+os.environ.setdefault("GEMINI_GLOBAL_RATE_LIMIT", "100000/minute")
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of samples."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Summarize latency samples (in seconds) as milliseconds."""
+    return {
+        "count": len(samples),
+        "mean_ms": statistics.fmean(samples) * 1000 if samples else 0.0,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+        "max_ms": max(samples) * 1000 if samples else 0.0,
+    }
+
+def format_summary(label: str, stats: Dict[str, float]) -> str:
+    return (f"{label:<32} n={stats['count']:<6} p50={stats['p50_ms']:8.2f}ms "
+            f"p95={stats['p95_ms']:8.2f}ms p99={stats['p99_ms']:8.2f}ms max={stats['max_ms']:8.2f}ms")
@@ -0,0 +1,318 @@
+"""Local stand-ins for Supabase (PostgREST), Gemini and the HuggingFace sentiment API.
+
+``create_fake_services_app`` builds a Starlette app that serves an in-memory
+PostgREST subset under ``/rest/v1`` (the filters, ordering, inserts and upserts
+the services use) and a HuggingFace-style sentiment endpoint under ``/hf``. Point
+SUPABASE_URL and HUGGINGFACE_API_URL at it and the backend runs unmodified.
+``FakeGemini`` replaces ``ai_service.model`` in process. Every fake takes a latency
+and a failure rate so slow or flaky dependencies can be simulated.
+"""
+import asyncio
+import random
+import threading
+import time
+import uuid
+import zlib
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+TIMESTAMP_COLUMNS = {"created_at"}
+OPERATORS = {
+    "eq": lambda a, b: a == b,
+    "neq": lambda a, b: a != b,
+    "gt": lambda a, b: a > b,
+    "gte": lambda a, b: a >= b,
+    "lt": lambda a, b: a < b,
+    "lte": lambda a, b: a <= b,
+}
+
+class Latency:
+    """A latency distribution: a base delay plus exponentially distributed jitter."""
+
+    def __init__(self, base: float = 0.0, jitter: float = 0.0, failure_rate: float = 0.0, seed: Optional[int] = None):
+        self.base = base
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.rng = random.Random(seed)
+
+    def sample(self) -> float:
+        return self.base + (self.rng.expovariate(1 / self.jitter) if self.jitter > 0 else 0.0)
+
+    def fails(self) -> bool:
+        return self.rng.random() < self.failure_rate
+
+    async def wait(self) -> bool:
+        """Sleep for one latency sample and return whether the call should fail."""
+        delay = self.sample()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return self.fails()
+
+def _coerce(column: str, value: Any) -> Any:
+    # Timestamps arrive both with and without an offset, so compare them as datetimes
+    if column in TIMESTAMP_COLUMNS and isinstance(value, str):
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+    return value
+
+def _split_top_level(text: str) -> List[str]:
+    parts, depth, current = [], 0, []
+    for char in text:
+        if char == "," and depth == 0:
+            parts.append("".join(current))
+            current = []
+            continue
+        depth += char == "("
+        depth -= char == ")"
+        current.append(char)
+    if current:
+        parts.append("".join(current))
+    return parts
+
+def _parse_condition(text: str):
+    """Parse a PostgREST logic tree such as ``a.lt.1,and(a.eq.1,b.lt.2)`` into a predicate."""
+    text = text.strip()
+    for combinator, combine in (("and(", all), ("or(", any)):
+        if text.startswith(combinator):
+            children = [_parse_condition(part) for part in _split_top_level(text[len(combinator):-1])]
+            return lambda row: combine(child(row) for child in children)
+    column, operator, value = text.split(".", 2)
+    return _filter(column, operator, value)
+
+def _filter(column: str, operator: str, value: str):
+    compare = OPERATORS[operator]
+    target = _coerce(column, value)
+
+    def predicate(row):
+        current = row.get(column)
+        return current is not None and compare(_coerce(column, current), target)
+    return predicate
+
+class FakePostgrest:
+    """
+    In-memory tables that answer the PostgREST requests made by supabase-py.
+
+    Rows are also kept per user, so queries filtered on user_id (all of them) only
+    scan that user's rows, as an index on user_id would.
+    """
+
+    def __init__(self, latency: Latency):
+        self.latency = latency
+        self.tables: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self.by_user: Dict[str, Dict[Any, List[Dict[str, Any]]]] = defaultdict(lambda: defaultdict(list))
+        # Unique indexes used by upserts, built on first use: (table, columns) -> key -> row
+        self.unique: Dict[Tuple[str, Tuple[str, ...]], Dict[tuple, Dict[str, Any]]] = {}
+        self.lock = threading.Lock()
+        self.requests = 0
+
+    def _index(self, table: str, columns: Tuple[str, ...]) -> Dict[tuple, Dict[str, Any]]:
+        key = (table, columns)
+        if key not in self.unique:
+            self.unique[key] = {tuple(row.get(c) for c in columns): row for row in self.tables[table]}
+        return self.unique[key]
+
+    def _append(self, table: str, row: Dict[str, Any]) -> None:
+        self.tables[table].append(row)
+        self.by_user[table][row.get("user_id")].append(row)
+        for (indexed_table, columns), index in self.unique.items():
+            if indexed_table == table:
+                index[tuple(row.get(c) for c in columns)] = row
+
+    def load(self, table: str, rows: List[Dict[str, Any]]) -> None:
+        """Add rows directly, without simulated latency (used to seed history)."""
+        with self.lock:
+            for row in rows:
+                self._append(table, dict(row))
+
+    def select(self, table: str, params: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        predicates, columns, order, limit, user_id = [], None, [], None, None
+        for name, value in params:
+            if name == "select":
+                columns = None if value == "*" else value.split(",")
+            elif name == "order":
+                order = [part.split(".") for part in value.split(",")]
+            elif name == "limit":
+                limit = int(value)
+            elif name in ("or", "and"):
+                predicates.append(_parse_condition(name + value))
+            else:
+                operator, operand = value.split(".", 1)
+                if name == "user_id" and operator == "eq":
+                    user_id = operand
+                predicates.append(_filter(name, operator, operand))
+
+        with self.lock:
+            candidates = self.by_user[table].get(user_id, []) if user_id is not None else self.tables[table]
+            rows = [row for row in candidates if all(p(row) for p in predicates)]
+        for column, *direction in reversed(order):
+            rows.sort(key=lambda row: _coerce(column, row.get(column)), reverse="desc" in direction)
+        if limit is not None:
+            rows = rows[:limit]
+        if columns is not None:
+            rows = [{c: row.get(c) for c in columns} for row in rows]
+        return rows
+
+    def write(self, table: str, rows: List[Dict[str, Any]], on_conflict: Optional[str], resolution: Optional[str]) -> List[Dict[str, Any]]:
+        written = []
+        conflict_columns = tuple(on_conflict.split(",")) if on_conflict else ("id",)
+        with self.lock:
+            index = self._index(table, conflict_columns)
+            for row in rows:
+                row = dict(row)
+                row.setdefault("id", str(uuid.uuid4()))
+                if table == "snippets":
+                    row.setdefault("created_at", datetime.now(timezone.utc).isoformat())
+                key = tuple(row.get(c) for c in conflict_columns)
+                # As in Postgres, keys containing NULL never conflict
+                existing = index.get(key) if None not in key else None
+                if existing is None:
+                    self._append(table, row)
+                    written.append(dict(row))
+                elif resolution == "merge-duplicates":
+                    row.pop("id", None)
+                    existing.update(row)
+                    written.append(dict(existing))
+                elif resolution != "ignore-duplicates":
+                    raise ValueError(f"duplicate key value violates unique constraint on {table} {conflict_columns}")
+        return written
+
+    async def handle(self, request: Request):
+        self.requests += 1
+        if await self.latency.wait():
+            return JSONResponse({"message": "simulated database failure", "code": "XX000"}, status_code=503)
+
+        table = request.path_params["table"]
+        params = list(request.query_params.multi_items())
+        if request.method == "GET":
+            return JSONResponse(self.select(table, params))
+        if request.method == "POST":
+            body = await request.json()
+            rows = body if isinstance(body, list) else [body]
+            prefer = request.headers.get("prefer", "")
+            resolution = next((part.split("=", 1)[1] for part in prefer.split(",") if part.startswith("resolution=")), None)
+            try:
+                written = self.write(table, rows, request.query_params.get("on_conflict"), resolution)
+            except ValueError as e:
+                return JSONResponse({"message": str(e), "code": "23505"}, status_code=409)
+            return JSONResponse(written, status_code=201)
+        return JSONResponse({"message": f"{request.method} not supported by the fake"}, status_code=405)
+
+class FakeSentimentApi:
+    """A HuggingFace inference endpoint that returns label scores derived from the text."""
+
+    def __init__(self, latency: Latency):
+        self.latency = latency
+        self.requests = 0
+
+    async def handle(self, request: Request):
+        self.requests += 1
+        if await self.latency.wait():
+            return JSONResponse({"error": "Model is currently loading"}, status_code=503)
+        inputs = (await request.json()).get("inputs", [])
+        texts = inputs if isinstance(inputs, list) else [inputs]
+        results = []
+        for text in texts:
+            positive = zlib.crc32(text.encode("utf-8")) % 1000 / 1000
+            results.append([
+                {"label": "POSITIVE", "score": positive},
+                {"label": "NEGATIVE", "score": 1 - positive},
+            ])
+        return JSONResponse(results)
+
+def create_fake_services_app(database_latency: Latency, sentiment_latency: Latency):
+    """
+    Build the app serving the fake PostgREST and sentiment endpoints.
+
+    Returns:
+        Tuple of (app, FakePostgrest, FakeSentimentApi)
+    """
+    database = FakePostgrest(database_latency)
+    sentiment = FakeSentimentApi(sentiment_latency)
+
+    async def stats(request: Request):
+        return JSONResponse({
+            "database_requests": database.requests,
+            "sentiment_requests": sentiment.requests,
+            "rows": {table: len(rows) for table, rows in database.tables.items()},
+        })
+
+    app = Starlette(routes=[
+        Route("/rest/v1/{table}", database.handle, methods=["GET", "POST", "PATCH", "DELETE"]),
+        Route("/hf", sentiment.handle, methods=["POST"]),
+        Route("/stats", stats),
+    ])
+    return app, database, sentiment
+
+class FakeGeminiResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+class FakeGeminiStream:
+    """Response chunks as returned with stream=True: a few words at a time, spread over the latency."""
+
+    def __init__(self, text: str, delay: float, fails: bool):
+        self.text = text
+        self.delay = delay
+        self.fails = fails
+
+    async def __aiter__(self):
+        words = self.text.split(" ")
+        chunks = [" ".join(words[i:i + 3]) + " " for i in range(0, len(words), 3)]
+        # Like the real API, the first chunk takes longest and the rest trickle in
+        await asyncio.sleep(self.delay * 0.4)
+        for i, chunk in enumerate(chunks):
+            if i:
+                await asyncio.sleep(self.delay * 0.6 / len(chunks))
+            if self.fails and i == len(chunks) // 2:
+                raise RuntimeError("simulated Gemini failure")
+            yield FakeGeminiResponse(chunk)
+
+class FakeGemini:
+    """
+    Stands in for ai_service.model, with configurable latency and failures.
+
+    With blocking=True generate_content_async makes the synchronous SDK call on the
+    event loop thread, as summaries were generated before the async path existed.
+    per_token_latency adds a cost per prompt token, as longer prompts take the real
+    model longer; max_prompt_tokens records the largest prompt seen.
+    """
+
+    def __init__(self, latency: Latency, blocking: bool = False, per_token_latency: float = 0.0):
+        self.latency = latency
+        self.blocking = blocking
+        self.per_token_latency = per_token_latency
+        self.calls = 0
+        self.max_prompt_tokens = 0
+
+    def _call(self, prompt: str) -> Tuple[str, float, bool]:
+        """Record a call and return its response text, delay and whether it fails."""
+        # Same estimate as ai_service.estimate_tokens
+        tokens = len(prompt) // 4 + 1
+        self.calls += 1
+        self.max_prompt_tokens = max(self.max_prompt_tokens, tokens)
+        text = f"A journal entry written from {len(prompt)} characters of notes, one sentence at a time."
+        return text, self.latency.sample() + tokens * self.per_token_latency, self.latency.fails()
+
+    def generate_content(self, prompt):
+        text, delay, fails = self._call(prompt)
+        time.sleep(delay)
+        if fails:
+            raise RuntimeError("simulated Gemini failure")
+        return FakeGeminiResponse(text)
+
+    async def generate_content_async(self, prompt, stream: bool = False):
+        if self.blocking and not stream:
+            return self.generate_content(prompt)
+        text, delay, fails = self._call(prompt)
+        if stream:
+            return FakeGeminiStream(text, delay, fails)
+        await asyncio.sleep(delay)
+        if fails:
+            raise RuntimeError("simulated Gemini failure")
+        return FakeGeminiResponse(text)
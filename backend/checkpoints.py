@@ -0,0 +1,27 @@
+"""Progress files for the resumable batch scripts (summarize_stale_days.py,
+rescore_sentiment.py, backfill_embeddings.py).
+
+A checkpoint is a small JSON object written after every page or chunk; each
+script decides whether a saved one belongs to the run it is starting.
+"""
+import json
+import os
+from typing import Any, Dict, Optional
+
+def read_checkpoint(path: str) -> Optional[Dict[str, Any]]:
+    """Read a saved checkpoint, or None if there is none."""
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def save_checkpoint(path: str, checkpoint: Dict[str, Any]) -> None:
+    # Write and rename, so a crash mid-write leaves the previous checkpoint intact
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(f"{path}.tmp", path)
+
+def remove_checkpoint(path: str) -> None:
+    """Remove the checkpoint of a finished run."""
+    if os.path.exists(path):
+        os.remove(path)
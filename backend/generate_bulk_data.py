@@ -0,0 +1,338 @@
+"""Generate large volumes of synthetic users, snippets and journals.
+
+Unlike populate_sample_data.py, which writes a few days for one user row by row,
+this script is meant for seeding realistic scale (thousands of users with years
+of history) to test query performance. It runs without prompting, writes in
+batched bulk inserts with several batches in flight, and can instead write CSV or
+NDJSON files for loading with COPY (or ``\\copy`` from psql).
+
+The same --seed always produces the same users, rows and ids, so a partially
+loaded run can simply be restarted: snippets are upserted on their id and
+journals on (user_id, date), and existing rows are left alone.
+
+Usage:
+    python generate_bulk_data.py --users 1000 --days 730 --seed 42
+    python generate_bulk_data.py --users 1000 --days 730 --output csv --output-dir seed_data
+    python generate_bulk_data.py --user-id <existing user uuid> --days 3650
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import random
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Tuple
+
+SNIPPET_FIELDS = ["id", "user_id", "entry", "created_at"]
+JOURNAL_FIELDS = ["id", "user_id", "date", "entry", "sentiment_score"]
+USER_FIELDS = ["id", "email"]
+
+# Sentence fragments combined into snippets, grouped by time of day
+ACTIVITIES = {
+    "morning": [
+        "Woke up early and made coffee",
+        "Went for a run along the river",
+        "Had oatmeal with berries for breakfast",
+        "Did twenty minutes of yoga",
+        "Read the news over breakfast",
+        "Meditated before starting work",
+        "Walked the dog around the block",
+        "Caught the early train to the office",
+        "Reviewed my goals for the week",
+        "Answered emails from overnight",
+    ],
+    "afternoon": [
+        "Had a long planning meeting with the team",
+        "Grabbed lunch with a colleague",
+        "Fixed a tricky bug in the billing code",
+        "Presented the quarterly results",
+        "Worked through a backlog of reviews",
+        "Took a walk to clear my head",
+        "Ran a workshop for new hires",
+        "Spent the afternoon writing documentation",
+        "Had a call with a difficult client",
+        "Paired with a teammate on the new feature",
+    ],
+    "evening": [
+        "Cooked pasta for dinner",
+        "Went to the gym after work",
+        "Called my parents to catch up",
+        "Watched a movie with friends",
+        "Read a few chapters of my novel",
+        "Went to bed early",
+        "Practiced guitar for an hour",
+        "Cleaned up the apartment",
+        "Planned tomorrow's tasks",
+        "Played board games with my roommates",
+    ],
+}
+
+# Optional second clauses; the mood words give sentiment scoring something to work with
+FEELINGS = [
+    "and felt great about it",
+    "which was really relaxing",
+    "and it left me exhausted",
+    "but I was frustrated the whole time",
+    "and I'm proud of how it went",
+    "though I felt a bit anxious",
+    "which made me happy",
+    "and honestly it was boring",
+    "and it was a lot of fun",
+    "but the weather was terrible",
+    "",
+    "",
+    "",
+]
+
+# Hour range (inclusive) for the snippets of each time of day
+PERIOD_HOURS = {"morning": (6, 11), "afternoon": (12, 17), "evening": (18, 23)}
+
+def make_uuid(rng: random.Random) -> str:
+    """Draw a version 4 UUID from rng, so ids are reproducible from the seed."""
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+def generate_user_ids(seed: int, count: int) -> List[str]:
+    """Get the ids of the synthetic users for a seed."""
+    rng = random.Random(f"{seed}:users")
+    return [make_uuid(rng) for _ in range(count)]
+
+def generate_day(rng: random.Random, user_id: str, day: date, min_snippets: int, max_snippets: int):
+    """
+    Generate the snippets and journal of one user for one day.
+
+    Args:
+        rng: The random generator of the user
+        user_id: The user's id
+        day: The day to generate
+        min_snippets: Fewest snippets in a day
+        max_snippets: Most snippets in a day
+
+    Returns:
+        Tuple containing:
+        - The day's snippets, oldest first
+        - The day's journal
+    """
+    count = rng.randint(min_snippets, max_snippets)
+    periods = sorted(rng.choices(list(PERIOD_HOURS), k=count), key=list(PERIOD_HOURS).index)
+    snippets = []
+    for period in periods:
+        first_hour, last_hour = PERIOD_HOURS[period]
+        created_at = datetime(day.year, day.month, day.day, rng.randint(first_hour, last_hour),
+                              rng.randint(0, 59), rng.randint(0, 59), tzinfo=timezone.utc)
+        entry = " ".join(part for part in (rng.choice(ACTIVITIES[period]), rng.choice(FEELINGS)) if part) + "."
+        snippets.append({"id": make_uuid(rng), "user_id": user_id, "entry": entry, "created_at": created_at.isoformat()})
+    snippets.sort(key=lambda s: s["created_at"])
+
+    journal = {
+        "id": make_uuid(rng),
+        "user_id": user_id,
+        "date": day.isoformat(),
+        "entry": " ".join(s["entry"] for s in snippets),
+        "sentiment_score": round(rng.uniform(-1.0, 1.0), 2),
+    }
+    return snippets, journal
+
+def generate_rows(user_ids: List[str], seed: int, end_date: date, days: int, min_snippets: int,
+                  max_snippets: int, skip_probability: float) -> Iterator[tuple]:
+    """
+    Yield ("snippets", row) and ("journals", row) pairs for every user and day.
+
+    Each user has its own generator seeded from the seed and the user id, so a user's
+    history does not depend on how many other users are generated.
+    """
+    for user_id in user_ids:
+        rng = random.Random(f"{seed}:{user_id}")
+        for offset in range(days - 1, -1, -1):
+            # Some days have no entries at all, as with real users
+            if rng.random() < skip_probability:
+                continue
+            snippets, journal = generate_day(rng, user_id, end_date - timedelta(days=offset), min_snippets, max_snippets)
+            for snippet in snippets:
+                yield "snippets", snippet
+            yield "journals", journal
+
+class FileWriter:
+    """Write rows to one CSV or NDJSON file per table."""
+
+    def __init__(self, output_dir: str, file_format: str):
+        os.makedirs(output_dir, exist_ok=True)
+        self.file_format = file_format
+        self.files = {}
+        self.writers = {}
+        for table, fields in (("users", USER_FIELDS), ("snippets", SNIPPET_FIELDS), ("journals", JOURNAL_FIELDS)):
+            handle = open(os.path.join(output_dir, f"{table}.{file_format}"), "w", newline="", encoding="utf-8")
+            self.files[table] = handle
+            if file_format == "csv":
+                self.writers[table] = csv.DictWriter(handle, fieldnames=fields)
+                self.writers[table].writeheader()
+
+    async def create_users(self, user_ids: List[str], semaphore: asyncio.Semaphore) -> None:
+        await self.write("users", [{"id": user_id, "email": f"synthetic-{user_id[:8]}@example.com"} for user_id in user_ids])
+
+    async def write(self, table: str, rows: List[Dict[str, Any]]) -> None:
+        if self.file_format == "csv":
+            self.writers[table].writerows(rows)
+        else:
+            self.files[table].write("".join(json.dumps(row, separators=(",", ":")) + "\n" for row in rows))
+
+    def close(self) -> None:
+        for handle in self.files.values():
+            handle.close()
+
+class SupabaseWriter:
+    """Bulk insert rows into Supabase, one request per batch."""
+
+    def __init__(self):
+        # Imported here so that file output works without Supabase credentials
+        from services.db_service import get_client
+        self.client = get_client()
+
+    async def create_users(self, user_ids: List[str], semaphore: asyncio.Semaphore) -> None:
+        """Create auth users with the synthetic ids, skipping ones that already exist."""
+        # The admin API creates one user per request, so they are created in parallel
+        # within the same --concurrency limit as the bulk inserts
+        async def create_user(user_id: str) -> None:
+            async with semaphore:
+                try:
+                    await asyncio.to_thread(self.client.auth.admin.create_user, {
+                        "id": user_id,
+                        "email": f"synthetic-{user_id[:8]}@example.com",
+                        "password": uuid.uuid4().hex,
+                        "email_confirm": True,
+                    })
+                except Exception as e:
+                    if "already" not in str(e).lower():
+                        raise
+
+        await asyncio.gather(*(create_user(user_id) for user_id in user_ids))
+
+    async def write(self, table: str, rows: List[Dict[str, Any]]) -> None:
+        # supabase-py is synchronous, so each batch runs in a worker thread
+        on_conflict = "user_id,date" if table == "journals" else "id"
+        await asyncio.to_thread(
+            lambda: self.client.table(table).upsert(rows, on_conflict=on_conflict, ignore_duplicates=True).execute()
+        )
+
+    def close(self) -> None:
+        pass
+
+async def load(writer, rows: Iterator[tuple], batch_size: int, semaphore: asyncio.Semaphore) -> Tuple[Dict[str, int], List[str]]:
+    """
+    Write rows in batches of batch_size, with one batch in flight per slot of semaphore.
+
+    Stops generating rows after the first batch that fails, and waits for the
+    batches already in flight.
+
+    Returns:
+        The number of rows written per table, and an error message per failed batch
+    """
+    buffers: Dict[str, List[Dict[str, Any]]] = {"snippets": [], "journals": []}
+    counts = {"snippets": 0, "journals": 0}
+    errors: List[str] = []
+    tasks = set()
+    started = time.perf_counter()
+
+    async def write_batch(table: str, batch: List[Dict[str, Any]]):
+        # Failures are collected here rather than raised, since nothing awaits a task
+        # that finished before the final gather
+        try:
+            await writer.write(table, batch)
+            counts[table] += len(batch)
+        except Exception as e:
+            errors.append(f"{len(batch)} {table}: {e}")
+        finally:
+            semaphore.release()
+
+    async def flush(table: str):
+        batch, buffers[table] = buffers[table], []
+        # Wait for a free slot before generating more rows, so memory stays bounded
+        await semaphore.acquire()
+        task = asyncio.create_task(write_batch(table, batch))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    last_report = started
+    for table, row in rows:
+        if errors:
+            break
+        buffers[table].append(row)
+        if len(buffers[table]) >= batch_size:
+            await flush(table)
+            if time.perf_counter() - last_report >= 5:
+                last_report = time.perf_counter()
+                total = sum(counts.values())
+                print(f"  {counts['snippets']} snippets, {counts['journals']} journals "
+                      f"({total / (last_report - started):.0f} rows/s)")
+
+    for table in buffers:
+        if buffers[table] and not errors:
+            await flush(table)
+    await asyncio.gather(*tasks)
+    return counts, errors
+
+async def run(args) -> None:
+    user_ids = [str(user_id) for user_id in args.user_id] or generate_user_ids(args.seed, args.users)
+    end_date = datetime.strptime(args.end_date, "%Y-%m-%d").date() if args.end_date else date.today() - timedelta(days=1)
+
+    if args.output == "supabase":
+        # supabase-py calls run in worker threads; size the pool so that --concurrency,
+        # not the default pool size, limits them
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=args.concurrency))
+        writer = SupabaseWriter()
+    else:
+        writer = FileWriter(args.output_dir, args.output)
+
+    # Shared by user creation and the bulk inserts, so --concurrency caps both
+    semaphore = asyncio.Semaphore(args.concurrency)
+    try:
+        if not args.user_id:
+            print(f"Creating {len(user_ids)} users...")
+            await writer.create_users(user_ids, semaphore)
+
+        print(f"Generating {args.days} days ending {end_date} for {len(user_ids)} users (seed {args.seed})...")
+        started = time.perf_counter()
+        rows = generate_rows(user_ids, args.seed, end_date, args.days, args.min_snippets, args.max_snippets, args.skip_probability)
+        counts, errors = await load(writer, rows, args.batch_size, semaphore)
+        elapsed = time.perf_counter() - started
+    finally:
+        writer.close()
+
+    total = sum(counts.values())
+    print(f"Wrote {counts['snippets']} snippets and {counts['journals']} journals in {elapsed:.1f}s "
+          f"({total / elapsed if elapsed else 0:.0f} rows/s)")
+    if errors:
+        for error in errors:
+            print(f"  Failed batch of {error}")
+        raise SystemExit(f"FAILED: {len(errors)} batches could not be written; the data is incomplete")
+    if args.output != "supabase":
+        print(f"Files are in {args.output_dir}; load users before snippets and journals")
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic users, snippets and journals at scale")
+    parser.add_argument("--users", type=int, default=100, help="Number of synthetic users to create (default: 100)")
+    parser.add_argument("--user-id", action="append", type=uuid.UUID, default=[],
+                        help="Generate data for this existing user instead of creating users (repeatable)")
+    parser.add_argument("--days", type=int, default=365, help="Days of history per user (default: 365)")
+    parser.add_argument("--end-date", type=str, help="Last day to generate in YYYY-MM-DD format (default: yesterday)")
+    parser.add_argument("--min-snippets", type=int, default=2, help="Fewest snippets per day (default: 2)")
+    parser.add_argument("--max-snippets", type=int, default=10, help="Most snippets per day (default: 10)")
+    parser.add_argument("--skip-probability", type=float, default=0.1, help="Chance that a user writes nothing on a day (default: 0.1)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed; the same seed produces the same data (default: 0)")
+    parser.add_argument("--output", choices=["supabase", "csv", "ndjson"], default="supabase",
+                        help="Insert into Supabase or write files for COPY (default: supabase)")
+    parser.add_argument("--output-dir", default="synthetic_data", help="Directory for csv/ndjson output (default: synthetic_data)")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Rows per bulk insert (default: 1000)")
+    parser.add_argument("--concurrency", type=int, default=4, help="User creations or bulk inserts in flight at once (default: 4)")
+    args = parser.parse_args()
+
+    if args.min_snippets < 1 or args.max_snippets < args.min_snippets:
+        parser.error("--min-snippets must be at least 1 and no larger than --max-snippets")
+
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
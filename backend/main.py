@@ -1,31 +1,72 @@
-from datetime import date
-from fastapi import FastAPI, HTTPException, Request, Depends
+from contextlib import aclosing, asynccontextmanager
+from datetime import date, datetime, timezone
+from fastapi import FastAPI, HTTPException, Request, Response, Depends, Header, Query
 from fastapi.middleware.cors import CORSMiddleware
-from models import Snippet, Journal, SnippetResponse, JournalResponse
-from services import snippets_service, journals_service
+from fastapi.responses import FileResponse, StreamingResponse
+from models import Snippet, SnippetBatch, SnippetBatchResponse, Journal, SnippetResponse, JournalResponse, SnippetListItem, JournalListItem, SummaryJobResponse, MoodBucket, ProfileInfo, SearchResult, SimilarDay
+from services import snippets_service, journals_service, sentiment_service, ai_service, mood_service, search_service, embedding_service
+from services.repository import get_repository
+from services.summary_queue_service import summary_queue
+from services.journal_cache_service import journal_read_cache, etag_matches
+from services.metrics_service import count_rate_limit_rejection, render_metrics
+from services.serialization import encode_rows, rows_response
+from services import profiling_service
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 from slowapi.middleware import SlowAPIMiddleware
 from slowapi.util import get_remote_address
-from typing import List, Optional
+from limits import parse as parse_limit
+from typing import Dict, List, Literal, Optional, Tuple
+from pydantic import TypeAdapter
+import asyncio
+import json
 import os
 import traceback
 import uuid
 
 # Import configuration
-from config import GEMINI_RATE_LIMIT_PER_USER, GEMINI_GLOBAL_RATE_LIMIT
+from config import GEMINI_RATE_LIMIT_PER_USER, RATE_LIMIT_STORAGE_URI, MAX_PAGE_SIZE, SNIPPET_BATCH_MAX_SIZE
 
-# Create a limiter instance and configure it to use IP address as the key
-limiter = Limiter(key_func=get_remote_address)
+# Create a limiter instance and configure it to use IP address as the key. Counters live in
+# RATE_LIMIT_STORAGE_URI so all workers share them (the sqlite:// scheme is registered by
+# services.rate_limit_service, imported above through the services package)
+limiter = Limiter(key_func=get_remote_address, storage_uri=RATE_LIMIT_STORAGE_URI)
+
+# Every endpoint that queues journal summaries (Gemini calls) draws from one per-user budget
+SUMMARY_LIMIT_SCOPE = "summaries"
+summary_rate_limit = parse_limit(GEMINI_RATE_LIMIT_PER_USER)
+
+# Open shared database and HTTP clients on startup and close them on shutdown
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    ai_service.load_caches()
+    await get_repository().open()
+    await sentiment_service.get_backend().open()
+    yield
+    # Finish queued summaries before the clients they need are closed
+    await summary_queue.drain()
+    await sentiment_service.get_backend().close()
+    await get_repository().close()
+    ai_service.save_caches()
 
 # Create FastAPI app with the limiter
-app = FastAPI(title="Journal API")
+app = FastAPI(title="Journal API", lifespan=lifespan)
 app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+
+# Count rejections for /metrics before answering with slowapi's 429
+def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded) -> Response:
+    count_rate_limit_rejection("request")
+    return _rate_limit_exceeded_handler(request, exc)
+
+app.add_exception_handler(RateLimitExceeded, rate_limit_exceeded_handler)
 
 # Add the SlowAPI middleware
 app.add_middleware(SlowAPIMiddleware)
 
+# Profile sampled or signed requests; skipped entirely unless profiling is configured
+if profiling_service.profiling_enabled():
+    app.add_middleware(profiling_service.ProfilingMiddleware)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -33,6 +74,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 # Get a user-specific key for rate limiting
@@ -61,9 +103,54 @@ def get_user_key(request: Request):
 async def create_snippet(snippet: Snippet):
     return await snippets_service.create_snippet(snippet.user_id, snippet.entry)
 
-@app.get("/snippets/{user_id}", response_model=List[SnippetResponse])
-async def get_snippets(user_id: uuid.UUID):
-    return await snippets_service.get_snippets(user_id)
+# Used to serialize journal responses once, before they are cached
+journal_adapter = TypeAdapter(Optional[JournalResponse])
+
+def take_summary_slots(user_id: uuid.UUID, days: int) -> int:
+    """Charge the user's summary budget once per day, as far as it allows, and return how many days fit."""
+    key = f"user:{user_id}"
+    for taken in range(days):
+        if not limiter.limiter.hit(summary_rate_limit, key, SUMMARY_LIMIT_SCOPE):
+            return taken
+    return days
+
+@app.post("/snippets/batch", response_model=SnippetBatchResponse)
+async def create_snippets_batch(batch: SnippetBatch):
+    if len(batch.snippets) > SNIPPET_BATCH_MAX_SIZE:
+        raise HTTPException(status_code=413, detail=f"At most {SNIPPET_BATCH_MAX_SIZE} snippets per batch")
+
+    created, duplicates = await snippets_service.create_snippets(batch.user_id, [s.model_dump() for s in batch.snippets])
+
+    # Regenerate each day that received new snippets once, however many snippets it got. Each
+    # day costs one summary from the user's budget; the snippets are saved either way, and days
+    # over the budget are left stale for summarize_stale_days.py, newest days first in line
+    days = sorted({datetime.fromisoformat(s["created_at"]).astimezone(timezone.utc).date() for s in created}, reverse=True)
+    # The limiter storage may be a SQLite file, so keep its IO off the event loop
+    queued = await asyncio.to_thread(take_summary_slots, batch.user_id, len(days))
+    if queued < len(days):
+        count_rate_limit_rejection("summary_deferred")
+    summary_jobs = [summary_queue.enqueue(batch.user_id, day) for day in days[:queued]]
+    return {"created": created, "duplicates": duplicates, "summary_jobs": summary_jobs, "deferred_days": sorted(days[queued:])}
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    return [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+
+def next_cursor_headers(cursor: Optional[str]) -> Dict[str, str]:
+    return {"X-Next-Cursor": cursor} if cursor else {}
+
+@app.get("/snippets/{user_id}", response_model=List[SnippetListItem], response_model_exclude_unset=True)
+async def get_snippets(
+    user_id: uuid.UUID,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma separated columns to return"),
+    from_date: Optional[date] = Query(None, alias="from", description="First day to include (inclusive)"),
+    to_date: Optional[date] = Query(None, alias="to", description="Last day to include (inclusive)"),
+    tz: str = Query("UTC", description="IANA timezone the from/to days are in"),
+):
+    snippets, next_cursor = await snippets_service.get_snippets(user_id, limit, cursor, parse_fields(fields), from_date, to_date, tz)
+    # The response model documents the rows; they are encoded as they come from the repository
+    return rows_response(snippets, next_cursor_headers(next_cursor))
 
 # Journals endpoints
 @app.post("/journals", response_model=JournalResponse)
@@ -76,35 +163,97 @@ async def create_or_update_journal(journal: Journal):
         print(traceback.format_exc())
         raise HTTPException(status_code=500, detail=str(e))
 
+def cached_json_response(request: Request, entry: Tuple[bytes, str, Dict[str, str]]) -> Response:
+    """Send a cached response body, or 304 if the client already has this version."""
+    body, etag, headers = entry
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache", **headers}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        journal_read_cache.record_not_modified(body)
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
 @app.get("/journals/{user_id}/{date}", response_model=Optional[JournalResponse])
-async def get_journal(user_id: uuid.UUID, date: date):
+async def get_journal(request: Request, user_id: uuid.UUID, date: date):
     try:
-        return await journals_service.get_journal(user_id, date)
+        cache_key = journal_read_cache.key(user_id, f"journal|{date.isoformat()}")
+        entry = journal_read_cache.get(cache_key)
+        if entry is None:
+            journal = await journals_service.get_journal(user_id, date)
+            body = journal_adapter.dump_json(journal_adapter.validate_python(journal))
+            entry = journal_read_cache.set(cache_key, body)
+        return cached_json_response(request, entry)
     except Exception as e:
         print(f"Error in get_journal endpoint: {str(e)}")
         import traceback
         print(traceback.format_exc())
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/journals/{user_id}", response_model=List[JournalResponse])
-async def get_journals(user_id: uuid.UUID):
+@app.get("/journals/{user_id}/{date}/similar", response_model=List[SimilarDay])
+async def get_similar_days(user_id: uuid.UUID, date: date, limit: int = Query(5, ge=1, le=50)):
+    return await journals_service.get_similar_days(user_id, date, limit)
+
+@app.get("/journals/{user_id}", response_model=List[JournalListItem], response_model_exclude_unset=True)
+async def get_journals(
+    request: Request,
+    user_id: uuid.UUID,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma separated columns to return"),
+    view: Literal["full", "summary"] = "full",
+    from_date: Optional[date] = Query(None, alias="from", description="First date to include (inclusive)"),
+    to_date: Optional[date] = Query(None, alias="to", description="Last date to include (inclusive)"),
+):
     try:
-        return await journals_service.get_journals(user_id)
+        # The summary view is for list and calendar screens and leaves out the entry text
+        columns = parse_fields(fields)
+        if view == "summary" and columns is None:
+            columns = list(journals_service.JOURNAL_SUMMARY_COLUMNS)
+
+        cache_key = journal_read_cache.key(user_id, f"list|{limit}|{cursor}|{','.join(columns or [])}|{from_date}|{to_date}")
+        entry = journal_read_cache.get(cache_key)
+        if entry is None:
+            journals, next_cursor = await journals_service.get_journals(user_id, limit, cursor, columns, from_date, to_date)
+            entry = journal_read_cache.set(cache_key, encode_rows(journals), next_cursor_headers(next_cursor))
+        return cached_json_response(request, entry)
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error in get_journals endpoint: {str(e)}")
         import traceback
         print(traceback.format_exc())
         raise HTTPException(status_code=500, detail=str(e))
 
+# Search endpoints
+@app.get("/search/{user_id}", response_model=List[SearchResult])
+async def search_entries(
+    user_id: uuid.UUID,
+    q: str = Query(..., min_length=1, max_length=200, description="Words or phrases to find in journals and snippets"),
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+):
+    results, next_cursor = await search_service.search_entries(user_id, q, limit, cursor)
+    return rows_response(results, next_cursor_headers(next_cursor))
+
+# Dashboard endpoints
+@app.get("/dashboard/{user_id}/mood", response_model=List[MoodBucket])
+async def get_mood_rollups(
+    user_id: uuid.UUID,
+    granularity: Literal["day", "week", "month"] = "day",
+    from_date: Optional[date] = Query(None, alias="from", description="First date to include"),
+    to_date: Optional[date] = Query(None, alias="to", description="Last date to include"),
+):
+    return await mood_service.get_mood_rollups(user_id, granularity, from_date, to_date)
+
 # Rate limited endpoint for Gemini API
 # We need to store the snippet before the rate limiter dependency processes the request
 async def create_snippet_with_summary_dependency(request: Request, snippet: Snippet):
     request.state.snippet = snippet
     return snippet
 
-@app.post("/snippets/with-summary", response_model=JournalResponse)
-@limiter.limit(GEMINI_RATE_LIMIT_PER_USER, key_func=get_user_key)
-@limiter.limit(GEMINI_GLOBAL_RATE_LIMIT)
+@app.post("/snippets/with-summary", response_model=SummaryJobResponse, status_code=202)
+# The global Gemini budget is enforced per Gemini call by rate_limit_service.gemini_quota,
+# which queues summaries fairly across users instead of rejecting the request here
+@limiter.shared_limit(GEMINI_RATE_LIMIT_PER_USER, scope=SUMMARY_LIMIT_SCOPE, key_func=get_user_key)
 async def create_snippet_with_summary(
     request: Request,
     snippet: Snippet = Depends(create_snippet_with_summary_dependency)
@@ -113,14 +262,94 @@ async def create_snippet_with_summary(
         # Create the snippet
         await snippets_service.create_snippet(snippet.user_id, snippet.entry)
         
-        # Generate journal from snippets
-        return await journals_service.create_journal_from_snippets(snippet.user_id)
+        # Queue the journal regeneration; snippets added in quick succession share one job
+        return summary_queue.enqueue(snippet.user_id, datetime.utcnow().date())
     except Exception as e:
         print(f"Error in create_snippet_with_summary: {str(e)}")
         print(f"Error type: {type(e)}")
         print(f"Traceback: {traceback.format_exc()}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def sse_event(event: str, data: str) -> str:
+    return f"event: {event}\ndata: {data}\n\n"
+
+# Streaming variant of /snippets/with-summary: the journal text is sent as server-sent
+# events while Gemini writes it ("delta" events with {"text": ...}), followed by a
+# "journal" event with the saved journal, or an "error" event
+@app.post("/snippets/with-summary/stream")
+@limiter.shared_limit(GEMINI_RATE_LIMIT_PER_USER, scope=SUMMARY_LIMIT_SCOPE, key_func=get_user_key)
+async def create_snippet_with_summary_stream(
+    request: Request,
+    snippet: Snippet = Depends(create_snippet_with_summary_dependency)
+):
+    await snippets_service.create_snippet(snippet.user_id, snippet.entry)
+    journal_date = datetime.utcnow().date()
+
+    async def events():
+        finished = False
+        try:
+            async with aclosing(journals_service.stream_journal_from_snippets(snippet.user_id, journal_date)) as stream:
+                async for event, data in stream:
+                    if event == "delta":
+                        yield sse_event(event, json.dumps({"text": data}))
+                    elif event == "journal":
+                        yield sse_event(event, JournalResponse.model_validate(data).model_dump_json())
+                    else:
+                        yield sse_event(event, json.dumps(data))
+            finished = True
+        finally:
+            if not finished:
+                # The client went away mid-stream; regenerate the journal in the background instead
+                summary_queue.enqueue(snippet.user_id, journal_date)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Stop proxies such as nginx from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/summaries/jobs/{job_id}", response_model=SummaryJobResponse)
+async def get_summary_job(job_id: uuid.UUID):
+    job = summary_queue.get_job(str(job_id))
+    if job is None:
+        raise HTTPException(status_code=404, detail="Summary job not found")
+    return job
+
+@app.get("/cache/stats")
+async def get_cache_stats():
+    return {
+        "summary": ai_service.summary_cache.stats(),
+        "sentiment": ai_service.sentiment_cache.stats(),
+        "journal_reads": journal_read_cache.stats(),
+        "embedding_indexes": embedding_service.index_cache.stats(),
+    }
+
+@app.get("/metrics")
+async def get_metrics():
+    content, content_type = render_metrics()
+    return Response(content=content, media_type=content_type)
+
+# Profiles show code paths and request stacks, so they always require the signed header;
+# without PROFILING_SECRET nothing can sign one and the profiles stay closed
+def require_profile_access(x_profile: Optional[str] = Header(None)):
+    if not profiling_service.verify_profile_header(x_profile):
+        raise HTTPException(status_code=403, detail="A valid X-Profile header is required")
+
+@app.get("/profiles", response_model=List[ProfileInfo], dependencies=[Depends(require_profile_access)])
+async def list_profiles(
+    endpoint: Optional[str] = Query(None, description="Only profiles of this route, e.g. /snippets/with-summary"),
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+):
+    return profiling_service.list_profiles(endpoint, limit)
+
+@app.get("/profiles/{name}", dependencies=[Depends(require_profile_access)])
+async def download_profile(name: str):
+    path = profiling_service.profile_path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/json", filename=name)
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to the API"}
@@ -1,6 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime, date
-from typing import List, Optional
+from typing import List, Literal, Optional
 import uuid
 
 # Request models
@@ -8,6 +8,15 @@ class Snippet(BaseModel):
     entry: str
     user_id: uuid.UUID
 
+class BatchSnippet(BaseModel):
+    entry: str
+    created_at: datetime
+    idempotency_key: str = Field(..., min_length=1, max_length=128)
+
+class SnippetBatch(BaseModel):
+    user_id: uuid.UUID
+    snippets: List[BatchSnippet] = Field(..., min_length=1)
+
 class Journal(BaseModel):
     entry: str
     date: date
@@ -26,4 +35,68 @@ class JournalResponse(BaseModel):
     user_id: uuid.UUID
     date: date
     entry: str
-    sentiment_score: Optional[float] = None 
\ No newline at end of file
+    sentiment_score: Optional[float] = None 
+
+# List item models: every field is optional so projected listings only carry the requested columns.
+# The alias keeps the "date" field's default from shadowing the date type in the class body.
+OptionalDate = Optional[date]
+
+class SnippetListItem(BaseModel):
+    id: Optional[uuid.UUID] = None
+    user_id: Optional[uuid.UUID] = None
+    created_at: Optional[datetime] = None
+    entry: Optional[str] = None
+
+class JournalListItem(BaseModel):
+    id: Optional[uuid.UUID] = None
+    user_id: Optional[uuid.UUID] = None
+    date: OptionalDate = None
+    entry: Optional[str] = None
+    sentiment_score: Optional[float] = None
+
+class SummaryJobResponse(BaseModel):
+    job_id: uuid.UUID
+    user_id: uuid.UUID
+    date: date
+    status: str
+    requests: int
+    journal: Optional[JournalResponse] = None
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+class MoodBucket(BaseModel):
+    bucket_start: date
+    count: int
+    mean: float
+    min: float
+    max: float
+
+class SnippetBatchResponse(BaseModel):
+    created: List[SnippetResponse]
+    duplicates: int
+    summary_jobs: List[SummaryJobResponse]
+    # Days over the user's summary budget; summarize_stale_days.py picks them up later
+    deferred_days: List[date] = []
+
+class SearchResult(BaseModel):
+    kind: Literal["journal", "snippet"]
+    id: uuid.UUID
+    date: date
+    created_at: Optional[datetime] = None
+    rank: float
+    highlight: str
+
+class SimilarDay(BaseModel):
+    date: date
+    similarity: float
+    entry: str
+    sentiment_score: Optional[float] = None
+
+class ProfileInfo(BaseModel):
+    name: str
+    method: str
+    endpoint: str
+    duration_ms: int
+    created_at: datetime
+    size: int
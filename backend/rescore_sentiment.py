@@ -0,0 +1,130 @@
+"""Recompute every journal's sentiment score with the current sentiment backend.
+
+Run after changing SENTIMENT_BACKEND, the model behind it or the mapping from
+its labels to scores, so stored scores and mood rollups are consistent again.
+
+Journals are read across all users in chunks ordered by id, with the next chunk
+fetched while the current one is scored. Each chunk is scored in batched calls to
+the sentiment backend (--batch-size texts per call, --concurrency calls in flight)
+and the scores that changed are written back in one bulk update per chunk. A
+journal whose entry was rewritten in the meantime keeps the score written with it,
+and journals the backend failed to score keep their old score.
+
+The sentiment cache is bypassed. Its keys include the backend's version (model
+URL or lexicon hash), so the API stops serving the old scores on its own.
+After every chunk the last id is saved to --checkpoint, so an interrupted run
+continues where it stopped when started again. The checkpoint is removed once a
+run finishes.
+
+Usage:
+    python rescore_sentiment.py
+    python rescore_sentiment.py --chunk-size 2000 --batch-size 64 --concurrency 4
+    python rescore_sentiment.py --dry-run
+"""
+import argparse
+import asyncio
+import time
+from typing import Any, Dict, List, Tuple
+
+from checkpoints import read_checkpoint, remove_checkpoint, save_checkpoint
+from config import SENTIMENT_BACKEND
+from services import sentiment_service
+from services.repository import get_repository
+
+# Scores closer than this to the stored one are not written back
+SCORE_TOLERANCE = 1e-6
+
+def load_checkpoint(path: str) -> Dict[str, Any]:
+    """Load the checkpoint of an interrupted run with the same sentiment backend, or start a new one."""
+    checkpoint = {"backend": SENTIMENT_BACKEND, "after": None, "scored": 0, "updated": 0, "failed": 0}
+    saved = read_checkpoint(path)
+    if saved is None:
+        return checkpoint
+    if saved["backend"] != SENTIMENT_BACKEND:
+        print(f"Ignoring checkpoint {path} for sentiment backend {saved['backend']}")
+        return checkpoint
+    print(f"Resuming after journal {saved['after']} ({saved['scored']} scored, {saved['updated']} updated so far)")
+    return saved
+
+async def score_chunk(journals: List[Dict[str, Any]], batch_size: int, semaphore: asyncio.Semaphore) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Score a chunk of journals in batches.
+
+    Returns:
+        Tuple containing:
+        - Rows for update_sentiment_scores, for the journals whose score changed
+        - The number of journals that could not be scored
+    """
+    async def score_batch(batch: List[Dict[str, Any]]) -> List[Tuple[float, Any]]:
+        async with semaphore:
+            return await sentiment_service.analyze_sentiment_batch([journal["entry"] for journal in batch])
+
+    batches = [journals[start:start + batch_size] for start in range(0, len(journals), batch_size)]
+    results = await asyncio.gather(*(score_batch(batch) for batch in batches))
+
+    changed, failed = [], 0
+    for batch, batch_results in zip(batches, results):
+        for journal, (sentiment_score, raw) in zip(batch, batch_results):
+            if isinstance(raw, dict) and "error" in raw:
+                failed += 1
+            elif journal["sentiment_score"] is None or abs(journal["sentiment_score"] - sentiment_score) > SCORE_TOLERANCE:
+                changed.append({"id": journal["id"], "entry": journal["entry"], "sentiment_score": sentiment_score})
+    return changed, failed
+
+async def run(args) -> None:
+    repository = get_repository()
+    await repository.open()
+    await sentiment_service.get_backend().open()
+    try:
+        checkpoint = load_checkpoint(args.checkpoint)
+        print(f"Re-scoring journals with the {SENTIMENT_BACKEND} sentiment backend...")
+        semaphore = asyncio.Semaphore(args.concurrency)
+        columns = ["id", "entry", "sentiment_score"]
+        started, scored = time.perf_counter(), 0
+
+        journals = await repository.scan_journals(columns, checkpoint["after"], args.chunk_size)
+        while journals:
+            # Read the next chunk while this one is scored and written
+            next_chunk = asyncio.create_task(repository.scan_journals(columns, journals[-1]["id"], args.chunk_size))
+            try:
+                changed, failed = await score_chunk(journals, args.batch_size, semaphore)
+                updated = len(changed) if args.dry_run else await repository.update_sentiment_scores(changed)
+            except BaseException:
+                next_chunk.cancel()
+                raise
+
+            scored += len(journals)
+            checkpoint["after"] = journals[-1]["id"]
+            checkpoint["scored"] += len(journals)
+            checkpoint["updated"] += updated
+            checkpoint["failed"] += failed
+            if not args.dry_run:
+                save_checkpoint(args.checkpoint, checkpoint)
+            print(f"  {checkpoint['scored']} scored, {checkpoint['updated']} {'would change' if args.dry_run else 'updated'}, "
+                  f"{checkpoint['failed']} failed ({scored / (time.perf_counter() - started):.0f} journals/s)")
+            journals = await next_chunk
+
+        print(f"Done: {checkpoint['scored']} scored, {checkpoint['updated']} {'would change' if args.dry_run else 'updated'}, "
+              f"{checkpoint['failed']} failed in {time.perf_counter() - started:.1f}s")
+        if not args.dry_run:
+            remove_checkpoint(args.checkpoint)
+    finally:
+        await sentiment_service.get_backend().close()
+        await repository.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute every journal's sentiment score with the current sentiment backend")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Journals read, checkpointed and written back together (default: 1000)")
+    parser.add_argument("--batch-size", type=int, default=32, help="Journals per call to the sentiment backend (default: 32)")
+    parser.add_argument("--concurrency", type=int, default=2, help="Sentiment calls in flight at once (default: 2)")
+    parser.add_argument("--checkpoint", default="rescore_checkpoint.json", help="Progress file for resuming (default: rescore_checkpoint.json)")
+    parser.add_argument("--dry-run", action="store_true", help="Score the journals and count the changes without writing them")
+    args = parser.parse_args()
+
+    if args.chunk_size < 1 or args.batch_size < 1 or args.concurrency < 1:
+        parser.error("--chunk-size, --batch-size and --concurrency must be at least 1")
+
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
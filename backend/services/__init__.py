@@ -1,2 +1,2 @@
 # Services package initialization
-from . import snippets_service, journals_service, ai_service, db_service, sentiment_service 
\ No newline at end of file
+from . import snippets_service, journals_service, ai_service, db_service, repository, sentiment_service, summary_queue_service, mood_service, journal_cache_service, rate_limit_service, metrics_service, search_service, embedding_service 
\ No newline at end of file
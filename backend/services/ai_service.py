@@ -1,39 +1,341 @@
-import google.generativeai as genai
-import sys
+import asyncio
 import os
-from typing import Tuple
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
-# Add the parent directory to the Python path
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from config import GEMINI_API_KEY
-from .sentiment_service import analyze_sentiment
+from config import (
+    GEMINI_API_KEY, GEMINI_MAX_CONCURRENT_REQUESTS, GEMINI_TIMEOUT_SECONDS,
+    AI_CACHE_MAX_ENTRIES, AI_CACHE_TTL_SECONDS, AI_CACHE_DIR,
+    SUMMARY_CHUNK_MAX_SNIPPETS, SUMMARY_TOKEN_BUDGET,
+)
+from .cache_service import ContentCache
+from .rate_limit_service import gemini_quota
+from .metrics_service import observe_stage, count_fallback, stage_seconds
+from .sentiment_service import analyze_sentiment, analyze_sentiment_batch, get_backend as get_sentiment_backend
 
-# Configure Gemini API
-genai.configure(api_key=GEMINI_API_KEY)
-model = genai.GenerativeModel('gemini-2.0-flash')
+GEMINI_MODEL_NAME = 'gemini-2.0-flash'
 
-def generate_journal_from_snippets(snippets_text: str) -> Tuple[str, float]:
+# Bump whenever a prompt below changes so cached summaries from the old prompt are not reused
+PROMPT_VERSION = '2'
+
+# Prompt for turning a day's snippets (or the condensed notes of a long day) into the journal entry
+JOURNAL_PROMPT = "Summarise these daily snippets into a concise and coherent journal entry in a reflective and personal tone using only explicitly stated information. Write in first person and start directly with the content. Do not include any introductory text, meta-commentary, or explanations:\n\n"
+
+# Prompt for condensing one chunk of a long day into notes that are later combined
+CHUNK_PROMPT = "Condense these snippets from part of my day into short first person notes. Keep every concrete event, person and feeling that is explicitly stated and add nothing else. Do not include any introductory text, meta-commentary, or explanations:\n\n"
+
+# Gemini model, built on first use: importing the SDK takes most of a worker's start-up
+# time, and many requests never generate a summary
+model: Optional[Any] = None
+_model_lock = threading.Lock()
+
+def _build_model() -> None:
+    global model
+    with _model_lock:
+        if model is None:
+            import google.generativeai as genai
+            genai.configure(api_key=GEMINI_API_KEY)
+            model = genai.GenerativeModel(GEMINI_MODEL_NAME)
+
+async def get_model() -> Any:
+    """The Gemini model; the first call imports the SDK in a worker thread so the event loop keeps running."""
+    if model is None:
+        await asyncio.to_thread(_build_model)
+    return model
+
+# Cap on in-flight Gemini calls per worker; extra callers wait here instead of piling onto the API
+gemini_semaphore = asyncio.Semaphore(GEMINI_MAX_CONCURRENT_REQUESTS)
+
+# User the current generation is for, so the global quota can queue users fairly
+gemini_user: ContextVar[Optional[str]] = ContextVar("gemini_user", default=None)
+
+def _cache_path(name: str) -> Optional[str]:
+    return os.path.join(AI_CACHE_DIR, f"{name}_cache.json") if AI_CACHE_DIR else None
+
+# Summaries keyed by prompt version, model and snippet text; sentiment keyed by the backend's
+# version (its model or lexicon) and journal text, so a new model never serves old scores
+summary_cache = ContentCache("summary", AI_CACHE_MAX_ENTRIES, AI_CACHE_TTL_SECONDS, _cache_path("summary"))
+sentiment_cache = ContentCache("sentiment", AI_CACHE_MAX_ENTRIES, AI_CACHE_TTL_SECONDS, _cache_path("sentiment"))
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for prompt budgeting (about four characters per token)."""
+    return len(text) // 4 + 1
+
+def _truncate_to_budget(text: str, token_budget: int) -> str:
+    return text[:token_budget * 4]
+
+def load_caches() -> None:
+    summary_cache.load()
+    sentiment_cache.load()
+
+def save_caches() -> None:
+    summary_cache.save()
+    sentiment_cache.save()
+
+async def _score_sentiment(journal_text: str) -> float:
+    """Score journal text, reusing the cached score for text that was already scored."""
+    key = sentiment_cache.make_key(get_sentiment_backend().version, journal_text)
+    cached = sentiment_cache.get(key)
+    if cached is not None:
+        return cached
+
+    with observe_stage("sentiment"):
+        sentiment_score, raw = await analyze_sentiment(journal_text)
+    return _remember_score(key, sentiment_score, raw)
+
+def _remember_score(key: str, sentiment_score: float, raw: Any) -> float:
+    # Failed calls score 0.0; only cache real results so they are retried next time
+    if isinstance(raw, dict) and "error" in raw:
+        count_fallback("sentiment_zero")
+    else:
+        sentiment_cache.set(key, sentiment_score)
+    return sentiment_score
+
+async def _generate(prompt: str) -> str:
+    """Run one Gemini generation within the global quota, the concurrency cap and the timeout."""
+    with observe_stage("gemini_queue"):
+        await gemini_quota.acquire(gemini_user.get())
+        await gemini_semaphore.acquire()
+    try:
+        with observe_stage("gemini_generate"):
+            response = await asyncio.wait_for((await get_model()).generate_content_async(prompt), timeout=GEMINI_TIMEOUT_SECONDS)
+    finally:
+        gemini_semaphore.release()
+    return response.text
+
+async def _generate_cached(key: str, prompt: str) -> str:
+    text = summary_cache.get(key)
+    if text is None:
+        text = await _generate(prompt)
+        summary_cache.set(key, text)
+    return text
+
+def chunk_texts(texts: List[str], max_items: int, token_budget: int) -> List[List[str]]:
+    """
+    Split texts into consecutive chunks of at most max_items texts and about token_budget tokens.
+
+    Chunks are filled greedily from the start, so appending texts only ever changes
+    the last chunk and earlier chunk boundaries stay stable.
+    """
+    chunks: List[List[str]] = []
+    current: List[str] = []
+    current_tokens = 0
+    for text in texts:
+        tokens = estimate_tokens(text)
+        if current and (len(current) >= max_items or current_tokens + tokens > token_budget):
+            chunks.append(current)
+            current, current_tokens = [], 0
+        current.append(text)
+        current_tokens += tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+async def _condense_snippets(snippets: List[Dict[str, Any]]) -> str:
+    """
+    Reduce a long day's snippets to notes that fit in the token budget.
+
+    Map step: snippets are split into stable chunks and each chunk is condensed
+    once; chunk notes are cached by the ids of the snippets in the chunk, so adding
+    a snippet only re-runs the newest chunk. Reduce step: if the chunk notes are
+    still over the budget they are chunked and condensed again, level by level.
+    """
+    chunks: List[List[Dict[str, Any]]] = []
+    for chunk_entries in chunk_texts([s['entry'] for s in snippets], SUMMARY_CHUNK_MAX_SNIPPETS, SUMMARY_TOKEN_BUDGET):
+        offset = sum(len(chunk) for chunk in chunks)
+        chunks.append(snippets[offset:offset + len(chunk_entries)])
+
+    notes = await asyncio.gather(*[
+        _generate_cached(
+            summary_cache.make_key(PROMPT_VERSION, GEMINI_MODEL_NAME, "chunk", *[str(s['id']) for s in chunk]),
+            CHUNK_PROMPT + _truncate_to_budget('\n\n'.join(s['entry'] for s in chunk), SUMMARY_TOKEN_BUDGET),
+        )
+        for chunk in chunks
+    ])
+
+    while estimate_tokens('\n\n'.join(notes)) > SUMMARY_TOKEN_BUDGET and len(notes) > 1:
+        groups = chunk_texts(notes, SUMMARY_CHUNK_MAX_SNIPPETS, SUMMARY_TOKEN_BUDGET)
+        if len(groups) == len(notes):
+            # Every note fills the budget on its own, so another level would not shrink anything
+            break
+        notes = await asyncio.gather(*[
+            _generate_cached(
+                summary_cache.make_key(PROMPT_VERSION, GEMINI_MODEL_NAME, "notes", *group),
+                CHUNK_PROMPT + '\n\n'.join(group),
+            )
+            for group in groups
+        ])
+
+    return _truncate_to_budget('\n\n'.join(notes), SUMMARY_TOKEN_BUDGET)
+
+async def score_journal(journal_text: str) -> float:
+    """Score a journal entry's sentiment, falling back to 0.0 rather than failing."""
+    try:
+        return await _score_sentiment(journal_text)
+    except Exception as e:
+        print(f"Error in sentiment analysis, proceeding without it: {str(e)}")
+        count_fallback("sentiment_zero")
+        return 0.0
+
+async def score_journals(journal_texts: List[str]) -> List[float]:
     """
-    Generate an AI summary from snippets using Gemini and analyze its sentiment.
-    
+    Score many journal entries' sentiment with one batched call to the sentiment backend.
+
+    Entries with a cached score are not sent again. As in score_journal, entries
+    that could not be scored get 0.0.
+    """
+    version = get_sentiment_backend().version
+    keys = [sentiment_cache.make_key(version, text) for text in journal_texts]
+    scores = [sentiment_cache.get(key) for key in keys]
+    missing = [i for i, score in enumerate(scores) if score is None]
+    if missing:
+        try:
+            with observe_stage("sentiment"):
+                results = await analyze_sentiment_batch([journal_texts[i] for i in missing])
+        except Exception as e:
+            print(f"Error in sentiment analysis, proceeding without it: {str(e)}")
+            results = [(0.0, {"error": str(e)}) for _ in missing]
+        for i, (sentiment_score, raw) in zip(missing, results):
+            scores[i] = _remember_score(keys[i], sentiment_score, raw)
+    return scores
+
+async def generate_journal_text(snippets: List[Dict[str, Any]], user_id: Optional[Any] = None) -> str:
+    """
+    Generate a journal entry from a day's snippets, without scoring it.
+
+    Days whose snippets fit in SUMMARY_TOKEN_BUDGET are summarised in one prompt.
+    Longer days are first condensed chunk by chunk (see _condense_snippets), so the
+    prompt size stays bounded however many snippets the day has.
+
+    Args:
+        snippets: The day's snippet rows, oldest first
+        user_id: The user the journal is for; their Gemini calls queue fairly against other users'
+
+    Returns:
+        The AI-generated journal entry
+
+    Raises:
+        GeminiQuotaExceeded: If the global Gemini quota had no room within GEMINI_QUEUE_MAX_WAIT_SECONDS
+    """
+    token = gemini_user.set(str(user_id) if user_id is not None else None)
+    try:
+        snippets_text = '\n\n'.join([s['entry'] for s in snippets])
+        if estimate_tokens(snippets_text) > SUMMARY_TOKEN_BUDGET:
+            snippets_text = await _condense_snippets(snippets)
+        summary_key = summary_cache.make_key(PROMPT_VERSION, GEMINI_MODEL_NAME, snippets_text)
+        return await _generate_cached(summary_key, JOURNAL_PROMPT + snippets_text)
+    finally:
+        gemini_user.reset(token)
+
+async def generate_journal(snippets: List[Dict[str, Any]], user_id: Optional[Any] = None) -> Tuple[str, float]:
+    """
+    Generate a journal entry and sentiment score from a day's snippets.
+
+    See generate_journal_text for how long days are summarised.
+
     Args:
-        snippets_text: Text containing all snippets separated by newlines
-        
+        snippets: The day's snippet rows, oldest first
+        user_id: The user the journal is for; their Gemini calls queue fairly against other users'
+
     Returns:
         Tuple containing:
         - AI-generated journal entry
         - Sentiment score from -1 (negative) to 1 (positive)
+
+    Raises:
+        GeminiQuotaExceeded: If the global Gemini quota had no room within GEMINI_QUEUE_MAX_WAIT_SECONDS
+    """
+    journal_text = await generate_journal_text(snippets, user_id)
+    sentiment_score = await score_journal(journal_text)
+    return journal_text, sentiment_score
+
+# Put on the queue by _stream_generation once the whole entry has been received
+_STREAM_END = object()
+
+async def _stream_generation(prompt: str, user: Optional[str], summary_key: str, pieces: asyncio.Queue) -> None:
+    """
+    Stream one Gemini generation into pieces for stream_journal.
+
+    Holds the global quota and the concurrency slot only while Gemini is sending. Every
+    chunk's text is put on the queue, then _STREAM_END, or the exception that ended
+    the generation. The finished entry is added to the summary cache.
     """
-    prompt = f"Summarise these daily snippets into a concise and coherent journal entry in a reflective and personal tone using only explicitly stated information. Write in first person and start directly with the content. Do not include any introductory text, meta-commentary, or explanations:\n\n${snippets_text}"
-    
-    response = model.generate_content(prompt)
-    journal_text = response.text
-    
-    # Try to analyze sentiment but don't block if it fails
     try:
-        sentiment_score, _ = analyze_sentiment(journal_text)
+        with observe_stage("gemini_queue"):
+            await gemini_quota.acquire(user)
+            await gemini_semaphore.acquire()
+        try:
+            parts = []
+            start = time.perf_counter()
+            with observe_stage("gemini_generate"):
+                response = await asyncio.wait_for(
+                    (await get_model()).generate_content_async(prompt, stream=True), timeout=GEMINI_TIMEOUT_SECONDS
+                )
+                chunks = response.__aiter__()
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(chunks.__anext__(), timeout=GEMINI_TIMEOUT_SECONDS)
+                    except StopAsyncIteration:
+                        break
+                    if not parts:
+                        stage_seconds.labels(stage="gemini_first_chunk").observe(time.perf_counter() - start)
+                    parts.append(chunk.text)
+                    pieces.put_nowait(chunk.text)
+        finally:
+            gemini_semaphore.release()
+        summary_cache.set(summary_key, ''.join(parts))
+        pieces.put_nowait(_STREAM_END)
     except Exception as e:
-        print(f"Error in sentiment analysis, proceeding without it: {str(e)}")
-        sentiment_score = 0.0
-    
-    return journal_text, sentiment_score 
\ No newline at end of file
+        pieces.put_nowait(e)
+
+async def stream_journal(snippets: List[Dict[str, Any]], user_id: Optional[Any] = None) -> AsyncIterator[str]:
+    """
+    Stream a journal entry for a day's snippets as Gemini writes it.
+
+    Uses the same prompt, condensing and summary cache as generate_journal; a
+    cached entry is yielded in one piece. Sentiment is not scored, as it needs
+    the whole entry: call score_journal on the joined text once the stream ends.
+
+    Args:
+        snippets: The day's snippet rows, oldest first
+        user_id: The user the journal is for, for fair queueing in the Gemini quota
+
+    Yields:
+        Consecutive pieces of the journal entry
+
+    Raises:
+        GeminiQuotaExceeded: If the global Gemini quota had no room within GEMINI_QUEUE_MAX_WAIT_SECONDS
+        asyncio.TimeoutError: If Gemini goes GEMINI_TIMEOUT_SECONDS without sending a chunk
+    """
+    user = str(user_id) if user_id is not None else None
+    snippets_text = '\n\n'.join([s['entry'] for s in snippets])
+    if estimate_tokens(snippets_text) > SUMMARY_TOKEN_BUDGET:
+        token = gemini_user.set(user)
+        try:
+            snippets_text = await _condense_snippets(snippets)
+        finally:
+            gemini_user.reset(token)
+
+    summary_key = summary_cache.make_key(PROMPT_VERSION, GEMINI_MODEL_NAME, snippets_text)
+    cached = summary_cache.get(summary_key)
+    if cached is not None:
+        yield cached
+        return
+
+    # The Gemini stream is read by its own task, so a slow client does not hold a
+    # concurrency slot or stretch the gemini_generate timing while pieces wait for it
+    pieces: asyncio.Queue = asyncio.Queue()
+    producer = asyncio.create_task(_stream_generation(JOURNAL_PROMPT + snippets_text, user, summary_key, pieces))
+    try:
+        while True:
+            piece = await pieces.get()
+            if piece is _STREAM_END:
+                return
+            if isinstance(piece, Exception):
+                raise piece
+            yield piece
+    finally:
+        # Stops the generation if the client went away before it finished
+        producer.cancel()
@@ -0,0 +1,136 @@
+import hashlib
+import itertools
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+class ContentCache:
+    """
+    Bounded LRU cache with a per-entry time to live.
+
+    Keys are content hashes built with make_key(), so identical inputs map to the
+    same entry. The least recently used entry is evicted once max_entries is
+    reached, and entries older than ttl_seconds are treated as misses. When a path
+    is given the cache can be saved to and loaded from a JSON file, so entries
+    survive a restart.
+    """
+
+    def __init__(self, name: str, max_entries: int, ttl_seconds: float, path: Optional[str] = None):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # key -> (stored_at, value), ordered from least to most recently used
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    @staticmethod
+    def make_key(*parts: str) -> str:
+        """Build a cache key from the SHA-256 of the given parts."""
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\x1f")
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        stored_at, value = entry
+        if time.time() - stored_at > self.ttl_seconds:
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, stored_at: Optional[float] = None) -> None:
+        self._entries[key] = (stored_at if stored_at is not None else time.time(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+    def load(self) -> None:
+        """Load unexpired entries from the cache file, if persistence is enabled."""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except Exception as e:
+            print(f"Error loading {self.name} cache from {self.path}: {str(e)}")
+            return
+        now = time.time()
+        for key, stored_at, value in entries:
+            if now - stored_at <= self.ttl_seconds:
+                self.set(key, value, stored_at=stored_at)
+
+    def save(self) -> None:
+        """Write the current entries to the cache file, if persistence is enabled."""
+        if not self.path:
+            return
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            temporary_path = f"{self.path}.tmp"
+            with open(temporary_path, "w", encoding="utf-8") as f:
+                json.dump([[key, stored_at, value] for key, (stored_at, value) in self._entries.items()], f)
+            os.replace(temporary_path, self.path)
+        except Exception as e:
+            print(f"Error saving {self.name} cache to {self.path}: {str(e)}")
+
+class CacheGenerations:
+    """
+    Per-user generation tokens for dropping all of a user's cached entries at once.
+
+    The token is part of every cache key for the user. invalidate() forgets it, so
+    the next key gets a new token and the old entries are never reached again; they
+    age out of their cache. Tokens are never reused, which lets them live in a
+    bounded LRU: forgetting an idle user's token only turns their next lookups into
+    misses.
+    """
+
+    def __init__(self, name: str, max_users: int):
+        self._tokens = ContentCache(name, max_users, float("inf"))
+        self._counter = itertools.count(1)
+
+    def token(self, user: str) -> str:
+        """The user's current generation token."""
+        token = self._tokens.get(user)
+        if token is None:
+            token = str(next(self._counter))
+            self._tokens.set(user, token)
+        return token
+
+    def invalidate(self, user: str) -> None:
+        self._tokens.delete(user)
+
+    def __len__(self) -> int:
+        return len(self._tokens)
@@ -1,12 +1,17 @@
-from supabase import create_client, Client
-import sys
-import os
+from typing import TYPE_CHECKING, Optional
 
-# Add the parent directory to the Python path
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import SUPABASE_URL, SUPABASE_SERVICE_KEY
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+if TYPE_CHECKING:
+    from supabase import Client
 
-def get_client() -> Client:
-    return supabase 
\ No newline at end of file
+# Built on first use: importing supabase-py and creating the client takes a noticeable
+# part of a worker's start-up, and the postgres and sqlite backends never need it
+supabase: Optional["Client"] = None
+
+def get_client() -> "Client":
+    global supabase
+    if supabase is None:
+        from supabase import create_client
+        supabase = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+    return supabase
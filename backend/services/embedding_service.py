@@ -0,0 +1,168 @@
+import math
+import re
+import zlib
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from config import EMBEDDING_DIMENSIONS, EMBEDDING_CACHE_MAX_USERS, EMBEDDING_CACHE_TTL_SECONDS
+from .cache_service import CacheGenerations, ContentCache
+from .repository import get_repository
+
+# Stored with every vector; bump the version when the features below change so old
+# vectors are not compared with new ones
+EMBEDDING_MODEL = f"hashing-v1-{EMBEDDING_DIMENSIONS}"
+
+TOKEN_PATTERN = re.compile(r"[a-z']+")
+
+# Frequent words that say nothing about what a day was like
+STOPWORDS = {
+    "a", "about", "after", "again", "all", "an", "and", "any", "are", "as", "at", "be", "been",
+    "before", "but", "by", "did", "do", "for", "from", "had", "has", "have", "he", "her", "him",
+    "his", "i", "i'm", "in", "into", "is", "it", "it's", "its", "me", "my", "of", "on", "or",
+    "our", "out", "she", "so", "some", "that", "the", "their", "them", "then", "there", "they",
+    "this", "to", "up", "was", "we", "were", "what", "when", "which", "while", "with", "you",
+}
+
+# Suffixes stripped from longer words, so "hiking", "hiked" and "hikes" share a feature
+SUFFIXES = ("ing", "ed", "es", "s")
+
+# Word pairs carry some phrase information ("board games", "early train") at half weight
+BIGRAM_WEIGHT = 0.5
+
+def _stem(token: str) -> str:
+    if len(token) > 4:
+        for suffix in SUFFIXES:
+            if token.endswith(suffix):
+                return token[:-len(suffix)]
+    return token
+
+def _features(text: str) -> Counter:
+    words = [_stem(token) for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+    features = Counter(words)
+    features.update(f"{first} {second}" for first, second in zip(words, words[1:]))
+    return features
+
+def embed_texts(texts: List[str], dimensions: int = EMBEDDING_DIMENSIONS) -> np.ndarray:
+    """
+    Embed texts as unit-length float32 vectors, locally and without a model download.
+
+    Words (stopwords removed, crudely stemmed) and word pairs are hashed into
+    ``dimensions`` buckets with a hashed sign, weighted by 1 + log(count), and the
+    vectors are normalized, so the dot product of two vectors is their cosine
+    similarity. This finds days about the same activities, people and feelings;
+    it does not know that "hike" and "trail" are related.
+
+    Returns:
+        Array of shape (len(texts), dimensions)
+    """
+    rows: List[int] = []
+    columns: List[int] = []
+    values: List[float] = []
+    for row, text in enumerate(texts):
+        for feature, count in _features(text).items():
+            hashed = zlib.crc32(feature.encode("utf-8"))
+            weight = (1.0 + math.log(count)) * (BIGRAM_WEIGHT if " " in feature else 1.0)
+            rows.append(row)
+            columns.append(hashed % dimensions)
+            values.append(weight if hashed & 0x80000000 else -weight)
+
+    vectors = np.zeros((len(texts), dimensions), dtype=np.float32)
+    np.add.at(vectors, (np.asarray(rows, dtype=np.intp), np.asarray(columns, dtype=np.intp)), np.asarray(values, dtype=np.float32))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1.0)
+
+def encode_embedding(vector: np.ndarray) -> bytes:
+    """Pack a vector as little-endian float32, 4 bytes per component."""
+    return vector.astype("<f4").tobytes()
+
+class EmbeddingIndex:
+    """
+    One user's journal embeddings as a single matrix, for brute-force top-k lookups.
+
+    A lookup is one matrix-vector product and a partial sort, which takes well under
+    a millisecond even for ten years of daily journals, so no approximate index is
+    needed at per-user scale.
+    """
+
+    def __init__(self, dates: List[str], matrix: np.ndarray):
+        self.dates = dates
+        self.matrix = matrix
+        self._positions = {day: position for position, day in enumerate(dates)}
+
+    @classmethod
+    def from_rows(cls, rows: List[Dict[str, Any]], dimensions: int = EMBEDDING_DIMENSIONS) -> "EmbeddingIndex":
+        """Build the index from repository rows with date and packed embedding."""
+        matrix = np.frombuffer(b"".join(row["embedding"] for row in rows), dtype="<f4").reshape(len(rows), dimensions)
+        return cls([row["date"] for row in rows], matrix)
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def vector(self, day: str) -> Optional[np.ndarray]:
+        """The stored vector for a date, or None."""
+        position = self._positions.get(day)
+        return self.matrix[position] if position is not None else None
+
+    def top_k(self, query: np.ndarray, k: int, exclude: Iterable[str] = ()) -> List[Tuple[str, float]]:
+        """
+        Find the k dates whose vectors are most similar to query.
+
+        Returns:
+            (date, cosine similarity) pairs, most similar first; dates with no positive
+            similarity are left out
+        """
+        if not self.dates or k < 1:
+            return []
+        scores = self.matrix @ query.astype(np.float32)
+        for day in exclude:
+            position = self._positions.get(day)
+            if position is not None:
+                scores[position] = -np.inf
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self.dates[position], float(scores[position])) for position in top if scores[position] > 0]
+
+# Each user's index, keyed by user and a generation token that invalidate() replaces, as in
+# JournalReadCache. Invalidation is local to the process; other workers reload their copy
+# after at most EMBEDDING_CACHE_TTL_SECONDS
+index_cache = ContentCache("embedding_indexes", EMBEDDING_CACHE_MAX_USERS, EMBEDDING_CACHE_TTL_SECONDS)
+_generations = CacheGenerations("embedding_index_generations", EMBEDDING_CACHE_MAX_USERS)
+
+def _index_key(user_id: Any) -> str:
+    user = str(user_id)
+    return index_cache.make_key(user, _generations.token(user))
+
+def invalidate(user_id: Any) -> None:
+    """Drop a user's cached index."""
+    _generations.invalidate(str(user_id))
+
+async def get_index(user_id: Any) -> EmbeddingIndex:
+    """Get a user's index, loading their embeddings on a cache miss."""
+    # Keyed before loading, so an index loaded while the user's journals change is never served
+    key = _index_key(user_id)
+    index = index_cache.get(key)
+    if index is None:
+        rows = await get_repository().list_journal_embeddings(str(user_id), EMBEDDING_MODEL)
+        index = EmbeddingIndex.from_rows(rows)
+        index_cache.set(key, index)
+    return index
+
+async def store_embeddings(journals: List[Dict[str, Any]]) -> None:
+    """
+    Embed journals and save their vectors in one bulk upsert.
+
+    Args:
+        journals: Journal rows with user_id, date and entry
+    """
+    if not journals:
+        return
+    vectors = embed_texts([journal["entry"] for journal in journals])
+    await get_repository().upsert_journal_embeddings([
+        {"user_id": journal["user_id"], "date": journal["date"], "model": EMBEDDING_MODEL, "embedding": encode_embedding(vector)}
+        for journal, vector in zip(journals, vectors)
+    ])
+    for user_id in {journal["user_id"] for journal in journals}:
+        invalidate(user_id)
@@ -0,0 +1,74 @@
+import hashlib
+from typing import Any, Dict, Optional, Tuple
+
+from config import JOURNAL_CACHE_MAX_ENTRIES, JOURNAL_CACHE_TTL_SECONDS
+from .cache_service import CacheGenerations, ContentCache
+
+class JournalReadCache:
+    """
+    Per-user read-through cache of serialized journal responses.
+
+    Entries hold the response body exactly as sent, plus its ETag, so a hit
+    skips both the Supabase query and serialization, and a matching If-None-Match
+    is answered with 304 straight from the cache. Every user has a generation
+    token that is part of the cache key; invalidate() replaces it, which makes all
+    of the user's cached responses unreachable at once (they then age out of the
+    LRU). The tokens are kept for at most max_entries users, as users without
+    one have nothing cached.
+
+    Invalidation is local to the process, so with several workers a write is seen
+    by the other workers after at most JOURNAL_CACHE_TTL_SECONDS.
+    """
+
+    def __init__(self, max_entries: int = JOURNAL_CACHE_MAX_ENTRIES, ttl_seconds: float = JOURNAL_CACHE_TTL_SECONDS):
+        self._cache = ContentCache("journal_reads", max_entries, ttl_seconds)
+        self._generations = CacheGenerations("journal_read_generations", max_entries)
+        self.not_modified = 0
+        self.bytes_saved = 0
+
+    def key(self, user_id: Any, query_key: str) -> str:
+        """
+        Cache key for a user's query under their current generation.
+
+        Take the key before reading from the database and pass it to set(): if the
+        user's journals change during the read, the result is then stored under the
+        old generation and never served, instead of under the new one.
+        """
+        user = str(user_id)
+        return self._cache.make_key(user, self._generations.token(user), query_key)
+
+    @staticmethod
+    def make_etag(body: bytes) -> str:
+        return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+    def get(self, key: str) -> Optional[Tuple[bytes, str, Dict[str, str]]]:
+        """Get the cached (body, etag, headers) for a key from key(), or None."""
+        return self._cache.get(key)
+
+    def set(self, key: str, body: bytes, headers: Optional[Dict[str, str]] = None) -> Tuple[bytes, str, Dict[str, str]]:
+        """Cache a serialized response under a key from key() and return it as (body, etag, headers)."""
+        entry = (body, self.make_etag(body), dict(headers or {}))
+        self._cache.set(key, entry)
+        return entry
+
+    def invalidate(self, user_id: Any) -> None:
+        """Drop every cached response for a user."""
+        self._generations.invalidate(str(user_id))
+
+    def record_not_modified(self, body: bytes) -> None:
+        self.not_modified += 1
+        self.bytes_saved += len(body)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self._cache.stats()
+        stats.update({"not_modified": self.not_modified, "bytes_saved": self.bytes_saved})
+        return stats
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag (weak comparison)."""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+journal_read_cache = JournalReadCache()
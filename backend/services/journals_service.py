@@ -1,50 +1,72 @@
+from contextlib import aclosing
 from datetime import datetime, date
 import uuid
 from fastapi import HTTPException
-from typing import List, Dict, Any, Optional, Tuple
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
 import traceback
 
-from .db_service import get_client
-from .ai_service import generate_journal_from_snippets
-from .snippets_service import get_todays_snippets
+from .repository import get_repository
+from .ai_service import generate_journal, stream_journal, score_journal
+from .rate_limit_service import GeminiQuotaExceeded
+from .metrics_service import observe_stage, count_fallback
+from .snippets_service import get_snippets_for_date
+from .journal_cache_service import journal_read_cache
+from . import embedding_service
+from .pagination import decode_cursor, next_cursor, select_columns
 
-async def create_or_update_journal(user_id: uuid.UUID, journal_date: date, entry: str, sentiment_score: Optional[float] = None) -> Dict[str, Any]:
+# Columns clients may request from the journal listing; the summary view leaves out the entry text
+JOURNAL_COLUMNS = ("id", "user_id", "date", "entry", "sentiment_score")
+JOURNAL_SUMMARY_COLUMNS = ("id", "user_id", "date", "sentiment_score")
+JOURNAL_CURSOR_KEYS = ("date", "id")
+
+async def create_or_update_journal(user_id: uuid.UUID, journal_date: date, entry: str, sentiment_score: Optional[float] = None,
+                                  snippet_count: Optional[int] = None) -> Dict[str, Any]:
     """
     Create or update a journal entry for a specific date.
     
+    Written as a single upsert on the (user_id, date) unique constraint, so it is
+    one round trip and concurrent writes for the same day cannot create duplicates.
+    The mood_rollups buckets for the date are refreshed by a database trigger
+    when the sentiment score changes, and the entry's embedding for similar-day
+    lookups is recomputed.
+    
     Args:
         user_id: The user's UUID
         journal_date: The date of the journal entry
         entry: The journal entry text
-        sentiment_score: Optional sentiment score from -1 to 1
+        sentiment_score: Optional sentiment score from -1 to 1; when omitted an
+            existing score is left unchanged
+        snippet_count: Number of snippets the entry was generated from, 0 for the
+            concatenation fallback; when omitted an existing count is left unchanged
         
     Returns:
         The created or updated journal data
     """
     try:
-        # Check if a journal entry exists for this date
-        existing = get_client().table("journals").select("*").eq("user_id", str(user_id)).eq("date", journal_date.isoformat()).execute()
-        
         journal_data = {
+            "user_id": str(user_id),  # Convert UUID to string
+            "date": journal_date.isoformat(),
             "entry": entry
         }
         
         # Add sentiment score if provided
         if sentiment_score is not None:
             journal_data["sentiment_score"] = sentiment_score
+        if snippet_count is not None:
+            journal_data["snippet_count"] = snippet_count
         
-        if existing.data:
-            # Update existing journal
-            result = get_client().table("journals").update(journal_data).eq("id", existing.data[0]["id"]).execute()
-        else:
-            # Create new journal
-            journal_data.update({
-                "user_id": str(user_id),  # Convert UUID to string
-                "date": journal_date.isoformat()
-            })
-            result = get_client().table("journals").insert(journal_data).execute()
+        # Only the columns in journal_data are updated when the row already exists
+        with observe_stage("journal_upsert"):
+            journal = await get_repository().upsert_journal(journal_data)
+        journal_read_cache.invalidate(user_id)
+
+        # The journal is saved either way; a missing embedding only leaves it out of similar days
+        try:
+            await embedding_service.store_embeddings([journal])
+        except Exception as e:
+            print(f"Error storing journal embedding: {str(e)}")
         
-        return result.data[0]
+        return journal
     except Exception as e:
         print(f"Error in create_or_update_journal: {str(e)}")
         print(traceback.format_exc())
@@ -62,65 +84,199 @@ async def get_journal(user_id: uuid.UUID, journal_date: date) -> Optional[Dict[s
         The journal data or None if not found
     """
     try:
-        result = get_client().table("journals").select("*").eq("user_id", str(user_id)).eq("date", journal_date.isoformat()).execute()
-        return result.data[0] if result.data else None
+        return await get_repository().get_journal(str(user_id), journal_date.isoformat())
     except Exception as e:
         print(f"Error in get_journal: {str(e)}")
         print(traceback.format_exc())
         raise HTTPException(status_code=500, detail=str(e))
 
-async def get_journals(user_id: uuid.UUID) -> List[Dict[str, Any]]:
+async def get_journals(user_id: uuid.UUID, limit: Optional[int] = None, cursor: Optional[str] = None,
+                       fields: Optional[List[str]] = None, from_date: Optional[date] = None,
+                       to_date: Optional[date] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
     """
-    Get all journal entries for a user.
+    Get journal entries for a user, newest first, one keyset page at a time.
     
     Args:
         user_id: The user's UUID
+        limit: Maximum number of entries to return, or None for all of them
+        cursor: Cursor returned with the previous page, or None for the first page
+        fields: Columns to return, or None for all columns; the sort keys are always included
+        from_date: Only return entries on or after this date
+        to_date: Only return entries on or before this date
         
     Returns:
-        A list of journal entries
+        Tuple containing:
+        - A list of journal entries
+        - The cursor for the next page, or None if this is the last page
     """
     try:
-        result = get_client().table("journals").select("*").eq("user_id", str(user_id)).order("date", desc=True).execute()
-        return result.data
+        columns = select_columns(fields, JOURNAL_COLUMNS, JOURNAL_CURSOR_KEYS)
+        after = None
+        if cursor:
+            values = decode_cursor(cursor, JOURNAL_CURSOR_KEYS)
+            after = (values["date"], values["id"])
+        rows = await get_repository().list_journals(
+            str(user_id), columns,
+            from_date.isoformat() if from_date else None,
+            to_date.isoformat() if to_date else None,
+            after, limit,
+        )
+        return rows, next_cursor(rows, limit, JOURNAL_CURSOR_KEYS)
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error in get_journals: {str(e)}")
         print(traceback.format_exc())
         raise HTTPException(status_code=500, detail=str(e))
 
-async def create_journal_from_snippets(user_id: uuid.UUID) -> Dict[str, Any]:
+async def get_similar_days(user_id: uuid.UUID, journal_date: date, limit: int = 5) -> List[Dict[str, Any]]:
+    """
+    Find the user's past journals that read most like the journal for a date.
+    
+    Compares the entries' embeddings (see embedding_service) by cosine similarity
+    with a brute-force search over the user's cached embedding matrix.
+    
+    Args:
+        user_id: The user's UUID
+        journal_date: The date of the journal to compare with
+        limit: Maximum number of days to return
+        
+    Returns:
+        A list of days, most similar first, with date, similarity, entry and sentiment_score
+        
+    Raises:
+        HTTPException: 404 if the user has no journal for the date
+    """
+    try:
+        index = await embedding_service.get_index(user_id)
+        query = index.vector(journal_date.isoformat())
+        if query is None:
+            # Not embedded yet (written before embeddings existed); embed it on the fly
+            journal = await get_journal(user_id, journal_date)
+            if journal is None:
+                raise HTTPException(status_code=404, detail=f"No journal found for {journal_date.isoformat()}")
+            query = embedding_service.embed_texts([journal["entry"]])[0]
+
+        matches = index.top_k(query, limit, exclude=[journal_date.isoformat()])
+        rows = await get_repository().get_journals_on_dates(str(user_id), [day for day, _ in matches])
+        journals = {row["date"]: row for row in rows}
+        return [
+            {"date": day, "similarity": similarity, "entry": journals[day]["entry"], "sentiment_score": journals[day].get("sentiment_score")}
+            for day, similarity in matches
+            if day in journals
+        ]
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error in get_similar_days: {str(e)}")
+        print(traceback.format_exc())
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def create_journal_from_snippets(user_id: uuid.UUID, journal_date: Optional[date] = None) -> Dict[str, Any]:
     """
-    Create a journal entry from today's snippets.
+    Create a journal entry from a day's snippets.
     
     Args:
         user_id: The user's UUID
+        journal_date: The day to summarise, defaults to today (UTC)
         
     Returns:
         The created journal data
     """
     try:
-        # Get all snippets for today
-        snippets = await get_todays_snippets(user_id)
+        if journal_date is None:
+            journal_date = datetime.utcnow().date()
+
+        # Get all snippets for the day
+        snippets = await get_snippets_for_date(user_id, journal_date)
         
         # Only generate summary and create journal if there are snippets
         if not snippets:
-            raise HTTPException(status_code=400, detail="No snippets found for today")
+            raise HTTPException(status_code=400, detail=f"No snippets found for {journal_date.isoformat()}")
             
         # Generate AI summary using Gemini
-        snippets_text = '\n\n'.join([s['entry'] for s in snippets])
-        
         try:
-            journal_text, sentiment_score = generate_journal_from_snippets(snippets_text)
+            journal_text, sentiment_score = await generate_journal(snippets, user_id)
+            snippet_count = len(snippets)
+        except GeminiQuotaExceeded as e:
+            # Keep the existing journal rather than overwriting it with the concatenation fallback
+            raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(max(1, round(e.retry_after)))})
         except Exception as e:
             print(f"Error generating journal with sentiment: {str(e)}")
             print(traceback.format_exc())
             # Fallback to a simple concatenation of snippets if AI generation fails
+            count_fallback("journal_concatenation")
             journal_text = ' '.join([s['entry'] for s in snippets])
             sentiment_score = 0.0
+            # Leaves the day stale, so summarize_stale_days.py retries it
+            snippet_count = 0
         
         # Create or update the journal entry
-        today = datetime.utcnow().date()
-        return await create_or_update_journal(user_id, today, journal_text, sentiment_score)
+        return await create_or_update_journal(user_id, journal_date, journal_text, sentiment_score, snippet_count)
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error in create_journal_from_snippets: {str(e)}")
         print(traceback.format_exc())
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e)) 
+
+async def stream_journal_from_snippets(user_id: uuid.UUID, journal_date: Optional[date] = None) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Stream a journal entry for a day's snippets as it is generated, then save it.
+    
+    Sentiment is scored and the journal upserted only once the whole entry has
+    been streamed. As in create_journal_from_snippets, a Gemini failure before any
+    text was produced falls back to the concatenated snippets. A failure part way
+    through, or no room in the Gemini quota, ends the stream with an error and
+    keeps the existing journal.
+    
+    Args:
+        user_id: The user's UUID
+        journal_date: The day to summarise, defaults to today (UTC)
+        
+    Yields:
+        ("delta", text) for each piece of the entry, then either ("journal", journal)
+        with the saved journal data or ("error", {"status_code", "detail"})
+    """
+    if journal_date is None:
+        journal_date = datetime.utcnow().date()
+
+    try:
+        snippets = await get_snippets_for_date(user_id, journal_date)
+        if not snippets:
+            raise HTTPException(status_code=400, detail=f"No snippets found for {journal_date.isoformat()}")
+
+        parts = []
+        sentiment_score = None
+        snippet_count = len(snippets)
+        try:
+            async with aclosing(stream_journal(snippets, user_id)) as pieces:
+                async for text in pieces:
+                    parts.append(text)
+                    yield "delta", text
+        except GeminiQuotaExceeded:
+            raise
+        except Exception as e:
+            if parts:
+                raise
+            print(f"Error streaming journal: {str(e)}")
+            print(traceback.format_exc())
+            # Fallback to a simple concatenation of snippets if AI generation fails
+            count_fallback("journal_concatenation")
+            parts = [' '.join([s['entry'] for s in snippets])]
+            sentiment_score = 0.0
+            snippet_count = 0
+            yield "delta", parts[0]
+
+        journal_text = ''.join(parts)
+        if sentiment_score is None:
+            sentiment_score = await score_journal(journal_text)
+        yield "journal", await create_or_update_journal(user_id, journal_date, journal_text, sentiment_score, snippet_count)
+    except GeminiQuotaExceeded as e:
+        yield "error", {"status_code": 429, "detail": str(e), "retry_after": max(1, round(e.retry_after))}
+    except HTTPException as e:
+        yield "error", {"status_code": e.status_code, "detail": e.detail}
+    except Exception as e:
+        print(f"Error in stream_journal_from_snippets: {str(e)}")
+        print(traceback.format_exc())
+        yield "error", {"status_code": 500, "detail": str(e)}
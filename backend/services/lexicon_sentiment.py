@@ -0,0 +1,136 @@
+import hashlib
+import json
+import re
+import numpy as np
+from typing import Any, Dict, List, Tuple
+
+from .sentiment_service import SentimentBackend
+
+# Word valences from -4 (most negative) to 4 (most positive), in the style of VADER.
+# Kept small on purpose: it covers the everyday vocabulary of journal entries.
+LEXICON: Dict[str, float] = {
+    # Positive
+    "accomplished": 2.3, "amazing": 2.8, "appreciate": 2.0, "appreciated": 2.0, "awesome": 3.1,
+    "beautiful": 2.9, "best": 3.2, "better": 1.9, "blessed": 2.4, "brilliant": 2.8,
+    "calm": 1.3, "celebrate": 2.7, "celebrated": 2.7, "cheerful": 2.5, "comfortable": 1.5,
+    "confident": 2.2, "content": 1.5, "cozy": 1.8, "delicious": 2.7, "delighted": 3.0,
+    "energized": 2.0, "enjoy": 2.2, "enjoyed": 2.3, "enjoying": 2.4, "excellent": 2.7,
+    "excited": 2.4, "exciting": 2.2, "fantastic": 2.6, "fine": 0.8, "fresh": 1.3,
+    "friendly": 2.2, "fun": 2.3, "glad": 2.0, "good": 1.9, "grateful": 2.6,
+    "great": 3.1, "happy": 2.7, "healthy": 1.7, "helpful": 1.8, "hope": 1.9,
+    "hopeful": 2.3, "inspired": 2.2, "inspiring": 2.4, "interesting": 1.7, "joy": 2.8,
+    "kind": 2.4, "laugh": 2.6, "laughed": 2.4, "like": 1.5, "liked": 1.8,
+    "love": 3.2, "loved": 2.9, "lovely": 2.8, "lucky": 1.8, "nice": 1.8,
+    "peaceful": 2.2, "perfect": 2.7, "pleasant": 2.3, "pleased": 1.9, "productive": 1.8,
+    "proud": 2.1, "refreshed": 1.8, "relaxed": 2.2, "relaxing": 2.2, "relief": 1.5,
+    "relieved": 1.6, "rested": 1.5, "satisfied": 1.8, "smile": 1.5, "smiled": 1.8,
+    "success": 2.7, "successful": 2.8, "sunny": 1.6, "support": 1.7, "supportive": 2.0,
+    "thankful": 2.7, "thanks": 1.9, "win": 2.8, "won": 2.7, "wonderful": 2.7,
+    "yay": 2.4,
+    # Negative
+    "afraid": -2.2, "alone": -1.0, "angry": -2.3, "annoyed": -1.6, "annoying": -1.7,
+    "anxious": -1.0, "awful": -2.0, "bad": -2.5, "bored": -1.1, "boring": -1.3,
+    "broke": -1.8, "broken": -2.1, "confused": -1.3, "cried": -1.6, "cry": -2.1,
+    "depressed": -2.3, "difficult": -1.5, "disappointed": -1.9, "disappointing": -2.2, "down": -0.8,
+    "drained": -1.5, "dreadful": -1.9, "exhausted": -1.5, "fail": -2.5, "failed": -2.3,
+    "fear": -2.2, "frustrated": -2.4, "frustrating": -1.9, "guilty": -1.8, "hard": -0.4,
+    "hate": -2.7, "hated": -3.2, "headache": -1.5, "hurt": -2.4, "ill": -1.8,
+    "lonely": -1.5, "lost": -1.3, "mad": -2.2, "miserable": -2.2, "miss": -0.6,
+    "missed": -1.2, "nervous": -1.1, "overwhelmed": -1.8, "pain": -2.3, "painful": -1.9,
+    "problem": -1.7, "sad": -2.1, "scared": -1.9, "sick": -2.3, "sorry": -0.3,
+    "stress": -1.8, "stressed": -1.4, "stressful": -2.3, "struggle": -1.3, "struggled": -1.4,
+    "terrible": -2.1, "tired": -1.9, "unhappy": -1.8, "upset": -1.6, "worried": -1.2,
+    "worry": -1.9, "worse": -2.1, "worst": -3.1, "wrong": -2.1,
+}
+
+# Words that flip the valence of the sentiment words that follow them
+NEGATIONS = {
+    "not", "no", "never", "nothing", "nor", "neither", "without", "hardly", "barely",
+    "cannot", "dont", "didnt", "isnt", "wasnt", "cant", "couldnt", "wont", "wouldnt",
+}
+NEGATION_WINDOW = 3
+NEGATION_SCALAR = -0.74
+
+# Words that strengthen the sentiment word directly after them
+BOOSTERS = {
+    "very": 1.3, "really": 1.3, "so": 1.2, "extremely": 1.4, "incredibly": 1.4,
+    "super": 1.3, "totally": 1.2, "quite": 1.1, "slightly": 0.8, "somewhat": 0.8,
+}
+
+# Normalization constant used to map summed valences into -1..1 (same as VADER)
+NORMALIZATION_ALPHA = 15.0
+
+TOKEN_PATTERN = re.compile(r"[a-z']+")
+
+def _is_negation(token: str) -> bool:
+    return token in NEGATIONS or token.endswith("n't")
+
+class LexiconSentimentBackend(SentimentBackend):
+    """
+    Local, in-process lexicon scorer.
+
+    Texts are tokenized once, every matched sentiment word becomes a (text index,
+    word id, weight) triple, and the per-text sums and normalization are computed
+    with numpy over the whole batch at once. Nothing leaves the process, so scoring
+    never fails on the network and takes microseconds per text.
+    """
+
+    name = "lexicon"
+
+    def __init__(self, lexicon: Dict[str, float] = LEXICON):
+        self._vocabulary = {word: index for index, word in enumerate(lexicon)}
+        self._valences = np.fromiter(lexicon.values(), dtype=np.float64, count=len(lexicon))
+        # Changes to any of the scoring tables or constants change the scores
+        rules = [lexicon, sorted(NEGATIONS), NEGATION_WINDOW, NEGATION_SCALAR, BOOSTERS, NORMALIZATION_ALPHA, TOKEN_PATTERN.pattern]
+        self._version = f"{self.name}:{hashlib.sha256(json.dumps(rules, sort_keys=True).encode()).hexdigest()[:16]}"
+
+    @property
+    def version(self) -> str:
+        return self._version
+
+    def score_texts(self, texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score a batch of texts.
+
+        Args:
+            texts: The texts to score
+
+        Returns:
+            Tuple containing:
+            - Array of scores from -1 to 1, one per text
+            - Array with the number of lexicon words matched in each text
+        """
+        text_ids: List[int] = []
+        word_ids: List[int] = []
+        weights: List[float] = []
+
+        for text_index, text in enumerate(texts):
+            tokens = TOKEN_PATTERN.findall(text.lower())
+            for position, token in enumerate(tokens):
+                word_id = self._vocabulary.get(token)
+                if word_id is None:
+                    continue
+                weight = 1.0
+                if position > 0:
+                    weight *= BOOSTERS.get(tokens[position - 1], 1.0)
+                if any(_is_negation(previous) for previous in tokens[max(0, position - NEGATION_WINDOW):position]):
+                    weight *= NEGATION_SCALAR
+                text_ids.append(text_index)
+                word_ids.append(word_id)
+                weights.append(weight)
+
+        text_index_array = np.asarray(text_ids, dtype=np.intp)
+        contributions = self._valences[np.asarray(word_ids, dtype=np.intp)] * np.asarray(weights, dtype=np.float64)
+        sums = np.bincount(text_index_array, weights=contributions, minlength=len(texts))
+        matches = np.bincount(text_index_array, minlength=len(texts))
+        scores = sums / np.sqrt(sums * sums + NORMALIZATION_ALPHA)
+        return np.clip(scores, -1.0, 1.0), matches
+
+    async def analyze_batch(self, texts: List[str]) -> List[Tuple[float, Any]]:
+        if not texts:
+            return []
+        scores, matches = self.score_texts(texts)
+        return [
+            (float(score), {"backend": self.name, "matched_terms": int(matched)})
+            for score, matched in zip(scores, matches)
+        ]
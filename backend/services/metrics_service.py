@@ -0,0 +1,77 @@
+import os
+from typing import Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess
+
+# Stages of turning snippets into a journal, timed separately so a slow summary can be
+# pinned on the database, Gemini or the sentiment backend
+STAGES = (
+    "snippet_insert",
+    "snippet_batch_insert",
+    "snippets_fetch",
+    "gemini_queue",
+    "gemini_generate",
+    "gemini_first_chunk",
+    "sentiment",
+    "journal_upsert",
+    "summary_job",
+)
+
+# Degraded results served instead of failing the request
+FALLBACKS = ("journal_concatenation", "sentiment_zero")
+
+# Requests turned away by the per-request slowapi limits, snippet batches with days
+# left unsummarized by the per-user summary budget, and Gemini calls that timed out
+# waiting in the global quota queue
+RATE_LIMITS = ("request", "summary_deferred", "gemini_quota")
+
+stage_seconds = Histogram(
+    "journal_stage_duration_seconds",
+    "Time spent in each stage of snippet and journal processing",
+    ["stage"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+fallbacks_total = Counter("journal_fallbacks_total", "Degraded results used after a failure", ["kind"])
+rate_limit_rejections_total = Counter("rate_limit_rejections_total", "Requests or calls rejected by a rate limit", ["limit"])
+
+# Export every series from the start, so rates and alerts work before the first event
+for stage in STAGES:
+    stage_seconds.labels(stage=stage)
+for kind in FALLBACKS:
+    fallbacks_total.labels(kind=kind)
+for limit in RATE_LIMITS:
+    rate_limit_rejections_total.labels(limit=limit)
+
+def observe_stage(stage: str):
+    """
+    Time a stage of the pipeline.
+
+    Usable as ``with observe_stage("journal_upsert"):`` around sync or async code;
+    the duration is recorded even if the block raises.
+    """
+    return stage_seconds.labels(stage=stage).time()
+
+def count_fallback(kind: str) -> None:
+    fallbacks_total.labels(kind=kind).inc()
+
+def count_rate_limit_rejection(limit: str) -> None:
+    rate_limit_rejections_total.labels(limit=limit).inc()
+
+def render_metrics() -> Tuple[bytes, str]:
+    """
+    Render all metrics in the Prometheus text format.
+
+    With several uvicorn workers, set PROMETHEUS_MULTIPROC_DIR to an empty directory
+    shared by the workers; each worker then writes its samples there and any worker
+    serving /metrics reports the totals across all of them.
+
+    Returns:
+        Tuple containing:
+        - The metrics page
+        - Its content type
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
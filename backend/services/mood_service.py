@@ -0,0 +1,64 @@
+from datetime import date, timedelta
+import uuid
+from fastapi import HTTPException
+from typing import List, Dict, Any, Optional
+import traceback
+
+from .repository import get_repository
+
+MOOD_GRANULARITIES = ("day", "week", "month")
+
+def bucket_start(day: date, granularity: str) -> date:
+    """
+    Get the first day of the rollup bucket containing a date.
+
+    Matches Postgres date_trunc: weeks start on Monday, months on the 1st.
+    """
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+async def get_mood_rollups(user_id: uuid.UUID, granularity: str = "day", from_date: Optional[date] = None,
+                           to_date: Optional[date] = None) -> List[Dict[str, Any]]:
+    """
+    Get mood statistics for a user, one row per day, week or month.
+
+    On Postgres this reads the mood_rollups table, which a trigger on journals keeps
+    up to date whenever a sentiment score is written, so the cost depends on the
+    number of buckets in the range rather than the number of journal entries.
+
+    Args:
+        user_id: The user's UUID
+        granularity: "day", "week" or "month"
+        from_date: Only include buckets containing or after this date
+        to_date: Only include buckets starting on or before this date
+
+    Returns:
+        A list of buckets, oldest first, with mean, min, max and count of sentiment scores
+    """
+    if granularity not in MOOD_GRANULARITIES:
+        raise HTTPException(status_code=400, detail=f"Unknown granularity: {granularity}")
+
+    try:
+        rows = await get_repository().get_mood_rollups(
+            str(user_id), granularity,
+            bucket_start(from_date, granularity).isoformat() if from_date else None,
+            to_date.isoformat() if to_date else None,
+        )
+
+        return [
+            {
+                "bucket_start": row["bucket_start"],
+                "count": row["entry_count"],
+                "mean": row["score_sum"] / row["entry_count"],
+                "min": row["score_min"],
+                "max": row["score_max"],
+            }
+            for row in rows
+        ]
+    except Exception as e:
+        print(f"Error in get_mood_rollups: {str(e)}")
+        print(traceback.format_exc())
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,64 @@
+import base64
+import json
+from fastapi import HTTPException
+from typing import Any, Dict, List, Optional, Sequence
+
+def encode_cursor(values: Dict[str, Any]) -> str:
+    """Encode the sort key values of the last row of a page as an opaque cursor."""
+    payload = json.dumps(values, separators=(",", ":"), default=str).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, keys: Sequence[str]) -> Dict[str, Any]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Args:
+        cursor: The cursor from the client
+        keys: The sort keys the cursor must contain
+
+    Returns:
+        The decoded sort key values
+
+    Raises:
+        HTTPException: 400 if the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(values, dict) or any(key not in values for key in keys):
+            raise ValueError("missing sort keys")
+        return values
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def next_cursor(rows: List[Dict[str, Any]], limit: Optional[int], keys: Sequence[str]) -> Optional[str]:
+    """Return the cursor for the page after rows, or None if rows is the last page."""
+    if limit is None or len(rows) < limit:
+        return None
+    return encode_cursor({key: rows[-1][key] for key in keys})
+
+def select_columns(fields: Optional[Sequence[str]], allowed: Sequence[str], required: Sequence[str]) -> List[str]:
+    """
+    Build the column list for a field projection.
+
+    Args:
+        fields: The requested columns, or None for all allowed columns
+        allowed: The columns clients may request
+        required: Columns that are always selected (sort keys used for cursors)
+
+    Returns:
+        The columns to select
+
+    Raises:
+        HTTPException: 400 if a requested column is not allowed
+    """
+    if not fields:
+        return list(allowed)
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return list(required) + [field for field in fields if field not in required]
+
+def quote_filter_value(value: Any) -> str:
+    """Quote a value for use inside a PostgREST or=() filter."""
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
@@ -0,0 +1,247 @@
+import uuid
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import asyncpg
+
+from config import DATABASE_URL, DATABASE_POOL_MIN_SIZE, DATABASE_POOL_MAX_SIZE, DATABASE_STATEMENT_CACHE_SIZE
+from .repository import Repository
+
+def _timestamp(value: Any) -> Any:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    # Timestamps without an offset are UTC, as in the rest of the backend
+    if isinstance(value, datetime) and value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+def _date(value: Any) -> Any:
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+# Conversions from the JSON-style values used by the services to asyncpg parameters
+PARAM_TYPES = {"created_at": _timestamp, "date": _date, "bucket_start": _date}
+
+def _param(column: str, value: Any) -> Any:
+    convert = PARAM_TYPES.get(column)
+    return convert(value) if convert and value is not None else value
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+def _row(record: asyncpg.Record) -> Dict[str, Any]:
+    return {key: _json_value(value) for key, value in record.items()}
+
+def _columns(columns: Sequence[str]) -> str:
+    # Column names are validated against a whitelist by the services; quote them anyway
+    return ", ".join(column if column == "*" else f'"{column}"' for column in columns)
+
+class PostgresRepository(Repository):
+    """
+    Repository that talks to Postgres directly through an asyncpg connection pool.
+
+    Unlike PostgREST, queries do not pay for an HTTPS request, JSON encoding on the
+    server and a new connection checkout per call. asyncpg prepares every statement
+    on first use and caches it per connection, so repeated queries skip parsing
+    and planning; the SQL is built from a small fixed set of shapes (one per
+    combination of optional filters) to keep that cache effective. When connecting
+    through a transaction-mode pooler such as Supabase's pgbouncer on port 6543,
+    set DATABASE_STATEMENT_CACHE_SIZE=0, as prepared statements do not survive
+    between transactions there.
+    """
+
+    name = "postgres"
+
+    def __init__(self, dsn: str = DATABASE_URL, min_size: int = DATABASE_POOL_MIN_SIZE,
+                 max_size: int = DATABASE_POOL_MAX_SIZE, statement_cache_size: int = DATABASE_STATEMENT_CACHE_SIZE):
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.statement_cache_size = statement_cache_size
+        self._pool: Optional[asyncpg.Pool] = None
+
+    async def open(self) -> None:
+        if self._pool is None:
+            if not self.dsn:
+                raise ValueError("DATABASE_URL must be set to use the postgres database backend")
+            self._pool = await asyncpg.create_pool(
+                self.dsn,
+                min_size=self.min_size,
+                max_size=self.max_size,
+                statement_cache_size=self.statement_cache_size,
+            )
+
+    async def close(self) -> None:
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+    async def _fetch(self, query: str, *args) -> List[Dict[str, Any]]:
+        if self._pool is None:
+            await self.open()
+        return [_row(record) for record in await self._pool.fetch(query, *args)]
+
+    async def insert_snippet(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        columns = list(row)
+        placeholders = ", ".join(f"${i}" for i in range(1, len(columns) + 1))
+        rows = await self._fetch(
+            f"insert into public.snippets ({_columns(columns)}) values ({placeholders}) returning *",
+            *[_param(column, row[column]) for column in columns],
+        )
+        return rows[0]
+
+    async def insert_snippets(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if not rows:
+            return []
+        # One statement for the whole batch, with a parameter array per column
+        return await self._fetch(
+            """
+            insert into public.snippets (user_id, entry, created_at, idempotency_key)
+            select * from unnest($1::uuid[], $2::text[], $3::timestamptz[], $4::text[])
+            on conflict (user_id, idempotency_key) do nothing
+            returning *
+            """,
+            [row["user_id"] for row in rows],
+            [row["entry"] for row in rows],
+            [_timestamp(row["created_at"]) for row in rows],
+            [row.get("idempotency_key") for row in rows],
+        )
+
+    async def list_snippets(self, user_id: str, columns: Sequence[str], start: Optional[str] = None,
+                            end: Optional[str] = None, after: Optional[Tuple[str, str]] = None,
+                            limit: Optional[int] = None, ascending: bool = False) -> List[Dict[str, Any]]:
+        conditions, args = ["user_id = $1"], [user_id]
+        if start:
+            args.append(_timestamp(start))
+            conditions.append(f"created_at >= ${len(args)}")
+        if end:
+            args.append(_timestamp(end))
+            conditions.append(f"created_at < ${len(args)}")
+        if after:
+            args.extend([_timestamp(after[0]), uuid.UUID(after[1])])
+            conditions.append(f"(created_at, id) {'>' if ascending else '<'} (${len(args) - 1}, ${len(args)})")
+        direction = "asc" if ascending else "desc"
+        query = f"select {_columns(columns)} from public.snippets where {' and '.join(conditions)} order by created_at {direction}, id {direction}"
+        if limit is not None:
+            args.append(limit)
+            query += f" limit ${len(args)}"
+        return await self._fetch(query, *args)
+
+    async def upsert_journal(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        columns = list(row)
+        placeholders = ", ".join(f"${i}" for i in range(1, len(columns) + 1))
+        updates = ", ".join(f'"{column}" = excluded."{column}"' for column in columns if column not in ("user_id", "date"))
+        rows = await self._fetch(
+            f"insert into public.journals ({_columns(columns)}) values ({placeholders}) "
+            f"on conflict (user_id, date) do update set {updates} returning *",
+            *[_param(column, row[column]) for column in columns],
+        )
+        return rows[0]
+
+    async def get_journal(self, user_id: str, journal_date: str) -> Optional[Dict[str, Any]]:
+        rows = await self._fetch("select * from public.journals where user_id = $1 and date = $2", user_id, _date(journal_date))
+        return rows[0] if rows else None
+
+    async def get_journals_on_dates(self, user_id: str, journal_dates: Sequence[str]) -> List[Dict[str, Any]]:
+        if not journal_dates:
+            return []
+        return await self._fetch("select * from public.journals where user_id = $1 and date = any($2::date[])",
+                                 user_id, [_date(journal_date) for journal_date in journal_dates])
+
+    async def delete_journal(self, user_id: str, journal_date: str) -> None:
+        await self._fetch("delete from public.journals where user_id = $1 and date = $2", user_id, _date(journal_date))
+
+    async def list_journals(self, user_id: str, columns: Sequence[str], from_date: Optional[str] = None,
+                            to_date: Optional[str] = None, after: Optional[Tuple[str, str]] = None,
+                            limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        conditions, args = ["user_id = $1"], [user_id]
+        if from_date:
+            args.append(_date(from_date))
+            conditions.append(f"date >= ${len(args)}")
+        if to_date:
+            args.append(_date(to_date))
+            conditions.append(f"date <= ${len(args)}")
+        if after:
+            args.extend([_date(after[0]), uuid.UUID(after[1])])
+            conditions.append(f"(date, id) < (${len(args) - 1}, ${len(args)})")
+        query = f"select {_columns(columns)} from public.journals where {' and '.join(conditions)} order by date desc, id desc"
+        if limit is not None:
+            args.append(limit)
+            query += f" limit ${len(args)}"
+        return await self._fetch(query, *args)
+
+    async def scan_journals(self, columns: Sequence[str], after: Optional[str] = None, limit: int = 500) -> List[Dict[str, Any]]:
+        if after:
+            return await self._fetch(
+                f"select {_columns(columns)} from public.journals where id > $1 order by id limit $2", uuid.UUID(after), limit,
+            )
+        return await self._fetch(f"select {_columns(columns)} from public.journals order by id limit $1", limit)
+
+    async def update_sentiment_scores(self, rows: List[Dict[str, Any]]) -> int:
+        if not rows:
+            return 0
+        # Defined in supabase/migrations/006_bulk_sentiment_scores.sql
+        updated = await self._fetch(
+            "select public.update_sentiment_scores($1::uuid[], $2::text[], $3::float8[]) as updated",
+            [uuid.UUID(row["id"]) for row in rows],
+            [row["entry"] for row in rows],
+            [row["sentiment_score"] for row in rows],
+        )
+        return updated[0]["updated"]
+
+    async def list_stale_days(self, from_date: str, to_date: str, after: Optional[Tuple[str, str]] = None,
+                              limit: int = 100) -> List[Dict[str, Any]]:
+        # Defined in supabase/migrations/005_journal_snippet_count.sql
+        return await self._fetch(
+            "select user_id, date, snippet_count from public.stale_journal_days($1, $2, $3, $4, $5)",
+            _date(from_date), _date(to_date),
+            _date(after[0]) if after else None, uuid.UUID(after[1]) if after else None,
+            limit,
+        )
+
+    async def upsert_journal_embeddings(self, rows: List[Dict[str, Any]]) -> None:
+        if not rows:
+            return
+        await self._fetch(
+            """
+            insert into public.journal_embeddings (user_id, date, model, embedding)
+            select * from unnest($1::uuid[], $2::date[], $3::text[], $4::bytea[])
+            on conflict (user_id, date) do update set model = excluded.model, embedding = excluded.embedding
+            """,
+            [row["user_id"] for row in rows],
+            [_date(row["date"]) for row in rows],
+            [row["model"] for row in rows],
+            [row["embedding"] for row in rows],
+        )
+
+    async def list_journal_embeddings(self, user_id: str, model: str) -> List[Dict[str, Any]]:
+        return await self._fetch(
+            "select date, embedding from public.journal_embeddings where user_id = $1 and model = $2 order by date",
+            user_id, model,
+        )
+
+    async def search_entries(self, user_id: str, query: str, after: Optional[Tuple[float, str]] = None,
+                             limit: int = 20) -> List[Dict[str, Any]]:
+        # Defined in supabase/migrations/007_full_text_search.sql
+        return await self._fetch(
+            "select kind, id, date, created_at, rank, highlight from public.search_entries($1, $2, $3, $4, $5)",
+            user_id, query, after[0] if after else None, uuid.UUID(after[1]) if after else None, limit,
+        )
+
+    async def get_mood_rollups(self, user_id: str, granularity: str, from_bucket: Optional[str] = None,
+                               to_date: Optional[str] = None) -> List[Dict[str, Any]]:
+        conditions, args = ["user_id = $1", "granularity = $2"], [user_id, granularity]
+        if from_bucket:
+            args.append(_date(from_bucket))
+            conditions.append(f"bucket_start >= ${len(args)}")
+        if to_date:
+            args.append(_date(to_date))
+            conditions.append(f"bucket_start <= ${len(args)}")
+        return await self._fetch(
+            "select bucket_start, entry_count, score_sum, score_min, score_max from public.mood_rollups "
+            f"where {' and '.join(conditions)} order by bucket_start",
+            *args,
+        )
@@ -0,0 +1,157 @@
+import asyncio
+import hashlib
+import hmac
+import os
+import random
+import re
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from config import PROFILING_SAMPLE_RATE, PROFILING_SECRET, PROFILING_INTERVAL_SECONDS, PROFILES_DIR, PROFILES_MAX_FILES
+
+PROFILE_HEADER = b"x-profile"
+# Requests for the profiles themselves are never profiled
+PROFILES_PATH = "/profiles"
+PROFILE_SUFFIX = ".speedscope.json"
+
+# <unix ms>-<method>-<endpoint slug>-<duration ms>ms.speedscope.json
+PROFILE_NAME = re.compile(r"^(?P<timestamp>\d+)-(?P<method>[A-Z]+)-(?P<endpoint>[\w.-]+)-(?P<duration_ms>\d+)ms\.speedscope\.json$")
+
+def profiling_enabled() -> bool:
+    return PROFILING_SAMPLE_RATE > 0 or bool(PROFILING_SECRET)
+
+def _signature(expires: int) -> str:
+    return hmac.new(PROFILING_SECRET.encode(), str(expires).encode(), hashlib.sha256).hexdigest()
+
+def profile_header(ttl_seconds: int = 3600) -> str:
+    """
+    Make an X-Profile header value that forces profiling until it expires.
+
+    Args:
+        ttl_seconds: How long the value stays valid
+
+    Returns:
+        "<expiry unix time>.<HMAC-SHA256 of the expiry with PROFILING_SECRET>"
+    """
+    if not PROFILING_SECRET:
+        raise ValueError("PROFILING_SECRET must be set to sign profiling requests")
+    expires = int(time.time()) + ttl_seconds
+    return f"{expires}.{_signature(expires)}"
+
+def verify_profile_header(value: Optional[str]) -> bool:
+    if not PROFILING_SECRET or not value:
+        return False
+    expires, _, signature = value.partition(".")
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    return hmac.compare_digest(signature, _signature(int(expires)))
+
+def _endpoint_slug(path: str) -> str:
+    # "/journals/{user_id}/{journal_date}" -> "journals_user_id_journal_date"
+    return re.sub(r"[^\w.-]+", "_", re.sub(r"[{}]", "", path).strip("/")) or "root"
+
+def _write_profile(session, method: str, endpoint: str, duration: float) -> str:
+    from pyinstrument.renderers import SpeedscopeRenderer
+
+    os.makedirs(PROFILES_DIR, exist_ok=True)
+    name = f"{int(time.time() * 1000)}-{method}-{_endpoint_slug(endpoint)}-{round(duration * 1000)}ms{PROFILE_SUFFIX}"
+    with open(os.path.join(PROFILES_DIR, name), "w") as f:
+        f.write(SpeedscopeRenderer().render(session))
+
+    # Names start with the timestamp, so sorting them orders the profiles by age
+    names = sorted(n for n in os.listdir(PROFILES_DIR) if PROFILE_NAME.match(n))
+    for old in names[:-PROFILES_MAX_FILES] if PROFILES_MAX_FILES > 0 else []:
+        # Another request (or worker) may be pruning the same files
+        try:
+            os.remove(os.path.join(PROFILES_DIR, old))
+        except FileNotFoundError:
+            pass
+    return name
+
+def list_profiles(endpoint: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+    """
+    List the most recent profiles, newest first.
+
+    Args:
+        endpoint: Only include profiles of this route, e.g. "/snippets/with-summary"
+        limit: Maximum number of profiles to return
+    """
+    if not os.path.isdir(PROFILES_DIR):
+        return []
+    profiles = []
+    slug = _endpoint_slug(endpoint) if endpoint else None
+    for name in sorted(os.listdir(PROFILES_DIR), reverse=True):
+        match = PROFILE_NAME.match(name)
+        if not match or (slug and match["endpoint"] != slug):
+            continue
+        try:
+            size = os.path.getsize(os.path.join(PROFILES_DIR, name))
+        except FileNotFoundError:
+            continue
+        profiles.append({
+            "name": name,
+            "method": match["method"],
+            "endpoint": match["endpoint"],
+            "duration_ms": int(match["duration_ms"]),
+            "created_at": datetime.fromtimestamp(int(match["timestamp"]) / 1000, tz=timezone.utc),
+            "size": size,
+        })
+        if len(profiles) >= limit:
+            break
+    return profiles
+
+def profile_path(name: str) -> Optional[str]:
+    """Path of a stored profile, or None if the name is not a profile in PROFILES_DIR."""
+    if not PROFILE_NAME.match(name):
+        return None
+    path = os.path.join(PROFILES_DIR, name)
+    return path if os.path.isfile(path) else None
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that profiles sampled requests with pyinstrument.
+
+    A request is profiled when it carries a valid signed X-Profile header (see
+    profile_header) or is picked by PROFILING_SAMPLE_RATE. pyinstrument samples
+    the stack every PROFILING_INTERVAL_SECONDS and, in async mode, charges time a
+    coroutine spends awaiting to the await, so both CPU and wall time show up.
+    Each profile is saved as speedscope JSON named after the route, which
+    speedscope.app opens as a flame graph. Unsampled requests only cost a header
+    lookup and a random draw; the middleware is not installed at all when
+    profiling is off.
+    """
+
+    def __init__(self, app, sample_rate: float = PROFILING_SAMPLE_RATE, interval: float = PROFILING_INTERVAL_SECONDS):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.interval = interval
+
+    def _should_profile(self, scope) -> bool:
+        if PROFILING_SECRET:
+            for key, value in scope["headers"]:
+                if key == PROFILE_HEADER:
+                    return verify_profile_header(value.decode("latin-1"))
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(PROFILES_PATH) or not self._should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        from pyinstrument import Profiler
+
+        profiler = Profiler(interval=self.interval, async_mode="enabled")
+        start = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            session = profiler.stop()
+            # The router stores the matched route in the scope; fall back to the raw path
+            route = scope.get("route")
+            endpoint = getattr(route, "path", None) or scope["path"]
+            try:
+                await asyncio.to_thread(_write_profile, session, scope["method"], endpoint, time.perf_counter() - start)
+            except Exception as e:
+                print(f"Error saving profile for {scope['method']} {endpoint}: {str(e)}")
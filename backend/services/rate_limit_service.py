@@ -0,0 +1,246 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from limits import parse
+from limits.storage import MovingWindowSupport, Storage, storage_from_string
+from limits.strategies import MovingWindowRateLimiter
+
+from config import RATE_LIMIT_STORAGE_URI, GEMINI_GLOBAL_RATE_LIMIT, GEMINI_QUEUE_MAX_WAIT_SECONDS
+from .metrics_service import count_rate_limit_rejection
+
+class SqliteStorage(Storage, MovingWindowSupport):
+    """
+    Rate limit storage in a SQLite file, shared by every worker process on the host.
+
+    Registers the ``sqlite://`` scheme with the limits library, so slowapi and the
+    Gemini quota accept e.g. ``sqlite:////tmp/journal-rate-limits.db`` as storage
+    URI. Every update runs in a ``BEGIN IMMEDIATE`` transaction, which serializes
+    the read-modify-write across processes. Supports the fixed window strategy
+    used by slowapi and the moving window strategy used by the Gemini quota.
+    """
+
+    STORAGE_SCHEME = ["sqlite"]
+
+    def __init__(self, uri: str, wrap_exceptions: bool = False, **options: Any):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        # sqlite:///relative/path or sqlite:////absolute/path, as in SQLAlchemy
+        path = uri.split("://", 1)[1]
+        self.path = (path[1:] if path.startswith("/") else path) or ":memory:"
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._connection.execute("pragma journal_mode = wal")
+        self._connection.executescript("""
+            create table if not exists counters (key text primary key, value integer not null, expires_at real not null);
+            create table if not exists events (key text not null, atime real not null);
+            create index if not exists events_key_atime_idx on events (key, atime);
+        """)
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def _transaction(self, operation):
+        with self._lock:
+            self._connection.execute("begin immediate")
+            try:
+                result = operation(self._connection, time.time())
+                self._connection.execute("commit")
+                return result
+            except BaseException:
+                self._connection.execute("rollback")
+                raise
+
+    def incr(self, key: str, expiry: int, elastic_expiry: bool = False, amount: int = 1) -> int:
+        def operation(connection, now):
+            connection.execute("delete from counters where key = ? and expires_at <= ?", (key, now))
+            return connection.execute(
+                "insert into counters (key, value, expires_at) values (?, ?, ?) "
+                "on conflict (key) do update set value = value + excluded.value"
+                + (", expires_at = excluded.expires_at" if elastic_expiry else "")
+                + " returning value",
+                (key, amount, now + expiry),
+            ).fetchone()[0]
+        return self._transaction(operation)
+
+    def get(self, key: str) -> int:
+        with self._lock:
+            row = self._connection.execute("select value from counters where key = ? and expires_at > ?", (key, time.time())).fetchone()
+        return row[0] if row else 0
+
+    def get_expiry(self, key: str) -> float:
+        with self._lock:
+            row = self._connection.execute("select expires_at from counters where key = ?", (key,)).fetchone()
+        return row[0] if row else time.time()
+
+    def check(self) -> bool:
+        try:
+            with self._lock:
+                self._connection.execute("select 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self) -> Optional[int]:
+        def operation(connection, now):
+            cleared = connection.execute("delete from counters").rowcount
+            return cleared + connection.execute("delete from events").rowcount
+        return self._transaction(operation)
+
+    def clear(self, key: str) -> None:
+        def operation(connection, now):
+            connection.execute("delete from counters where key = ?", (key,))
+            connection.execute("delete from events where key = ?", (key,))
+        self._transaction(operation)
+
+    def acquire_entry(self, key: str, limit: int, expiry: int, amount: int = 1) -> bool:
+        if amount > limit:
+            return False
+
+        def operation(connection, now):
+            connection.execute("delete from events where key = ? and atime < ?", (key, now - expiry))
+            count = connection.execute("select count(*) from events where key = ?", (key,)).fetchone()[0]
+            if count + amount > limit:
+                return False
+            connection.executemany("insert into events (key, atime) values (?, ?)", [(key, now)] * amount)
+            return True
+        return self._transaction(operation)
+
+    def get_moving_window(self, key: str, limit: int, expiry: int) -> Tuple[float, int]:
+        now = time.time()
+        with self._lock:
+            oldest, count = self._connection.execute(
+                "select min(atime), count(*) from events where key = ? and atime >= ?", (key, now - expiry)
+            ).fetchone()
+        return (oldest if oldest is not None else now), count
+
+class GeminiQuotaExceeded(Exception):
+    """Raised when a Gemini call could not get a slot in the global quota in time."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Gemini quota exceeded, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+class GeminiQuota:
+    """
+    Global Gemini request budget with fair per-user queueing.
+
+    The budget is a moving window limit (GEMINI_GLOBAL_RATE_LIMIT) kept in the
+    rate limit storage, so with a shared storage (sqlite:// or redis://) all
+    worker processes draw from the same budget. When the budget is used up,
+    callers wait instead of failing: each user has a FIFO queue and freed slots
+    go to the queued users in turn, so one user with many pending summaries
+    cannot starve everyone else. A caller that waits longer than
+    GEMINI_QUEUE_MAX_WAIT_SECONDS gets GeminiQuotaExceeded.
+
+    Fairness is per process; across processes slots go to whichever worker asks
+    first once the window has room.
+    """
+
+    def __init__(self, limit: str = GEMINI_GLOBAL_RATE_LIMIT, storage_uri: str = RATE_LIMIT_STORAGE_URI,
+                 max_wait_seconds: float = GEMINI_QUEUE_MAX_WAIT_SECONDS, key: str = "gemini-global"):
+        self.item = parse(limit)
+        self.limiter = MovingWindowRateLimiter(storage_from_string(storage_uri))
+        self.max_wait_seconds = max_wait_seconds
+        self.key = key
+        self._queues: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        self._dispatcher: Optional[asyncio.Task] = None
+        self.granted = 0
+        self.queued = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+
+    async def _hit(self) -> bool:
+        # Storage calls may do file IO, so keep them off the event loop
+        return await asyncio.to_thread(self.limiter.hit, self.item, self.key)
+
+    async def _seconds_until_slot(self) -> float:
+        reset_time, _ = await asyncio.to_thread(self.limiter.get_window_stats, self.item, self.key)
+        return max(0.0, reset_time - time.time())
+
+    async def acquire(self, user_id: Optional[Any] = None, max_wait_seconds: Optional[float] = None) -> None:
+        """
+        Wait for a slot in the global Gemini budget.
+
+        Args:
+            user_id: The user the call is made for, used for fair queueing
+            max_wait_seconds: How long to wait at most; defaults to GEMINI_QUEUE_MAX_WAIT_SECONDS
+
+        Raises:
+            GeminiQuotaExceeded: If no slot became free in time
+        """
+        if not self._queues and await self._hit():
+            self.granted += 1
+            return
+
+        user = str(user_id) if user_id is not None else "anonymous"
+        future = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(user, deque()).append(future)
+        self.queued += 1
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(future, max_wait_seconds if max_wait_seconds is not None else self.max_wait_seconds)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            count_rate_limit_rejection("gemini_quota")
+            raise GeminiQuotaExceeded(await self._seconds_until_slot())
+        finally:
+            self.wait_seconds += time.monotonic() - start
+        self.granted += 1
+
+    def _next_waiter(self) -> Optional[Tuple[str, asyncio.Future]]:
+        """Take the oldest live waiter of the next user in turn, skipping ones that gave up."""
+        while self._queues:
+            user, queue = next(iter(self._queues.items()))
+            while queue and queue[0].done():
+                queue.popleft()
+            if not queue:
+                del self._queues[user]
+                continue
+            future = queue.popleft()
+            if queue:
+                self._queues.move_to_end(user)
+            else:
+                del self._queues[user]
+            return user, future
+        return None
+
+    def _requeue(self, user: str, future: asyncio.Future) -> None:
+        """Put a waiter taken with _next_waiter back at the head of the line."""
+        self._queues.setdefault(user, deque()).appendleft(future)
+        self._queues.move_to_end(user, last=False)
+
+    async def _dispatch(self) -> None:
+        # A live waiter is taken before the budget is charged, so no slot is spent once
+        # every queued caller has timed out or been cancelled
+        while (waiter := self._next_waiter()) is not None:
+            user, future = waiter
+            if not await self._hit():
+                self._requeue(user, future)
+                await asyncio.sleep(max(0.05, await self._seconds_until_slot()))
+                continue
+            if future.done():
+                # The caller gave up during the hit; the slot goes to the next one in turn
+                waiter = self._next_waiter()
+                future = waiter[1] if waiter is not None else None
+            if future is not None:
+                future.set_result(None)
+        self._queues.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": str(self.item),
+            "granted": self.granted,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "waiting": sum(not future.done() for queue in self._queues.values() for future in queue),
+            "wait_seconds": round(self.wait_seconds, 3),
+        }
+
+gemini_quota = GeminiQuota()
@@ -0,0 +1,225 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from config import DATABASE_BACKEND
+
+class Repository(ABC):
+    """
+    Interface for the storage of snippets, journals and mood rollups.
+
+    Every backend takes and returns rows as dicts of JSON-compatible values, the
+    way PostgREST does: ids as strings, timestamps as ISO 8601 strings and dates as
+    YYYY-MM-DD strings. Backends that hold resources (connection pools, database
+    files) set them up in open() and release them in close(); like the sentiment
+    backends they open themselves on first use if open() was not called.
+
+    Keyset pagination is passed down as ``after``, the sort key values of the last
+    row of the previous page, and results are ordered by those keys, newest first.
+    """
+
+    name = "base"
+
+    async def open(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    # Snippets
+
+    @abstractmethod
+    async def insert_snippet(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        """Insert one snippet and return it as stored."""
+
+    @abstractmethod
+    async def insert_snippets(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Insert many snippets in one statement, skipping rows whose (user_id,
+        idempotency_key) is already stored.
+
+        Returns:
+            The rows that were inserted
+        """
+
+    @abstractmethod
+    async def list_snippets(self, user_id: str, columns: Sequence[str], start: Optional[str] = None,
+                            end: Optional[str] = None, after: Optional[Tuple[str, str]] = None,
+                            limit: Optional[int] = None, ascending: bool = False) -> List[Dict[str, Any]]:
+        """
+        Get a user's snippets ordered by (created_at, id).
+
+        Args:
+            user_id: The user's id
+            columns: Columns to return
+            start: Only snippets created at or after this timestamp
+            end: Only snippets created before this timestamp
+            after: (created_at, id) of the last row of the previous page
+            limit: Maximum number of rows, or None for all of them
+            ascending: Oldest first instead of newest first
+        """
+
+    # Journals
+
+    @abstractmethod
+    async def upsert_journal(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Insert a journal, or update the columns present in row if the user already
+        has one for row["date"], and return it as stored.
+        """
+
+    @abstractmethod
+    async def get_journal(self, user_id: str, journal_date: str) -> Optional[Dict[str, Any]]:
+        """Get a user's journal for a date, or None."""
+
+    @abstractmethod
+    async def get_journals_on_dates(self, user_id: str, journal_dates: Sequence[str]) -> List[Dict[str, Any]]:
+        """Get a user's journals for any of the given dates in one query, in no particular order."""
+
+    @abstractmethod
+    async def delete_journal(self, user_id: str, journal_date: str) -> None:
+        """Delete a user's journal for a date, if there is one."""
+
+    @abstractmethod
+    async def list_journals(self, user_id: str, columns: Sequence[str], from_date: Optional[str] = None,
+                            to_date: Optional[str] = None, after: Optional[Tuple[str, str]] = None,
+                            limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Get a user's journals ordered by (date, id), newest first.
+
+        Args:
+            user_id: The user's id
+            columns: Columns to return
+            from_date: Only journals on or after this date
+            to_date: Only journals on or before this date
+            after: (date, id) of the last row of the previous page
+            limit: Maximum number of rows, or None for all of them
+        """
+
+    @abstractmethod
+    async def scan_journals(self, columns: Sequence[str], after: Optional[str] = None, limit: int = 500) -> List[Dict[str, Any]]:
+        """
+        Get journals across all users ordered by id, for batch jobs that visit every journal.
+
+        Args:
+            columns: Columns to return; must include id
+            after: id of the last row of the previous page
+            limit: Maximum number of rows
+        """
+
+    @abstractmethod
+    async def update_sentiment_scores(self, rows: List[Dict[str, Any]]) -> int:
+        """
+        Set the sentiment_score of many journals in one statement.
+
+        A journal is skipped if its entry no longer matches row["entry"], i.e. it
+        was rewritten after the score was computed.
+
+        Args:
+            rows: Rows with id, entry and sentiment_score
+
+        Returns:
+            The number of journals updated
+        """
+
+    @abstractmethod
+    async def list_stale_days(self, from_date: str, to_date: str, after: Optional[Tuple[str, str]] = None,
+                              limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Get the (user, UTC day) pairs whose journal is missing or out of date,
+        across all users, ordered by (date, user_id), oldest first.
+
+        A journal is out of date when its snippet_count differs from the number of
+        snippets the user created that day; journals with no snippet_count were not
+        generated from snippets and never are.
+
+        Args:
+            from_date: First day to consider
+            to_date: Last day to consider
+            after: (date, user_id) of the last row of the previous page
+            limit: Maximum number of rows
+
+        Returns:
+            Rows with user_id, date and snippet_count
+        """
+
+    @abstractmethod
+    async def upsert_journal_embeddings(self, rows: List[Dict[str, Any]]) -> None:
+        """
+        Insert or replace the embeddings of many journals in one statement.
+
+        Args:
+            rows: Rows with user_id, date, model and embedding, the vector packed as
+                little-endian float32 bytes (the one non-JSON value in the interface)
+        """
+
+    @abstractmethod
+    async def list_journal_embeddings(self, user_id: str, model: str) -> List[Dict[str, Any]]:
+        """
+        Get all of a user's journal embeddings made with model, oldest first.
+
+        Returns:
+            Rows with date and embedding (bytes)
+        """
+
+    # Search
+
+    @abstractmethod
+    async def search_entries(self, user_id: str, query: str, after: Optional[Tuple[float, str]] = None,
+                             limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Full-text search over a user's journal and snippet entries, best match first.
+
+        Args:
+            user_id: The user's id
+            query: The search text as the user typed it
+            after: (rank, id) of the last row of the previous page
+            limit: Maximum number of rows
+
+        Returns:
+            Rows with kind ("journal" or "snippet"), id, date, created_at (None for
+            journals), rank and highlight, an excerpt with the matches in <mark> tags
+        """
+
+    # Dashboard
+
+    @abstractmethod
+    async def get_mood_rollups(self, user_id: str, granularity: str, from_bucket: Optional[str] = None,
+                               to_date: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Get a user's mood rollup rows, oldest bucket first.
+
+        Returns:
+            Rows with bucket_start, entry_count, score_sum, score_min and score_max
+        """
+
+def create_repository(name: str) -> Repository:
+    """
+    Create a repository by name.
+
+    Args:
+        name: "supabase" for supabase-py over PostgREST, "postgres" for a direct
+            asyncpg connection pool, or "sqlite" for a local database file
+
+    Returns:
+        A new, unopened repository
+    """
+    # Imported lazily so each backend's driver is only needed when it is used
+    if name == "supabase":
+        from .supabase_repository import SupabaseRepository
+        return SupabaseRepository()
+    if name == "postgres":
+        from .postgres_repository import PostgresRepository
+        return PostgresRepository()
+    if name == "sqlite":
+        from .sqlite_repository import SqliteRepository
+        return SqliteRepository()
+    raise ValueError(f"Unknown database backend: {name}")
+
+_repository: Optional[Repository] = None
+
+def get_repository() -> Repository:
+    """Get the shared repository selected by DATABASE_BACKEND."""
+    global _repository
+    if _repository is None:
+        _repository = create_repository(DATABASE_BACKEND)
+    return _repository
@@ -0,0 +1,46 @@
+import uuid
+from fastapi import HTTPException
+from typing import List, Dict, Any, Optional, Tuple
+import traceback
+
+from .repository import get_repository
+from .pagination import decode_cursor, next_cursor
+
+SEARCH_CURSOR_KEYS = ("rank", "id")
+
+async def search_entries(user_id: uuid.UUID, query: str, limit: int = 20,
+                         cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Search a user's journals and snippets, best match first, one keyset page at a time.
+
+    Backed by GIN indexes on Postgres and FTS5 tables on SQLite, so the cost depends
+    on the number of matching entries rather than the length of the user's history.
+
+    Args:
+        user_id: The user's UUID
+        query: The search text; words are stemmed, so "hiking" also finds "hiked"
+        limit: Maximum number of results
+        cursor: Cursor returned with the previous page, or None for the first page
+
+    Returns:
+        Tuple containing:
+        - A list of results with kind, id, date, created_at, rank and highlight
+        - The cursor for the next page, or None if this is the last page
+    """
+    query = query.strip()
+    if not query:
+        raise HTTPException(status_code=400, detail="Search query must not be empty")
+
+    try:
+        after = None
+        if cursor:
+            values = decode_cursor(cursor, SEARCH_CURSOR_KEYS)
+            after = (float(values["rank"]), values["id"])
+        rows = await get_repository().search_entries(str(user_id), query, after, limit)
+        return rows, next_cursor(rows, limit, SEARCH_CURSOR_KEYS)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error in search_entries: {str(e)}")
+        print(traceback.format_exc())
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,67 +1,209 @@
-import requests
-import sys
-import os
-from typing import Dict, Any, Tuple
+import httpx
+from abc import ABC, abstractmethod
+from typing import Dict, Any, List, Optional, Tuple
 
-# Add the parent directory to the Python path
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from config import HUGGINGFACE_API_TOKEN, API_TIMEOUT_SECONDS
+from config import HUGGINGFACE_API_TOKEN, HUGGINGFACE_API_URL, API_TIMEOUT_SECONDS, SENTIMENT_MAX_CONNECTIONS, SENTIMENT_BACKEND
 
 # HuggingFace API configuration
-API_URL = "https://api-inference.huggingface.co/models/distilbert-base-uncased-finetuned-sst-2-english"
+API_URL = HUGGINGFACE_API_URL
 HEADERS = {"Authorization": f"Bearer {HUGGINGFACE_API_TOKEN}"}
 
-def analyze_sentiment(text: str) -> Tuple[float, Dict[str, Any]]:
+class SentimentBackend(ABC):
     """
-    Analyze sentiment of text using HuggingFace's distilbert model.
-    
+    Interface for sentiment scorers.
+
+    Every backend returns scores from -1 (negative) to 1 (positive), together with
+    the raw result it was derived from. Backends that hold resources (connections,
+    loaded models) set them up in open() and release them in close().
+    """
+
+    name = "base"
+
+    @property
+    def version(self) -> str:
+        """Identifies the model behind the scores; cached scores are keyed by it."""
+        return self.name
+
+    async def open(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    async def analyze(self, text: str) -> Tuple[float, Any]:
+        """
+        Analyze sentiment of a single text.
+
+        Args:
+            text: The text to analyze
+
+        Returns:
+            Tuple containing:
+            - A sentiment score from -1 (negative) to 1 (positive)
+            - The raw result from the backend
+        """
+        results = await self.analyze_batch([text])
+        return results[0]
+
+    @abstractmethod
+    async def analyze_batch(self, texts: List[str]) -> List[Tuple[float, Any]]:
+        """
+        Analyze sentiment of many texts at once.
+
+        Args:
+            texts: The texts to analyze
+
+        Returns:
+            A list with one (score, raw result) tuple per input text, in input order.
+            Texts that could not be scored get a score of 0.0.
+        """
+
+def _score_from_labels(scores: List[Dict[str, Any]]) -> float:
+    """
+    Convert the label scores for one text into a score between -1 and 1.
+
+    If the positive score is higher the result is positive, if the negative score
+    is higher the result is negative.
+    """
+    positive_score = next((item["score"] for item in scores if item["label"] == "POSITIVE"), 0)
+    negative_score = next((item["score"] for item in scores if item["label"] == "NEGATIVE"), 0)
+
+    if positive_score > negative_score:
+        return positive_score
+    return -negative_score
+
+class HuggingFaceSentimentBackend(SentimentBackend):
+    """
+    Async client for the HuggingFace inference API (distilbert SST-2).
+
+    Holds a single httpx.AsyncClient so that connections are kept alive and reused
+    across requests instead of paying TCP and TLS setup on every call. The client is
+    opened and closed with the FastAPI app lifespan; if it is used before being
+    opened (for example from a script) it opens itself on first use.
+    """
+
+    name = "huggingface"
+
+    def __init__(self, api_url: str = API_URL, headers: Optional[Dict[str, str]] = None,
+                 timeout: float = API_TIMEOUT_SECONDS, max_connections: int = SENTIMENT_MAX_CONNECTIONS):
+        self.api_url = api_url
+        self.headers = headers if headers is not None else HEADERS
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def version(self) -> str:
+        # The URL names the hosted model
+        return f"{self.name}:{self.api_url}"
+
+    async def open(self) -> None:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers=self.headers,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+            )
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _post(self, inputs: Any) -> Any:
+        if self._client is None:
+            await self.open()
+        response = await self._client.post(self.api_url, json={"inputs": inputs})
+        return response.json()
+
+    async def analyze_batch(self, texts: List[str]) -> List[Tuple[float, Any]]:
+        if not texts:
+            return []
+
+        def failed(error: Dict[str, Any]) -> List[Tuple[float, Any]]:
+            return [(0.0, error) for _ in texts]
+
+        try:
+            result = await self._post(texts)
+        except httpx.TimeoutException:
+            print("Timeout error when calling HuggingFace API")
+            return failed({"error": "timeout"})
+        except httpx.HTTPError as e:
+            print(f"Request error when calling HuggingFace API: {str(e)}")
+            return failed({"error": str(e)})
+        except Exception as e:
+            print(f"Unexpected error in sentiment analysis: {str(e)}")
+            return failed({"error": str(e)})
+
+        # Handle error case
+        if isinstance(result, dict) and "error" in result:
+            print(f"Error from HuggingFace API: {result['error']}")
+            return failed(result)
+
+        # The API returns one list of labels with scores per input text
+        if not isinstance(result, list) or len(result) != len(texts):
+            print(f"Unexpected sentiment analysis result for {len(texts)} texts")
+            return failed({"error": "unexpected response shape"})
+
+        scored = []
+        for scores in result:
+            try:
+                scored.append((_score_from_labels(scores), [scores]))
+            except Exception as e:
+                print(f"Error processing sentiment analysis result: {str(e)}")
+                scored.append((0.0, {"error": str(e)}))
+        return scored
+
+def create_backend(name: str) -> SentimentBackend:
+    """
+    Create a sentiment backend by name.
+
+    Args:
+        name: "huggingface" for the hosted distilbert model or "lexicon" for the
+            local in-process scorer
+
+    Returns:
+        A new, unopened backend
+    """
+    if name == "huggingface":
+        return HuggingFaceSentimentBackend()
+    if name == "lexicon":
+        # Imported lazily so numpy is only needed when the local backend is used
+        from .lexicon_sentiment import LexiconSentimentBackend
+        return LexiconSentimentBackend()
+    raise ValueError(f"Unknown sentiment backend: {name}")
+
+_backend: Optional[SentimentBackend] = None
+
+def get_backend() -> SentimentBackend:
+    """Get the shared sentiment backend selected by SENTIMENT_BACKEND."""
+    global _backend
+    if _backend is None:
+        _backend = create_backend(SENTIMENT_BACKEND)
+    return _backend
+
+async def analyze_sentiment(text: str) -> Tuple[float, Any]:
+    """
+    Analyze sentiment of text with the configured backend.
+
     Args:
         text: The text to analyze
-        
+
     Returns:
         Tuple containing:
         - A sentiment score from -1 (negative) to 1 (positive)
-        - The raw response from the API
+        - The raw result from the backend
     """
-    try:
-        payload = {"inputs": text}
-        response = requests.post(API_URL, headers=HEADERS, json=payload, timeout=API_TIMEOUT_SECONDS)
-        result = response.json()
-        
-        # Handle error case
-        if isinstance(result, dict) and "error" in result:
-            print(f"Error from HuggingFace API: {result['error']}")
-            return 0.0, result
-        
-        # Extract sentiment scores from response
-        try:
-            if isinstance(result, list) and len(result) > 0:
-                # The API returns a list of labels with scores
-                scores = result[0]
-                
-                # Find the positive and negative scores
-                positive_score = next((item["score"] for item in scores if item["label"] == "POSITIVE"), 0)
-                negative_score = next((item["score"] for item in scores if item["label"] == "NEGATIVE"), 0)
-                
-                # Calculate normalized score between -1 and 1
-                # If positive score is higher, result is positive; if negative score is higher, result is negative
-                if positive_score > negative_score:
-                    sentiment_score = positive_score
-                else:
-                    sentiment_score = -negative_score
-                    
-                return sentiment_score, result
-        except Exception as e:
-            print(f"Error processing sentiment analysis result: {str(e)}")
-    except requests.exceptions.Timeout:
-        print("Timeout error when calling HuggingFace API")
-        return 0.0, {"error": "timeout"}
-    except requests.exceptions.RequestException as e:
-        print(f"Request error when calling HuggingFace API: {str(e)}")
-        return 0.0, {"error": str(e)}
-    except Exception as e:
-        print(f"Unexpected error in sentiment analysis: {str(e)}")
-        return 0.0, {"error": str(e)}
-        
-    # Default return if any issues
-    return 0.0, {} 
\ No newline at end of file
+    return await get_backend().analyze(text)
+
+async def analyze_sentiment_batch(texts: List[str]) -> List[Tuple[float, Any]]:
+    """
+    Analyze sentiment of many texts at once with the configured backend.
+
+    Args:
+        texts: The texts to analyze
+
+    Returns:
+        A list with one (score, raw result) tuple per input text
+    """
+    return await get_backend().analyze_batch(texts)
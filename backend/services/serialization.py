@@ -0,0 +1,38 @@
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import orjson
+from starlette.responses import Response, StreamingResponse
+
+# Lists longer than this are sent as a stream of chunks of this many rows
+ROWS_PER_CHUNK = 500
+
+def encode_rows(rows: List[Dict[str, Any]]) -> bytes:
+    """
+    Encode repository rows as a JSON array.
+
+    Rows from the repositories are already in their JSON shape (string ids, ISO
+    dates and timestamps) and hold only whitelisted columns, so they are encoded
+    as they are with orjson instead of being validated against the response
+    models first.
+    """
+    return orjson.dumps(rows)
+
+async def iter_rows(rows: List[Dict[str, Any]], chunk_size: int = ROWS_PER_CHUNK) -> AsyncIterator[bytes]:
+    """Encode rows as a JSON array, one chunk of rows at a time."""
+    yield b"["
+    for start in range(0, len(rows), chunk_size):
+        # Encode the chunk as a list and drop its brackets
+        chunk = orjson.dumps(rows[start:start + chunk_size])[1:-1]
+        yield chunk if start == 0 else b"," + chunk
+    yield b"]"
+
+def rows_response(rows: List[Dict[str, Any]], headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    Respond with rows as a JSON array.
+
+    Long lists are streamed in chunks, so the first bytes go out before the whole
+    body is encoded and the event loop gets a turn between chunks.
+    """
+    if len(rows) <= ROWS_PER_CHUNK:
+        return Response(content=encode_rows(rows), media_type="application/json", headers=headers)
+    return StreamingResponse(iter_rows(rows), media_type="application/json", headers=headers)
@@ -1,9 +1,43 @@
-from datetime import datetime
+from datetime import datetime, date, time, timedelta, timezone as dt_timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 import uuid
 from fastapi import HTTPException
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 
-from .db_service import get_client
+from .repository import get_repository
+from .metrics_service import observe_stage
+from .pagination import decode_cursor, next_cursor, select_columns
+
+# Columns clients may request from the snippet listing
+SNIPPET_COLUMNS = ("id", "user_id", "created_at", "entry")
+SNIPPET_CURSOR_KEYS = ("created_at", "id")
+
+def local_day_bounds(from_date: Optional[date], to_date: Optional[date], timezone: str = "UTC") -> Tuple[Optional[str], Optional[str]]:
+    """
+    Convert an inclusive range of calendar days in a timezone to UTC timestamps.
+    
+    Args:
+        from_date: First day of the range, or None for no lower bound
+        to_date: Last day of the range, or None for no upper bound
+        timezone: IANA timezone name the days are in, e.g. "Europe/London"
+        
+    Returns:
+        Tuple of ISO timestamps (start inclusive, end exclusive); either may be None
+        
+    Raises:
+        HTTPException: 400 if the timezone is unknown
+    """
+    try:
+        zone = ZoneInfo(timezone)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(status_code=400, detail=f"Unknown timezone: {timezone}")
+
+    def start_of(day: date) -> str:
+        return datetime.combine(day, time.min, tzinfo=zone).astimezone(dt_timezone.utc).isoformat()
+
+    start = start_of(from_date) if from_date else None
+    end = start_of(to_date + timedelta(days=1)) if to_date else None
+    return start, end
 
 async def create_snippet(user_id: uuid.UUID, entry: str) -> Dict[str, Any]:
     """
@@ -22,40 +56,98 @@ async def create_snippet(user_id: uuid.UUID, entry: str) -> Dict[str, Any]:
             "entry": entry,
             "created_at": datetime.utcnow().isoformat()
         }
-        result = get_client().table("snippets").insert(data).execute()
-        return result.data[0]
+        with observe_stage("snippet_insert"):
+            return await get_repository().insert_snippet(data)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def create_snippets(user_id: uuid.UUID, snippets: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Create many snippets in one bulk insert, keeping their client timestamps.
+    
+    Snippets whose idempotency key was already stored for the user (for example
+    when a client retries an offline sync) are skipped rather than duplicated.
+    
+    Args:
+        user_id: The user's UUID
+        snippets: Dicts with "entry", "created_at" (datetime) and "idempotency_key"
+        
+    Returns:
+        Tuple containing:
+        - The newly created snippets
+        - The number of snippets skipped as duplicates
+    """
+    try:
+        rows = {}
+        for snippet in snippets:
+            created_at = snippet["created_at"]
+            # Timestamps without an offset are taken to be UTC, like server-stamped snippets
+            if created_at.tzinfo is None:
+                created_at = created_at.replace(tzinfo=dt_timezone.utc)
+            rows.setdefault(snippet["idempotency_key"], {
+                "user_id": str(user_id),
+                "entry": snippet["entry"],
+                "created_at": created_at.astimezone(dt_timezone.utc).isoformat(),
+                "idempotency_key": snippet["idempotency_key"],
+            })
+        
+        with observe_stage("snippet_batch_insert"):
+            created = await get_repository().insert_snippets(list(rows.values()))
+        return created, len(snippets) - len(created)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-async def get_snippets(user_id: uuid.UUID) -> List[Dict[str, Any]]:
+async def get_snippets(user_id: uuid.UUID, limit: Optional[int] = None, cursor: Optional[str] = None,
+                       fields: Optional[List[str]] = None, from_date: Optional[date] = None,
+                       to_date: Optional[date] = None, timezone: str = "UTC") -> Tuple[List[Dict[str, Any]], Optional[str]]:
     """
-    Get all snippets for a user.
+    Get snippets for a user, newest first, one keyset page at a time.
     
     Args:
         user_id: The user's UUID
+        limit: Maximum number of snippets to return, or None for all of them
+        cursor: Cursor returned with the previous page, or None for the first page
+        fields: Columns to return, or None for all columns; the sort keys are always included
+        from_date: Only return snippets created on or after this day
+        to_date: Only return snippets created on or before this day
+        timezone: Timezone the from/to days are in
         
     Returns:
-        A list of snippets
+        Tuple containing:
+        - A list of snippets
+        - The cursor for the next page, or None if this is the last page
     """
     try:
-        result = get_client().table("snippets").select("*").eq("user_id", str(user_id)).order("created_at", desc=True).execute()
-        return result.data
+        columns = select_columns(fields, SNIPPET_COLUMNS, SNIPPET_CURSOR_KEYS)
+        start, end = local_day_bounds(from_date, to_date, timezone)
+        after = None
+        if cursor:
+            values = decode_cursor(cursor, SNIPPET_CURSOR_KEYS)
+            after = (values["created_at"], values["id"])
+        rows = await get_repository().list_snippets(str(user_id), columns, start, end, after, limit)
+        return rows, next_cursor(rows, limit, SNIPPET_CURSOR_KEYS)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
         
-async def get_todays_snippets(user_id: uuid.UUID) -> List[Dict[str, Any]]:
+async def get_snippets_for_date(user_id: uuid.UUID, snippet_date: date, timezone: str = "UTC") -> List[Dict[str, Any]]:
     """
-    Get all snippets for a user created today.
+    Get all snippets for a user created on a specific date.
     
     Args:
         user_id: The user's UUID
+        snippet_date: The date the snippets were created on
+        timezone: Timezone the date is in
         
     Returns:
-        A list of today's snippets
+        A list of the day's snippets, oldest first
     """
     try:
-        today = datetime.utcnow().date()
-        result = get_client().table("snippets").select("*").eq("user_id", str(user_id)).gte("created_at", today.isoformat()).order("created_at").execute()
-        return result.data
+        start, end = local_day_bounds(snippet_date, snippet_date, timezone)
+        with observe_stage("snippets_fetch"):
+            return await get_repository().list_snippets(str(user_id), ["*"], start, end, ascending=True)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
@@ -0,0 +1,310 @@
+import asyncio
+import re
+import sqlite3
+import threading
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from config import SQLITE_PATH
+from .repository import Repository
+
+# Same tables, constraints and indexes as supabase/schema.sql and the migrations
+SCHEMA = """
+create table if not exists snippets (
+    id text primary key,
+    user_id text not null,
+    entry text not null,
+    created_at text not null,
+    idempotency_key text,
+    unique (user_id, idempotency_key)
+);
+create index if not exists snippets_user_id_created_at_idx on snippets (user_id, created_at desc, id desc);
+
+create table if not exists journals (
+    id text primary key,
+    user_id text not null,
+    entry text not null,
+    sentiment_score real,
+    date text not null,
+    snippet_count integer,
+    unique (user_id, date)
+);
+create index if not exists journals_user_id_date_idx on journals (user_id, date desc, id desc);
+
+create table if not exists journal_embeddings (
+    user_id text not null,
+    date text not null,
+    model text not null,
+    embedding blob not null,
+    primary key (user_id, date),
+    foreign key (user_id, date) references journals (user_id, date) on update cascade on delete cascade
+);
+"""
+
+# Full-text indexes over the entries (FTS5 with the Porter stemmer, like the 'english'
+# configuration in supabase/migrations/007_full_text_search.sql), kept in sync by triggers
+SEARCH_TABLES = ("journals", "snippets")
+
+SEARCH_SCHEMA = """
+create virtual table if not exists {table}_fts using fts5(entry, content='{table}', tokenize='porter unicode61');
+create trigger if not exists {table}_fts_insert after insert on {table} begin
+    insert into {table}_fts (rowid, entry) values (new.rowid, new.entry);
+end;
+create trigger if not exists {table}_fts_delete after delete on {table} begin
+    insert into {table}_fts ({table}_fts, rowid, entry) values ('delete', old.rowid, old.entry);
+end;
+create trigger if not exists {table}_fts_update after update of entry on {table} begin
+    insert into {table}_fts ({table}_fts, rowid, entry) values ('delete', old.rowid, old.entry);
+    insert into {table}_fts (rowid, entry) values (new.rowid, new.entry);
+end;
+"""
+
+# Arguments of FTS5's snippet(): column, match markers, ellipsis and tokens per excerpt
+HIGHLIGHT_ARGS = "0, '<mark>', '</mark>', '…', 16"
+
+# Columns added to existing tables after they were first created, as (table, column, type)
+ADDED_COLUMNS = [
+    ("journals", "snippet_count", "integer"),
+]
+
+# First day of the bucket containing a date, matching Postgres date_trunc (weeks start on Monday)
+BUCKET_START_SQL = {
+    "day": "date",
+    "week": "date(date, 'weekday 0', '-6 days')",
+    "month": "strftime('%Y-%m-01', date)",
+}
+
+def _timestamp(value: str) -> str:
+    """Normalize an ISO timestamp to UTC with microseconds, so stored values sort as text."""
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).isoformat(timespec="microseconds")
+
+def _columns(columns: Sequence[str]) -> str:
+    # Column names are validated against a whitelist by the services; quote them anyway
+    return ", ".join(column if column == "*" else f'"{column}"' for column in columns)
+
+class SqliteRepository(Repository):
+    """
+    Repository backed by a local SQLite file, for development and tests without Supabase.
+
+    The schema is created on open. Queries run in a worker thread on a single
+    connection guarded by a lock, which is plenty for one developer. Mood rollups
+    are computed from the journals with GROUP BY instead of being maintained by a
+    trigger, and search uses FTS5 tables kept up to date by triggers instead of GIN
+    indexes. Use ":memory:" as SQLITE_PATH for a throwaway database.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str = SQLITE_PATH):
+        self.path = path
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    async def open(self) -> None:
+        if self._connection is None:
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.row_factory = sqlite3.Row
+            connection.execute("pragma journal_mode = wal")
+            connection.executescript(SCHEMA)
+            for table, column, column_type in ADDED_COLUMNS:
+                if column not in {row["name"] for row in connection.execute(f"pragma table_info({table})")}:
+                    connection.execute(f"alter table {table} add column {column} {column_type}")
+            for table in SEARCH_TABLES:
+                exists = connection.execute("select 1 from sqlite_master where name = ?", [f"{table}_fts"]).fetchone()
+                connection.executescript(SEARCH_SCHEMA.format(table=table))
+                # Index the rows of a database created before search was added
+                if not exists:
+                    connection.execute(f"insert into {table}_fts ({table}_fts) values ('rebuild')")
+            connection.commit()
+            self._connection = connection
+
+    async def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def _run(self, query: str, args: Sequence[Any] = (), many: bool = False) -> List[Dict[str, Any]]:
+        with self._lock:
+            if many:
+                rows = []
+                for row_args in args:
+                    rows.extend(dict(row) for row in self._connection.execute(query, row_args).fetchall())
+            else:
+                rows = [dict(row) for row in self._connection.execute(query, args).fetchall()]
+            self._connection.commit()
+            return rows
+
+    async def _fetch(self, query: str, args: Sequence[Any] = (), many: bool = False) -> List[Dict[str, Any]]:
+        if self._connection is None:
+            await self.open()
+        return await asyncio.to_thread(self._run, query, args, many)
+
+    async def insert_snippet(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        rows = await self.insert_snippets([row])
+        return rows[0]
+
+    async def insert_snippets(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # Executed in one transaction; RETURNING yields nothing for skipped duplicates
+        return await self._fetch(
+            "insert into snippets (id, user_id, entry, created_at, idempotency_key) values (?, ?, ?, ?, ?) "
+            "on conflict (user_id, idempotency_key) do nothing returning *",
+            [(str(uuid.uuid4()), row["user_id"], row["entry"], _timestamp(row["created_at"]), row.get("idempotency_key"))
+             for row in rows],
+            many=True,
+        )
+
+    async def list_snippets(self, user_id: str, columns: Sequence[str], start: Optional[str] = None,
+                            end: Optional[str] = None, after: Optional[Tuple[str, str]] = None,
+                            limit: Optional[int] = None, ascending: bool = False) -> List[Dict[str, Any]]:
+        conditions, args = ["user_id = ?"], [user_id]
+        if start:
+            conditions.append("created_at >= ?")
+            args.append(_timestamp(start))
+        if end:
+            conditions.append("created_at < ?")
+            args.append(_timestamp(end))
+        if after:
+            conditions.append(f"(created_at, id) {'>' if ascending else '<'} (?, ?)")
+            args.extend([_timestamp(after[0]), after[1]])
+        direction = "asc" if ascending else "desc"
+        query = f"select {_columns(columns)} from snippets where {' and '.join(conditions)} order by created_at {direction}, id {direction}"
+        if limit is not None:
+            query += " limit ?"
+            args.append(limit)
+        return await self._fetch(query, args)
+
+    async def upsert_journal(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        row = {"id": str(uuid.uuid4()), **row}
+        columns = list(row)
+        updates = ", ".join(f'"{column}" = excluded."{column}"' for column in columns if column not in ("id", "user_id", "date"))
+        rows = await self._fetch(
+            f"insert into journals ({_columns(columns)}) values ({', '.join('?' for _ in columns)}) "
+            f"on conflict (user_id, date) do update set {updates} returning *",
+            [row[column] for column in columns],
+        )
+        return rows[0]
+
+    async def get_journal(self, user_id: str, journal_date: str) -> Optional[Dict[str, Any]]:
+        rows = await self._fetch("select * from journals where user_id = ? and date = ?", [user_id, journal_date])
+        return rows[0] if rows else None
+
+    async def get_journals_on_dates(self, user_id: str, journal_dates: Sequence[str]) -> List[Dict[str, Any]]:
+        if not journal_dates:
+            return []
+        placeholders = ", ".join("?" for _ in journal_dates)
+        return await self._fetch(f"select * from journals where user_id = ? and date in ({placeholders})", [user_id, *journal_dates])
+
+    async def delete_journal(self, user_id: str, journal_date: str) -> None:
+        await self._fetch("delete from journals where user_id = ? and date = ?", [user_id, journal_date])
+
+    async def list_journals(self, user_id: str, columns: Sequence[str], from_date: Optional[str] = None,
+                            to_date: Optional[str] = None, after: Optional[Tuple[str, str]] = None,
+                            limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        conditions, args = ["user_id = ?"], [user_id]
+        if from_date:
+            conditions.append("date >= ?")
+            args.append(from_date)
+        if to_date:
+            conditions.append("date <= ?")
+            args.append(to_date)
+        if after:
+            conditions.append("(date, id) < (?, ?)")
+            args.extend(after)
+        query = f"select {_columns(columns)} from journals where {' and '.join(conditions)} order by date desc, id desc"
+        if limit is not None:
+            query += " limit ?"
+            args.append(limit)
+        return await self._fetch(query, args)
+
+    async def scan_journals(self, columns: Sequence[str], after: Optional[str] = None, limit: int = 500) -> List[Dict[str, Any]]:
+        if after:
+            return await self._fetch(f"select {_columns(columns)} from journals where id > ? order by id limit ?", [after, limit])
+        return await self._fetch(f"select {_columns(columns)} from journals order by id limit ?", [limit])
+
+    async def update_sentiment_scores(self, rows: List[Dict[str, Any]]) -> int:
+        # Executed in one transaction; RETURNING yields nothing for skipped journals
+        updated = await self._fetch(
+            "update journals set sentiment_score = ? where id = ? and entry = ? returning id",
+            [(row["sentiment_score"], row["id"], row["entry"]) for row in rows],
+            many=True,
+        )
+        return len(updated)
+
+    async def list_stale_days(self, from_date: str, to_date: str, after: Optional[Tuple[str, str]] = None,
+                              limit: int = 100) -> List[Dict[str, Any]]:
+        # Timestamps are stored in UTC, so the first ten characters are the UTC day
+        conditions, args = ["(j.id is null or j.snippet_count <> d.snippet_count)"], [from_date, (date.fromisoformat(to_date) + timedelta(days=1)).isoformat()]
+        if after:
+            conditions.append("(d.date, d.user_id) > (?, ?)")
+            args.extend(after)
+        args.append(limit)
+        return await self._fetch(
+            "with days as (select user_id, substr(created_at, 1, 10) as date, count(*) as snippet_count from snippets "
+            "where created_at >= ? and created_at < ? group by 1, 2) "
+            "select d.user_id, d.date, d.snippet_count from days d "
+            "left join journals j on j.user_id = d.user_id and j.date = d.date "
+            f"where {' and '.join(conditions)} order by d.date, d.user_id limit ?",
+            args,
+        )
+
+    async def upsert_journal_embeddings(self, rows: List[Dict[str, Any]]) -> None:
+        await self._fetch(
+            "insert into journal_embeddings (user_id, date, model, embedding) values (?, ?, ?, ?) "
+            "on conflict (user_id, date) do update set model = excluded.model, embedding = excluded.embedding",
+            [(row["user_id"], row["date"], row["model"], row["embedding"]) for row in rows],
+            many=True,
+        )
+
+    async def list_journal_embeddings(self, user_id: str, model: str) -> List[Dict[str, Any]]:
+        return await self._fetch(
+            "select date, embedding from journal_embeddings where user_id = ? and model = ? order by date", [user_id, model],
+        )
+
+    async def search_entries(self, user_id: str, query: str, after: Optional[Tuple[float, str]] = None,
+                             limit: int = 20) -> List[Dict[str, Any]]:
+        # Match every word of the query; quoting each one keeps FTS5 operators in user text literal
+        words = re.findall(r"\w+", query)
+        if not words:
+            return []
+        match = " ".join(f'"{word}"' for word in words)
+        conditions, args = [], [match, user_id, match, user_id]
+        if after:
+            conditions.append("(rank, id) < (?, ?)")
+            args.extend(after)
+        args.append(limit)
+        # bm25() is lower for better matches, so it is negated to rank best first. CROSS JOIN
+        # makes SQLite look up the matches in the index first; otherwise it walks all of the
+        # user's rows and runs the full-text query once per row
+        return await self._fetch(
+            "select * from ("
+            f"select 'journal' as kind, j.id, j.date, null as created_at, -bm25(journals_fts) as rank, "
+            f"snippet(journals_fts, {HIGHLIGHT_ARGS}) as highlight "
+            "from journals_fts cross join journals j on j.rowid = journals_fts.rowid where journals_fts match ? and j.user_id = ? "
+            "union all "
+            f"select 'snippet', s.id, substr(s.created_at, 1, 10), s.created_at, -bm25(snippets_fts), "
+            f"snippet(snippets_fts, {HIGHLIGHT_ARGS}) "
+            "from snippets_fts cross join snippets s on s.rowid = snippets_fts.rowid where snippets_fts match ? and s.user_id = ?"
+            f") {'where ' + ' and '.join(conditions) if conditions else ''} order by rank desc, id desc limit ?",
+            args,
+        )
+
+    async def get_mood_rollups(self, user_id: str, granularity: str, from_bucket: Optional[str] = None,
+                               to_date: Optional[str] = None) -> List[Dict[str, Any]]:
+        bucket = BUCKET_START_SQL[granularity]
+        conditions, args = ["user_id = ?", "sentiment_score is not null"], [user_id]
+        if from_bucket:
+            conditions.append("date >= ?")
+            args.append(from_bucket)
+        if to_date:
+            conditions.append(f"{bucket} <= ?")
+            args.append(to_date)
+        return await self._fetch(
+            f"select {bucket} as bucket_start, count(*) as entry_count, sum(sentiment_score) as score_sum, "
+            f"min(sentiment_score) as score_min, max(sentiment_score) as score_max from journals "
+            f"where {' and '.join(conditions)} group by 1 order by 1",
+            args,
+        )
@@ -0,0 +1,135 @@
+import asyncio
+import uuid
+from datetime import date, datetime, timedelta
+from fastapi import HTTPException
+from typing import Dict, Any, Optional, Tuple
+
+from config import SUMMARY_DEBOUNCE_SECONDS, SUMMARY_MAX_DELAY_SECONDS, SUMMARY_JOB_TTL_SECONDS
+from . import journals_service
+from .metrics_service import observe_stage
+
+JobKey = Tuple[str, date]
+
+class SummaryQueue:
+    """
+    Background journal regeneration with per-day coalescing.
+
+    Each request to regenerate a (user_id, date) journal either creates a pending
+    job or joins the pending job for that day and pushes its start back by the
+    debounce window, so a burst of snippets costs one Gemini call. A job starts at
+    the latest SUMMARY_MAX_DELAY_SECONDS after the first request of the burst, so a
+    steady stream of snippets cannot postpone it forever. Jobs for the same day run
+    one after another, never concurrently.
+
+    Job state lives in process memory, so with several workers a job can only be
+    polled on the worker that accepted it.
+    """
+
+    def __init__(self, debounce_seconds: float = SUMMARY_DEBOUNCE_SECONDS,
+                 max_delay_seconds: float = SUMMARY_MAX_DELAY_SECONDS,
+                 job_ttl_seconds: float = SUMMARY_JOB_TTL_SECONDS):
+        self.debounce_seconds = debounce_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.job_ttl_seconds = job_ttl_seconds
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._pending: Dict[JobKey, Dict[str, Any]] = {}
+        self._first_requested: Dict[JobKey, float] = {}
+        self._timers: Dict[JobKey, asyncio.TimerHandle] = {}
+        self._running: Dict[JobKey, asyncio.Task] = {}
+
+    def enqueue(self, user_id: uuid.UUID, journal_date: date) -> Dict[str, Any]:
+        """
+        Request a regeneration of a user's journal for a day.
+
+        Args:
+            user_id: The user's UUID
+            journal_date: The day of the journal to regenerate
+
+        Returns:
+            The job that will do the regeneration; repeated calls within the debounce
+            window return the same job
+        """
+        self._prune()
+        loop = asyncio.get_running_loop()
+        key = (str(user_id), journal_date)
+        now = loop.time()
+
+        job = self._pending.get(key)
+        if job is None:
+            job = {
+                "job_id": str(uuid.uuid4()),
+                "user_id": str(user_id),
+                "date": journal_date,
+                "status": "pending",
+                "requests": 1,
+                "journal": None,
+                "error": None,
+                "created_at": datetime.utcnow(),
+                "finished_at": None,
+            }
+            self._jobs[job["job_id"]] = job
+            self._pending[key] = job
+            self._first_requested[key] = now
+        else:
+            job["requests"] += 1
+            self._timers[key].cancel()
+
+        start_at = min(now + self.debounce_seconds, self._first_requested[key] + self.max_delay_seconds)
+        self._timers[key] = loop.call_at(start_at, self._start, key)
+        return job
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self._jobs.get(job_id)
+
+    async def drain(self) -> None:
+        """Start every pending job immediately and wait for all jobs to finish."""
+        for key in list(self._pending):
+            self._timers[key].cancel()
+            self._start(key)
+        if self._running:
+            await asyncio.gather(*self._running.values(), return_exceptions=True)
+
+    def _start(self, key: JobKey) -> None:
+        job = self._pending.pop(key)
+        self._timers.pop(key, None)
+        self._first_requested.pop(key, None)
+
+        previous = self._running.get(key)
+        task = asyncio.create_task(self._run(key, job, previous))
+        self._running[key] = task
+
+        def forget(finished: asyncio.Task) -> None:
+            if self._running.get(key) is finished:
+                del self._running[key]
+        task.add_done_callback(forget)
+
+    async def _run(self, key: JobKey, job: Dict[str, Any], previous: Optional[asyncio.Task]) -> None:
+        # Never regenerate the same day twice at once; wait for the earlier job
+        if previous is not None:
+            await asyncio.gather(previous, return_exceptions=True)
+
+        job["status"] = "running"
+        try:
+            user_id, journal_date = key
+            with observe_stage("summary_job"):
+                job["journal"] = await journals_service.create_journal_from_snippets(uuid.UUID(user_id), journal_date)
+            job["status"] = "done"
+        except HTTPException as e:
+            job["status"] = "failed"
+            job["error"] = str(e.detail)
+        except Exception as e:
+            print(f"Error in summary job {job['job_id']}: {str(e)}")
+            job["status"] = "failed"
+            job["error"] = str(e)
+        finally:
+            job["finished_at"] = datetime.utcnow()
+
+    def _prune(self) -> None:
+        """Forget finished jobs older than the job TTL."""
+        cutoff = datetime.utcnow() - timedelta(seconds=self.job_ttl_seconds)
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job["finished_at"] is not None and job["finished_at"] < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+summary_queue = SummaryQueue()
@@ -0,0 +1,145 @@
+import asyncio
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .db_service import get_client
+from .pagination import quote_filter_value
+from .repository import Repository
+
+class SupabaseRepository(Repository):
+    """
+    Repository over the supabase-py client, i.e. PostgREST over HTTPS.
+
+    supabase-py is synchronous, so every query runs in a worker thread to keep it
+    from blocking the event loop while it waits for the response.
+    """
+
+    name = "supabase"
+
+    async def open(self) -> None:
+        # Build the client during start-up rather than in the first request
+        await asyncio.to_thread(get_client)
+
+    async def _execute(self, query) -> List[Dict[str, Any]]:
+        result = await asyncio.to_thread(query.execute)
+        return result.data
+
+    async def insert_snippet(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        rows = await self._execute(get_client().table("snippets").insert(row))
+        return rows[0]
+
+    async def insert_snippets(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return await self._execute(
+            get_client().table("snippets").upsert(rows, on_conflict="user_id,idempotency_key", ignore_duplicates=True)
+        )
+
+    async def list_snippets(self, user_id: str, columns: Sequence[str], start: Optional[str] = None,
+                            end: Optional[str] = None, after: Optional[Tuple[str, str]] = None,
+                            limit: Optional[int] = None, ascending: bool = False) -> List[Dict[str, Any]]:
+        query = get_client().table("snippets").select(",".join(columns)).eq("user_id", user_id)
+        if start:
+            query = query.gte("created_at", start)
+        if end:
+            query = query.lt("created_at", end)
+        if after:
+            last_created_at, last_id = quote_filter_value(after[0]), quote_filter_value(after[1])
+            op = "gt" if ascending else "lt"
+            query = query.or_(f"created_at.{op}.{last_created_at},and(created_at.eq.{last_created_at},id.{op}.{last_id})")
+        query = query.order("created_at", desc=not ascending).order("id", desc=not ascending)
+        if limit is not None:
+            query = query.limit(limit)
+        return await self._execute(query)
+
+    async def upsert_journal(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        # Only the columns in row are updated when the journal already exists
+        rows = await self._execute(get_client().table("journals").upsert(row, on_conflict="user_id,date"))
+        return rows[0]
+
+    async def get_journal(self, user_id: str, journal_date: str) -> Optional[Dict[str, Any]]:
+        rows = await self._execute(get_client().table("journals").select("*").eq("user_id", user_id).eq("date", journal_date))
+        return rows[0] if rows else None
+
+    async def get_journals_on_dates(self, user_id: str, journal_dates: Sequence[str]) -> List[Dict[str, Any]]:
+        if not journal_dates:
+            return []
+        return await self._execute(get_client().table("journals").select("*").eq("user_id", user_id).in_("date", list(journal_dates)))
+
+    async def delete_journal(self, user_id: str, journal_date: str) -> None:
+        await self._execute(get_client().table("journals").delete(returning="minimal").eq("user_id", user_id).eq("date", journal_date))
+
+    async def list_journals(self, user_id: str, columns: Sequence[str], from_date: Optional[str] = None,
+                            to_date: Optional[str] = None, after: Optional[Tuple[str, str]] = None,
+                            limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        query = get_client().table("journals").select(",".join(columns)).eq("user_id", user_id)
+        if from_date:
+            query = query.gte("date", from_date)
+        if to_date:
+            query = query.lte("date", to_date)
+        if after:
+            last_date, last_id = quote_filter_value(after[0]), quote_filter_value(after[1])
+            query = query.or_(f"date.lt.{last_date},and(date.eq.{last_date},id.lt.{last_id})")
+        query = query.order("date", desc=True).order("id", desc=True)
+        if limit is not None:
+            query = query.limit(limit)
+        return await self._execute(query)
+
+    async def scan_journals(self, columns: Sequence[str], after: Optional[str] = None, limit: int = 500) -> List[Dict[str, Any]]:
+        query = get_client().table("journals").select(",".join(columns))
+        if after:
+            query = query.gt("id", after)
+        return await self._execute(query.order("id").limit(limit))
+
+    async def update_sentiment_scores(self, rows: List[Dict[str, Any]]) -> int:
+        if not rows:
+            return 0
+        # Defined in supabase/migrations/006_bulk_sentiment_scores.sql
+        return await self._execute(get_client().rpc("update_sentiment_scores", {
+            "p_ids": [row["id"] for row in rows],
+            "p_entries": [row["entry"] for row in rows],
+            "p_scores": [row["sentiment_score"] for row in rows],
+        }))
+
+    async def list_stale_days(self, from_date: str, to_date: str, after: Optional[Tuple[str, str]] = None,
+                              limit: int = 100) -> List[Dict[str, Any]]:
+        # Defined in supabase/migrations/005_journal_snippet_count.sql
+        return await self._execute(get_client().rpc("stale_journal_days", {
+            "p_from": from_date,
+            "p_to": to_date,
+            "p_after_date": after[0] if after else None,
+            "p_after_user": after[1] if after else None,
+            "p_limit": limit,
+        }))
+
+    async def upsert_journal_embeddings(self, rows: List[Dict[str, Any]]) -> None:
+        if not rows:
+            return
+        # PostgREST takes and returns bytea as hex text with a \x prefix
+        await self._execute(get_client().table("journal_embeddings").upsert(
+            [{**row, "embedding": "\\x" + row["embedding"].hex()} for row in rows],
+            on_conflict="user_id,date", returning="minimal",
+        ))
+
+    async def list_journal_embeddings(self, user_id: str, model: str) -> List[Dict[str, Any]]:
+        rows = await self._execute(
+            get_client().table("journal_embeddings").select("date,embedding").eq("user_id", user_id).eq("model", model).order("date")
+        )
+        return [{"date": row["date"], "embedding": bytes.fromhex(row["embedding"][2:])} for row in rows]
+
+    async def search_entries(self, user_id: str, query: str, after: Optional[Tuple[float, str]] = None,
+                             limit: int = 20) -> List[Dict[str, Any]]:
+        # Defined in supabase/migrations/007_full_text_search.sql
+        return await self._execute(get_client().rpc("search_entries", {
+            "p_user_id": user_id,
+            "p_query": query,
+            "p_after_rank": after[0] if after else None,
+            "p_after_id": after[1] if after else None,
+            "p_limit": limit,
+        }))
+
+    async def get_mood_rollups(self, user_id: str, granularity: str, from_bucket: Optional[str] = None,
+                               to_date: Optional[str] = None) -> List[Dict[str, Any]]:
+        query = get_client().table("mood_rollups").select("bucket_start,entry_count,score_sum,score_min,score_max").eq("user_id", user_id).eq("granularity", granularity)
+        if from_bucket:
+            query = query.gte("bucket_start", from_bucket)
+        if to_date:
+            query = query.lte("bucket_start", to_date)
+        return await self._execute(query.order("bucket_start"))
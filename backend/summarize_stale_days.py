@@ -0,0 +1,164 @@
+"""Summarize days that have snippets but no up-to-date journal.
+
+Journals are only generated when a snippet is posted through
+/snippets/with-summary, so days written only through POST /snippets (or changed
+by an offline sync afterwards) are left without a journal or mood score. This
+script finds those days across all users (see Repository.list_stale_days) and
+summarizes them, meant to run nightly from cron.
+
+Days are processed a page at a time in (date, user_id) order. Within a page the
+journals are generated with at most --concurrency days and Gemini calls in flight
+(this replaces GEMINI_MAX_CONCURRENT_REQUESTS for the script), through the same
+global quota as the API (share it across processes with
+RATE_LIMIT_STORAGE_URI), then all of the page's entries are scored with one batched
+sentiment call and upserted. Days that fail are left stale for the next run; unlike
+the API, this script never writes the concatenation fallback.
+
+After every page the position is saved to --checkpoint, so an interrupted run
+picks up where it stopped when started again with the same dates. The checkpoint
+is removed once a run finishes.
+
+Usage:
+    python summarize_stale_days.py
+    python summarize_stale_days.py --from-date 2024-01-01 --to-date 2024-06-30 --concurrency 8
+    python summarize_stale_days.py --dry-run
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from checkpoints import read_checkpoint, remove_checkpoint, save_checkpoint
+from config import GEMINI_MAX_CONCURRENT_REQUESTS
+from services import ai_service, journals_service, sentiment_service, snippets_service
+from services.rate_limit_service import GeminiQuotaExceeded, gemini_quota
+from services.repository import get_repository
+
+def load_checkpoint(path: str, from_date: date, to_date: date) -> Dict[str, Any]:
+    """Load the checkpoint of an interrupted run over the same dates, or start a new one."""
+    checkpoint = {"from_date": from_date.isoformat(), "to_date": to_date.isoformat(), "after": None,
+                  "summarized": 0, "failed": 0}
+    saved = read_checkpoint(path)
+    if saved is None:
+        return checkpoint
+    if (saved["from_date"], saved["to_date"]) != (checkpoint["from_date"], checkpoint["to_date"]):
+        print(f"Ignoring checkpoint {path} for {saved['from_date']} to {saved['to_date']}")
+        return checkpoint
+    print(f"Resuming after {saved['after'][0]} {saved['after'][1]} "
+          f"({saved['summarized']} summarized, {saved['failed']} failed so far)")
+    return saved
+
+async def generate(day: Dict[str, Any], semaphore: asyncio.Semaphore) -> Optional[Dict[str, Any]]:
+    """
+    Generate the journal text for one stale day.
+
+    Returns:
+        The day with its snippet_count and entry, or None if it could not be summarized
+    """
+    user_id, journal_date = uuid.UUID(day["user_id"]), date.fromisoformat(day["date"])
+    async with semaphore:
+        try:
+            snippets = await snippets_service.get_snippets_for_date(user_id, journal_date)
+            if not snippets:
+                return None
+            entry = await ai_service.generate_journal_text(snippets, user_id)
+        except GeminiQuotaExceeded as e:
+            print(f"  {day['date']} {day['user_id']}: no room in the Gemini quota ({str(e)})")
+            return None
+        except Exception as e:
+            print(f"  {day['date']} {day['user_id']}: {str(e)}")
+            return None
+    return {**day, "snippet_count": len(snippets), "entry": entry}
+
+async def summarize_page(days: List[Dict[str, Any]], concurrency: int) -> int:
+    """
+    Summarize a page of stale days.
+
+    Returns:
+        The number of journals written
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    generated = [day for day in await asyncio.gather(*(generate(day, semaphore) for day in days)) if day]
+    scores = await ai_service.score_journals([day["entry"] for day in generated])
+
+    async def write(day: Dict[str, Any], sentiment_score: float) -> bool:
+        async with semaphore:
+            try:
+                await journals_service.create_or_update_journal(
+                    uuid.UUID(day["user_id"]), date.fromisoformat(day["date"]), day["entry"],
+                    sentiment_score, day["snippet_count"],
+                )
+                return True
+            except Exception as e:
+                print(f"  {day['date']} {day['user_id']}: {str(e)}")
+                return False
+
+    written = await asyncio.gather(*(write(day, score) for day, score in zip(generated, scores)))
+    return sum(written)
+
+async def run(args) -> None:
+    to_date = datetime.strptime(args.to_date, "%Y-%m-%d").date() if args.to_date else date.today() - timedelta(days=1)
+    from_date = datetime.strptime(args.from_date, "%Y-%m-%d").date() if args.from_date else to_date - timedelta(days=args.days - 1)
+    gemini_quota.max_wait_seconds = args.max_quota_wait
+    # The API's per-worker cap on Gemini calls in flight would otherwise also cap this process
+    ai_service.gemini_semaphore = asyncio.Semaphore(args.concurrency)
+
+    repository = get_repository()
+    ai_service.load_caches()
+    await repository.open()
+    await sentiment_service.get_backend().open()
+    try:
+        checkpoint = load_checkpoint(args.checkpoint, from_date, to_date)
+        print(f"Summarizing stale days from {from_date} to {to_date}...")
+        started, summarized = time.perf_counter(), 0
+        while True:
+            after = tuple(checkpoint["after"]) if checkpoint["after"] else None
+            days = await repository.list_stale_days(from_date.isoformat(), to_date.isoformat(), after, args.page_size)
+            if not days:
+                break
+            checkpoint["after"] = [days[-1]["date"], days[-1]["user_id"]]
+            if args.dry_run:
+                for day in days:
+                    print(f"  {day['date']} {day['user_id']}: {day['snippet_count']} snippets")
+                continue
+
+            written = await summarize_page(days, args.concurrency)
+            summarized += written
+            checkpoint["summarized"] += written
+            checkpoint["failed"] += len(days) - written
+            save_checkpoint(args.checkpoint, checkpoint)
+            print(f"  up to {days[-1]['date']}: {checkpoint['summarized']} summarized, {checkpoint['failed']} failed "
+                  f"({summarized / (time.perf_counter() - started):.1f} days/s)")
+
+        if not args.dry_run:
+            print(f"Done: {checkpoint['summarized']} summarized, {checkpoint['failed']} failed")
+            remove_checkpoint(args.checkpoint)
+    finally:
+        await sentiment_service.get_backend().close()
+        await repository.close()
+        ai_service.save_caches()
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate journals for days with snippets but no up-to-date journal")
+    parser.add_argument("--from-date", type=str, help="First day to summarize in YYYY-MM-DD format (default: --days before --to-date)")
+    parser.add_argument("--to-date", type=str, help="Last day to summarize in YYYY-MM-DD format (default: yesterday)")
+    parser.add_argument("--days", type=int, default=7, help="Days to look back when --from-date is not given (default: 7)")
+    parser.add_argument("--concurrency", type=int, default=GEMINI_MAX_CONCURRENT_REQUESTS,
+                        help=f"Days summarized, and Gemini calls in flight, at once in this process "
+                             f"(default: GEMINI_MAX_CONCURRENT_REQUESTS, {GEMINI_MAX_CONCURRENT_REQUESTS})")
+    parser.add_argument("--page-size", type=int, default=100, help="Stale days fetched, scored and checkpointed together (default: 100)")
+    parser.add_argument("--max-quota-wait", type=float, default=300,
+                        help="Seconds a day may wait for room in the global Gemini quota before it is left for the next run (default: 300)")
+    parser.add_argument("--checkpoint", default="summarize_checkpoint.json", help="Progress file for resuming (default: summarize_checkpoint.json)")
+    parser.add_argument("--dry-run", action="store_true", help="Only list the stale days")
+    args = parser.parse_args()
+
+    if args.days < 1 or args.concurrency < 1 or args.page_size < 1:
+        parser.error("--days, --concurrency and --page-size must be at least 1")
+
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+"""
+Shared setup for the backend tests.
+
+Importing this module puts the backend directory on the Python path. Tests run
+against a throwaway SQLite database and never talk to Supabase, Gemini or
+HuggingFace.
+"""
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# config requires these; with the SQLite repository below they are never used
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:54321")
+os.environ.setdefault("SUPABASE_SERVICE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.test")
+os.environ.setdefault("GEMINI_API_KEY", "test-gemini-key")
+
+from services import repository as repository_module
+from services.sqlite_repository import SqliteRepository
+
+@pytest.fixture
+def sqlite_repository(tmp_path, monkeypatch):
+    """A SqliteRepository on a fresh file, returned by get_repository() for the test."""
+    repository = SqliteRepository(str(tmp_path / "journal.db"))
+    monkeypatch.setattr(repository_module, "_repository", repository)
+    return repository
@@ -0,0 +1,32 @@
+import asyncio
+
+import pytest
+
+from services.rate_limit_service import GeminiQuota, GeminiQuotaExceeded
+
+class CountingQuota(GeminiQuota):
+    def __init__(self):
+        super().__init__("1/second", "memory://", max_wait_seconds=3)
+        self.charged = 0
+
+    async def _hit(self) -> bool:
+        hit = await super()._hit()
+        self.charged += hit
+        return hit
+
+async def queue_behind_a_full_budget():
+    quota = CountingQuota()
+    await quota.acquire("first")
+    impatient = asyncio.create_task(quota.acquire("impatient", max_wait_seconds=0.05))
+    patient = asyncio.create_task(quota.acquire("patient"))
+    with pytest.raises(GeminiQuotaExceeded):
+        await impatient
+    await patient
+    await quota._dispatcher
+    return quota
+
+def test_only_callers_still_waiting_are_charged():
+    quota = asyncio.run(queue_behind_a_full_budget())
+
+    assert quota.charged == 2
+    assert quota.stats()["granted"] == 2 and quota.stats()["rejected"] == 1
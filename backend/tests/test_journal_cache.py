@@ -0,0 +1,38 @@
+import uuid
+
+from services.journal_cache_service import JournalReadCache
+
+def test_read_racing_a_write_is_not_served_after_it():
+    cache = JournalReadCache(max_entries=16, ttl_seconds=300)
+    user_id = uuid.uuid4()
+
+    # A read takes its key, then a write lands before the read's rows are cached
+    key = cache.key(user_id, "journal|2024-05-01")
+    cache.invalidate(user_id)
+    cache.set(key, b'{"entry": "before the write"}')
+
+    assert cache.get(cache.key(user_id, "journal|2024-05-01")) is None
+
+def test_read_after_write_is_served():
+    cache = JournalReadCache(max_entries=16, ttl_seconds=300)
+    user_id = uuid.uuid4()
+    cache.invalidate(user_id)
+
+    key = cache.key(user_id, "journal|2024-05-01")
+    body, etag, _ = cache.set(key, b'{"entry": "after the write"}')
+
+    assert cache.get(cache.key(user_id, "journal|2024-05-01")) == (body, etag, {})
+
+def test_generations_are_bounded_without_reviving_old_entries():
+    cache = JournalReadCache(max_entries=4, ttl_seconds=300)
+    first_user = uuid.uuid4()
+    cache.set(cache.key(first_user, "journal|2024-05-01"), b'{"entry": "old"}')
+    cache.invalidate(first_user)
+
+    for _ in range(100):
+        user_id = uuid.uuid4()
+        cache.invalidate(user_id)
+        cache.key(user_id, "journal|2024-05-01")
+
+    assert len(cache._generations) <= 4
+    assert cache.get(cache.key(first_user, "journal|2024-05-01")) is None
@@ -0,0 +1,46 @@
+import asyncio
+import uuid
+from datetime import date
+
+from services import journals_service
+
+WRITERS = 20
+DAY = date(2024, 5, 1)
+
+async def with_open(repository, coroutine):
+    await repository.open()
+    try:
+        return await coroutine
+    finally:
+        await repository.close()
+
+def test_concurrent_writes_for_one_day_leave_one_journal(sqlite_repository):
+    user_id = uuid.uuid4()
+
+    async def write_concurrently():
+        journals = await asyncio.gather(*[
+            journals_service.create_or_update_journal(user_id, DAY, f"Concurrent write {i}", i / 100)
+            for i in range(WRITERS)
+        ])
+        rows = await sqlite_repository.list_journals(str(user_id), ["id", "date", "entry"])
+        return journals, rows
+
+    journals, rows = asyncio.run(with_open(sqlite_repository, write_concurrently()))
+
+    assert len(rows) == 1
+    assert rows[0]["date"] == DAY.isoformat()
+    # Every writer got the same row back, holding one of the written entries
+    assert {journal["id"] for journal in journals} == {rows[0]["id"]}
+    assert rows[0]["entry"] in {f"Concurrent write {i}" for i in range(WRITERS)}
+
+def test_write_without_score_keeps_existing_score(sqlite_repository):
+    user_id = uuid.uuid4()
+
+    async def write_twice():
+        await journals_service.create_or_update_journal(user_id, DAY, "First draft", 0.5, snippet_count=3)
+        await journals_service.create_or_update_journal(user_id, DAY, "Edited by hand")
+        return await sqlite_repository.list_journals(str(user_id), ["entry", "sentiment_score", "snippet_count"])
+
+    rows = asyncio.run(with_open(sqlite_repository, write_twice()))
+
+    assert rows == [{"entry": "Edited by hand", "sentiment_score": 0.5, "snippet_count": 3}]
@@ -0,0 +1,34 @@
+import asyncio
+
+from services.lexicon_sentiment import LEXICON, LexiconSentimentBackend
+from services.sentiment_service import HuggingFaceSentimentBackend
+
+class FakeHuggingFaceBackend(HuggingFaceSentimentBackend):
+    def __init__(self, response):
+        super().__init__(headers={})
+        self.response = response
+
+    async def _post(self, inputs):
+        return self.response
+
+def test_length_mismatch_marks_every_text_failed():
+    backend = FakeHuggingFaceBackend([[{"label": "POSITIVE", "score": 0.9}]])
+
+    results = asyncio.run(backend.analyze_batch(["good day", "bad day"]))
+
+    assert all("error" in raw for _, raw in results)
+
+def test_malformed_labels_mark_only_that_text_failed():
+    backend = FakeHuggingFaceBackend([[{"label": "POSITIVE", "score": 0.9}], [{"score": 0.8}]])
+
+    (score, raw), (_, failed) = asyncio.run(backend.analyze_batch(["good day", "bad day"]))
+
+    assert score == 0.9 and "error" not in raw
+    assert "error" in failed
+
+def test_version_names_the_model():
+    assert HuggingFaceSentimentBackend("https://example.test/a", headers={}).version != HuggingFaceSentimentBackend("https://example.test/b", headers={}).version
+
+def test_lexicon_version_changes_with_the_lexicon():
+    assert LexiconSentimentBackend().version == LexiconSentimentBackend().version
+    assert LexiconSentimentBackend().version != LexiconSentimentBackend({**LEXICON, "good": 1.0}).version
@@ -0,0 +1,37 @@
+import asyncio
+import uuid
+from datetime import date
+
+from services import embedding_service, journals_service
+
+ENTRIES = {
+    date(2024, 5, 1): "Long run along the river before work, legs tired but happy.",
+    date(2024, 5, 2): "Another run by the river this morning, faster than yesterday.",
+    date(2024, 5, 3): "Short run before work, then a long day at the office.",
+    date(2024, 5, 4): "Walked along the river after work with a friend.",
+}
+
+async def write_and_find_similar(user_id: uuid.UUID):
+    for journal_date, entry in ENTRIES.items():
+        await journals_service.create_or_update_journal(user_id, journal_date, entry, 0.5)
+    return await journals_service.get_similar_days(user_id, date(2024, 5, 1), limit=3)
+
+def test_similar_days_returns_every_match_with_its_journal(sqlite_repository):
+    similar = asyncio.run(write_and_find_similar(uuid.uuid4()))
+
+    assert {day["date"] for day in similar} == {"2024-05-02", "2024-05-03", "2024-05-04"}
+    for day in similar:
+        assert day["entry"] == ENTRIES[date.fromisoformat(day["date"])]
+        assert day["sentiment_score"] == 0.5
+
+def test_index_generations_stay_bounded(monkeypatch):
+    generations = embedding_service.CacheGenerations("embedding_index_generations", 4)
+    monkeypatch.setattr(embedding_service, "_generations", generations)
+
+    for _ in range(100):
+        user_id = uuid.uuid4()
+        embedding_service._index_key(user_id)
+        embedding_service.invalidate(user_id)
+        embedding_service._index_key(user_id)
+
+    assert len(generations) <= 4
@@ -0,0 +1,45 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import main
+from models import SnippetBatch
+
+DAYS = 8
+
+class FakeSummaryQueue:
+    def __init__(self):
+        self.days = []
+
+    def enqueue(self, user_id, journal_date):
+        self.days.append(journal_date)
+        return {"user_id": str(user_id), "date": journal_date}
+
+def test_batch_summaries_are_charged_per_day_to_the_user_budget(sqlite_repository, monkeypatch):
+    queue = FakeSummaryQueue()
+    monkeypatch.setattr(main, "summary_queue", queue)
+    main.limiter.reset()
+    user_id = uuid.uuid4()
+    start = datetime(2024, 5, 1, 12, tzinfo=timezone.utc)
+    batch = SnippetBatch(user_id=user_id, snippets=[
+        {"entry": f"Day {i}", "created_at": start + timedelta(days=i), "idempotency_key": f"key-{i}"}
+        for i in range(DAYS)
+    ])
+
+    async def post():
+        await sqlite_repository.open()
+        try:
+            return await main.create_snippets_batch(batch)
+        finally:
+            await sqlite_repository.close()
+
+    response = asyncio.run(post())
+
+    budget = main.summary_rate_limit.amount
+    days = [(start + timedelta(days=i)).date() for i in range(DAYS)]
+    assert len(response["created"]) == DAYS
+    # The newest days are summarized now, the rest wait for summarize_stale_days.py
+    assert sorted(queue.days) == days[DAYS - budget:]
+    assert response["deferred_days"] == days[:DAYS - budget]
+    # /snippets/with-summary draws from the same, now empty, budget
+    assert main.take_summary_slots(user_id, 1) == 0
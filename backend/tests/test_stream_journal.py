@@ -0,0 +1,37 @@
+import asyncio
+
+from services import ai_service
+from services.rate_limit_service import GeminiQuota
+
+PIECES = ["A quiet ", "day at ", "home."]
+
+class Chunk:
+    def __init__(self, text):
+        self.text = text
+
+class FakeStreamingModel:
+    async def generate_content_async(self, prompt, stream=False):
+        async def chunks():
+            for piece in PIECES:
+                yield Chunk(piece)
+        return chunks()
+
+async def read_first_piece_then_stall():
+    pieces = ai_service.stream_journal([{"id": 1, "entry": "Stayed in and read."}])
+    first = await anext(pieces)
+    # The client stalls; Gemini has finished in the meantime
+    await asyncio.sleep(0.05)
+    free_slots = ai_service.gemini_semaphore._value
+    rest = [piece async for piece in pieces]
+    return first, rest, free_slots
+
+def test_slow_client_does_not_hold_a_gemini_slot(monkeypatch):
+    monkeypatch.setattr(ai_service, "model", FakeStreamingModel())
+    monkeypatch.setattr(ai_service, "gemini_semaphore", asyncio.Semaphore(1))
+    monkeypatch.setattr(ai_service, "gemini_quota", GeminiQuota("100/second", "memory://"))
+    ai_service.summary_cache.clear()
+
+    first, rest, free_slots = asyncio.run(read_first_piece_then_stall())
+
+    assert free_slots == 1
+    assert [first, *rest] == PIECES
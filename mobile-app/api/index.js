@@ -2,10 +2,12 @@ import apiClient from './client';
 import * as authApi from './auth';
 import * as journalsApi from './journals';
 import * as snippetsApi from './snippets';
+import * as searchApi from './search';
 
 export {
   apiClient,
   authApi,
   journalsApi,
-  snippetsApi
+  snippetsApi,
+  searchApi
 }; 
\ No newline at end of file
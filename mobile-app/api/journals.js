@@ -3,11 +3,12 @@ import apiClient from './client';
 /**
  * Get all journal entries for a user
  * @param {string} userId - The user's UUID
+ * @param {Object} [params] - Optional query params: limit, cursor, fields, view ('full' or 'summary')
  * @returns {Promise} - Promise containing the journals data
  */
-export const getJournals = async (userId) => {
+export const getJournals = async (userId, params = {}) => {
   try {
-    const response = await apiClient.get(`/journals/${userId}`);
+    const response = await apiClient.get(`/journals/${userId}`, { params });
     return response.data;
   } catch (error) {
     console.error('Error fetching journals:', error);
@@ -53,4 +54,44 @@ export const createOrUpdateJournal = async (userId, date, entry) => {
     console.error('Error creating/updating journal:', error);
     throw error;
   }
-}; 
\ No newline at end of file
+}; 
+
+/**
+ * Get mood statistics (mean, min, max and count of sentiment scores) per bucket
+ * @param {string} userId - The user's UUID
+ * @param {string} granularity - 'day', 'week' or 'month'
+ * @param {string} [from] - First date to include in ISO format (YYYY-MM-DD)
+ * @param {string} [to] - Last date to include in ISO format (YYYY-MM-DD)
+ * @returns {Promise} - Promise containing the mood buckets, oldest first
+ */
+export const getMoodRollups = async (userId, granularity = 'day', from, to) => {
+  try {
+    const response = await apiClient.get(`/dashboard/${userId}/mood`, {
+      params: { granularity, from, to }
+    });
+    return response.data;
+  } catch (error) {
+    console.error('Error fetching mood rollups:', error);
+    throw error;
+  }
+};
+
+/**
+ * Get the days whose journals are most similar to the journal of a given date
+ * @param {string} userId - The user's UUID
+ * @param {string} date - The date in ISO format (YYYY-MM-DD)
+ * @param {number} [limit] - Number of similar days to return (default 5)
+ * @returns {Promise} - Promise containing { date, similarity, entry, sentiment_score } items, most similar first, or null if the date has no journal
+ */
+export const getSimilarDays = async (userId, date, limit = 5) => {
+  try {
+    const response = await apiClient.get(`/journals/${userId}/${date}/similar`, { params: { limit } });
+    return response.data;
+  } catch (error) {
+    if (error.response && error.response.status === 404) {
+      return null; // No journal for this date
+    }
+    console.error('Error fetching similar days:', error);
+    throw error;
+  }
+};
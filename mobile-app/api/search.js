@@ -0,0 +1,18 @@
+import apiClient from './client';
+
+/**
+ * Search a user's journals and snippets, best match first
+ * @param {string} userId - The user's UUID
+ * @param {string} query - Words or phrases to find
+ * @param {Object} [params] - Optional query params: limit, cursor (from the previous page's nextCursor)
+ * @returns {Promise} - Promise containing { results, nextCursor }; each result's highlight marks matches with <mark> tags
+ */
+export const searchEntries = async (userId, query, params = {}) => {
+  try {
+    const response = await apiClient.get(`/search/${userId}`, { params: { q: query, ...params } });
+    return { results: response.data, nextCursor: response.headers['x-next-cursor'] || null };
+  } catch (error) {
+    console.error('Error searching entries:', error);
+    throw error;
+  }
+};
@@ -1,4 +1,5 @@
 import apiClient from './client';
+import { API_URL } from '../config';
 
 /**
  * Get all snippets for a user
@@ -19,20 +20,16 @@ export const getSnippets = async (userId) => {
  * Get snippets for a specific date
  * @param {string} userId - The user's UUID
  * @param {string} date - The date in ISO format (YYYY-MM-DD)
- * @returns {Promise} - Promise containing the filtered snippets data
+ * @returns {Promise} - Promise containing the day's snippets, oldest first
  */
 export const getSnippetsByDate = async (userId, date) => {
   try {
-    const response = await apiClient.get(`/snippets/${userId}`);
-    
-    const filteredSnippets = response.data
-      .filter(s => {
-        const snippetDate = new Date(s.created_at).toISOString().split('T')[0];
-        return snippetDate === date;
-      })
-      .sort((a, b) => new Date(a.created_at) - new Date(b.created_at));
+    // Journals are dated by UTC day, so snippets are grouped by UTC day as well
+    const response = await apiClient.get(`/snippets/${userId}`, {
+      params: { from: date, to: date, tz: 'UTC' }
+    });
     
-    return filteredSnippets;
+    return response.data.sort((a, b) => new Date(a.created_at) - new Date(b.created_at));
   } catch (error) {
     console.error('Error fetching snippets by date:', error);
     throw error;
@@ -58,8 +55,49 @@ export const createSnippet = async (userId, entry) => {
   }
 };
 
+/**
+ * Create many snippets in one request, e.g. when syncing entries written offline
+ * @param {string} userId - The user's UUID
+ * @param {Array<{entry: string, created_at: string, idempotency_key: string}>} snippets - Snippets with their original timestamps and a unique key each
+ * @returns {Promise} - Promise containing the created snippets, the number of duplicates skipped, the summary jobs and
+ *   the deferred_days over the user's summary limit (their journals are generated later by the server)
+ */
+export const createSnippetsBatch = async (userId, snippets) => {
+  try {
+    const response = await apiClient.post('/snippets/batch', {
+      user_id: userId,
+      snippets
+    });
+    return response.data;
+  } catch (error) {
+    console.error('Error creating snippet batch:', error);
+    throw error;
+  }
+};
+
+const SUMMARY_POLL_INTERVAL_MS = 1000;
+const SUMMARY_POLL_TIMEOUT_MS = 60000;
+
+/**
+ * Get the status of a background summary job
+ * @param {string} jobId - The job's UUID
+ * @returns {Promise} - Promise containing the job status
+ */
+export const getSummaryJob = async (jobId) => {
+  try {
+    const response = await apiClient.get(`/summaries/jobs/${jobId}`);
+    return response.data;
+  } catch (error) {
+    console.error('Error fetching summary job:', error);
+    throw error;
+  }
+};
+
 /**
  * Create a new snippet and generate journal summary
+ *
+ * The backend queues the summary and returns a job straight away; this polls the
+ * job until the journal has been regenerated.
  * @param {string} userId - The user's UUID
  * @param {string} entry - The snippet text
  * @returns {Promise} - Promise containing the generated journal entry
@@ -70,9 +108,83 @@ export const createSnippetWithSummary = async (userId, entry) => {
       entry,
       user_id: userId
     });
-    return response.data;
+
+    let job = response.data;
+    const deadline = Date.now() + SUMMARY_POLL_TIMEOUT_MS;
+    while (job.status === 'pending' || job.status === 'running') {
+      if (Date.now() > deadline) {
+        throw new Error('Timed out waiting for journal summary');
+      }
+      await new Promise(resolve => setTimeout(resolve, SUMMARY_POLL_INTERVAL_MS));
+      job = await getSummaryJob(job.job_id);
+    }
+
+    if (job.status === 'failed') {
+      throw new Error(job.error || 'Journal summary failed');
+    }
+    return job.journal;
   } catch (error) {
     console.error('Error creating snippet with summary:', error);
     throw error;
   }
-}; 
\ No newline at end of file
+}; 
+
+/**
+ * Create a new snippet and stream the regenerated journal as it is written
+ *
+ * Uses XMLHttpRequest, whose progress events expose the partial response body in
+ * React Native, to read the server-sent events from /snippets/with-summary/stream.
+ * @param {string} userId - The user's UUID
+ * @param {string} entry - The snippet text
+ * @param {function(string): void} onText - Called with the journal text received so far
+ * @returns {Promise} - Promise containing the saved journal entry
+ */
+export const streamSnippetWithSummary = (userId, entry, onText) => new Promise((resolve, reject) => {
+  const xhr = new XMLHttpRequest();
+  let parsed = 0;
+  let text = '';
+  let journal = null;
+  let error = null;
+
+  const parseEvents = () => {
+    // Events are separated by a blank line; leave an incomplete trailing event for later
+    const end = xhr.responseText.lastIndexOf('\n\n');
+    if (end < parsed) {
+      return;
+    }
+    const events = xhr.responseText.slice(parsed, end).split('\n\n');
+    parsed = end + 2;
+    for (const block of events) {
+      const event = block.match(/^event: (.*)$/m)?.[1];
+      const data = block.match(/^data: (.*)$/m)?.[1];
+      if (!event || data === undefined) {
+        continue;
+      }
+      if (event === 'delta') {
+        text += JSON.parse(data).text;
+        onText(text);
+      } else if (event === 'journal') {
+        journal = JSON.parse(data);
+      } else if (event === 'error') {
+        error = JSON.parse(data);
+      }
+    }
+  };
+
+  xhr.open('POST', `${API_URL}/snippets/with-summary/stream`);
+  xhr.setRequestHeader('Content-Type', 'application/json');
+  xhr.setRequestHeader('Accept', 'text/event-stream');
+  xhr.onprogress = parseEvents;
+  xhr.onload = () => {
+    parseEvents();
+    if (xhr.status !== 200) {
+      reject(new Error(`Journal stream failed with status ${xhr.status}`));
+    } else if (error || !journal) {
+      reject(new Error(error?.detail || 'Journal stream ended early'));
+    } else {
+      resolve(journal);
+    }
+  };
+  xhr.onerror = () => reject(new Error('Network error while streaming journal'));
+  xhr.send(JSON.stringify({ entry, user_id: userId }));
+});
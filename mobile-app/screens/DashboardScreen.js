@@ -34,7 +34,8 @@ export default function DashboardScreen({ navigation }) {
     
     try {
       setIsLoading(true);
-      const journals = await JournalService.getAllJournals(user.id);
+      // The dashboard only needs dates and mood scores, not the entry text
+      const journals = await JournalService.getAllJournals(user.id, { view: 'summary' });
       setEntries(journals);
     } catch (error) {
       console.error('Error fetching journal entries:', error);
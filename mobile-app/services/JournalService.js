@@ -7,11 +7,12 @@ class JournalService {
   /**
    * Get all journal entries for a user
    * @param {string} userId - The user's UUID
+   * @param {Object} [params] - Optional query params, e.g. { view: 'summary' } to leave out entry text
    * @returns {Promise<Array>} - All journal entries
    */
-  async getAllJournals(userId) {
+  async getAllJournals(userId, params = {}) {
     try {
-      const journals = await journalsApi.getJournals(userId);
+      const journals = await journalsApi.getJournals(userId, params);
       return this.formatJournals(journals);
     } catch (error) {
       console.error('JournalService.getAllJournals error:', error);
@@ -0,0 +1,11 @@
+-- Composite indexes for per-user date range queries and keyset pagination.
+--
+-- GET /snippets/{user_id}?from=&to= filters on (user_id, created_at) and
+-- GET /journals/{user_id}?from=&to= filters on (user_id, date); both order by the
+-- date column and then id, so a calendar month (or one page) is a single index range scan.
+
+create index if not exists snippets_user_id_created_at_idx
+    on public.snippets (user_id, created_at desc, id desc);
+
+create index if not exists journals_user_id_date_idx
+    on public.journals (user_id, date desc, id desc);
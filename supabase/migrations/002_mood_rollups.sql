@@ -0,0 +1,96 @@
+-- Per-user mood rollups for the dashboard.
+--
+-- mood_rollups keeps count, sum, min and max of journals.sentiment_score per day,
+-- ISO week (starting Monday) and calendar month. A trigger on journals recomputes
+-- only the three buckets that contain the written date, so every insert/update of a
+-- journal (create_or_update_journal, the summary jobs, sample data) touches at most
+-- one month of rows, and dashboard reads are O(buckets) instead of O(entries).
+--
+-- Users can only read their rollups, so the trigger functions run as their owner
+-- (security definer) to write them when a user writes a journal through the API.
+
+create table if not exists public.mood_rollups (
+    user_id uuid not null,
+    granularity text not null check (granularity in ('day', 'week', 'month')),
+    bucket_start date not null,
+    entry_count integer not null,
+    score_sum double precision not null,
+    score_min double precision not null,
+    score_max double precision not null,
+    primary key (user_id, granularity, bucket_start)
+);
+
+alter table public.mood_rollups enable row level security;
+
+drop policy if exists "Users can view their own mood rollups" on public.mood_rollups;
+create policy "Users can view their own mood rollups"
+    on public.mood_rollups for select
+    using (auth.uid() = user_id);
+
+create or replace function public.refresh_mood_rollups(p_user_id uuid, p_date date)
+returns void
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    bucket text;
+    bucket_from date;
+    bucket_to date;
+begin
+    foreach bucket in array array['day', 'week', 'month'] loop
+        bucket_from := date_trunc(bucket, p_date)::date;
+        bucket_to := (date_trunc(bucket, p_date) + ('1 ' || bucket)::interval)::date;
+
+        insert into public.mood_rollups (user_id, granularity, bucket_start, entry_count, score_sum, score_min, score_max)
+        select p_user_id, bucket, bucket_from, count(*), sum(sentiment_score), min(sentiment_score), max(sentiment_score)
+        from public.journals
+        where user_id = p_user_id
+          and date >= bucket_from
+          and date < bucket_to
+          and sentiment_score is not null
+        having count(*) > 0
+        on conflict (user_id, granularity, bucket_start) do update
+            set entry_count = excluded.entry_count,
+                score_sum = excluded.score_sum,
+                score_min = excluded.score_min,
+                score_max = excluded.score_max;
+
+        -- No scored journals left in the bucket
+        if not found then
+            delete from public.mood_rollups
+            where user_id = p_user_id and granularity = bucket and bucket_start = bucket_from;
+        end if;
+    end loop;
+end;
+$$;
+
+create or replace function public.journals_refresh_mood_rollups()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    if tg_op in ('UPDATE', 'DELETE') then
+        perform public.refresh_mood_rollups(old.user_id, old.date);
+    end if;
+    if tg_op in ('INSERT', 'UPDATE') then
+        perform public.refresh_mood_rollups(new.user_id, new.date);
+    end if;
+    return null;
+end;
+$$;
+
+-- Rebuilds any user's buckets, so only the trigger and the service role may call it
+revoke execute on function public.refresh_mood_rollups(uuid, date) from public, anon, authenticated;
+grant execute on function public.refresh_mood_rollups(uuid, date) to service_role;
+
+drop trigger if exists journals_refresh_mood_rollups on public.journals;
+create trigger journals_refresh_mood_rollups
+    after insert or delete or update of sentiment_score, date, user_id on public.journals
+    for each row execute function public.journals_refresh_mood_rollups();
+
+-- Build rollups for journals written before this migration
+select public.refresh_mood_rollups(user_id, date)
+from (select distinct user_id, date from public.journals) existing;
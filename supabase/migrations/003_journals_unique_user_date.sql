@@ -0,0 +1,18 @@
+-- One journal per user and day.
+--
+-- create_or_update_journal writes with a single INSERT ... ON CONFLICT (user_id, date)
+-- DO UPDATE, which needs this constraint and also stops concurrent summaries for the
+-- same day from creating duplicate rows.
+
+-- Remove duplicates left by the old select-then-insert write path, keeping one row per day
+delete from public.journals j
+using public.journals keep
+where j.user_id = keep.user_id
+  and j.date = keep.date
+  and j.id < keep.id;
+
+alter table public.journals
+    drop constraint if exists journals_user_id_date_key;
+
+alter table public.journals
+    add constraint journals_user_id_date_key unique (user_id, date);
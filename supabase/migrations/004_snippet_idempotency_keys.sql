@@ -0,0 +1,14 @@
+-- Idempotency keys for batch snippet ingestion.
+--
+-- POST /snippets/batch inserts with ON CONFLICT (user_id, idempotency_key) DO NOTHING,
+-- so a client that retries an offline sync does not create duplicate snippets.
+-- Snippets created one at a time have a NULL key, and NULLs never conflict.
+
+alter table public.snippets
+    add column if not exists idempotency_key text;
+
+alter table public.snippets
+    drop constraint if exists snippets_user_id_idempotency_key_key;
+
+alter table public.snippets
+    add constraint snippets_user_id_idempotency_key_key unique (user_id, idempotency_key);
@@ -0,0 +1,48 @@
+-- Stale journal detection for the batch summarizer (backend/summarize_stale_days.py).
+--
+-- journals.snippet_count is the number of snippets an entry was generated from. A day
+-- is stale when it has snippets and either no journal or a journal generated from a
+-- different number of snippets (snippets were added later, e.g. by an offline sync).
+-- The concatenation fallback stores 0 so the day is summarized again. Journals
+-- written directly through POST /journals, and those written before this migration,
+-- have a NULL count and are never overwritten.
+
+alter table public.journals
+    add column if not exists snippet_count integer;
+
+-- The batch scans snippets by creation time across all users
+create index if not exists snippets_created_at_idx
+    on public.snippets (created_at);
+
+-- Stale (user, day) pairs with snippets created in [p_from, p_to] (UTC days), in
+-- (date, user_id) order, after the keyset (p_after_date, p_after_user)
+create or replace function public.stale_journal_days(
+    p_from date,
+    p_to date,
+    p_after_date date default null,
+    p_after_user uuid default null,
+    p_limit integer default 100
+)
+returns table (user_id uuid, date date, snippet_count integer)
+language sql
+stable
+as $$
+    with days as (
+        select s.user_id, (s.created_at at time zone 'utc')::date as date, count(*)::integer as snippet_count
+        from public.snippets s
+        where s.created_at >= p_from::timestamp at time zone 'utc'
+          and s.created_at < (p_to + 1)::timestamp at time zone 'utc'
+        group by 1, 2
+    )
+    select d.user_id, d.date, d.snippet_count
+    from days d
+    left join public.journals j on j.user_id = d.user_id and j.date = d.date
+    where (j.id is null or j.snippet_count <> d.snippet_count)
+      and (p_after_date is null or (d.date, d.user_id) > (p_after_date, p_after_user))
+    order by d.date, d.user_id
+    limit p_limit;
+$$;
+
+-- Lists every user's activity, so only the service role may call it
+revoke execute on function public.stale_journal_days(date, date, date, uuid, integer) from public, anon, authenticated;
+grant execute on function public.stale_journal_days(date, date, date, uuid, integer) to service_role;
@@ -0,0 +1,29 @@
+-- Bulk sentiment updates for the re-scoring backfill (backend/rescore_sentiment.py).
+--
+-- Sets many journals' sentiment_score in one statement. A journal is only updated
+-- while its entry is still the text that was scored, so an entry rewritten during
+-- the backfill keeps the score written with it. The mood_rollups trigger from
+-- 002_mood_rollups.sql refreshes the affected buckets as usual.
+
+create or replace function public.update_sentiment_scores(
+    p_ids uuid[],
+    p_entries text[],
+    p_scores double precision[]
+)
+returns integer
+language sql
+as $$
+    with updated as (
+        update public.journals j
+        set sentiment_score = v.sentiment_score
+        from unnest(p_ids, p_entries, p_scores) as v(id, entry, sentiment_score)
+        where j.id = v.id
+          and j.entry = v.entry
+        returning 1
+    )
+    select count(*)::integer from updated;
+$$;
+
+-- Writes any user's journals, so only the service role may call it
+revoke execute on function public.update_sentiment_scores(uuid[], text[], double precision[]) from public, anon, authenticated;
+grant execute on function public.update_sentiment_scores(uuid[], text[], double precision[]) to service_role;
@@ -0,0 +1,62 @@
+-- Full-text search over journal and snippet entries (GET /search/{user_id}).
+--
+-- The tsvectors are indexed as expressions rather than stored in generated
+-- columns, so they stay out of the rows the backend reads with select * and
+-- returning *. btree_gin lets one GIN index cover both the user_id filter and
+-- the text match, so a search only visits the postings of that user's entries.
+
+create extension if not exists btree_gin;
+
+create index if not exists journals_search_idx
+    on public.journals using gin (user_id, to_tsvector('english', entry));
+
+create index if not exists snippets_search_idx
+    on public.snippets using gin (user_id, to_tsvector('english', entry));
+
+-- A user's journals and snippets matching p_query (websearch syntax: words, "quoted
+-- phrases", or, -excluded), best match first, after the keyset (p_after_rank,
+-- p_after_id). Headlines are only built for the returned page.
+create or replace function public.search_entries(
+    p_user_id uuid,
+    p_query text,
+    p_after_rank double precision default null,
+    p_after_id uuid default null,
+    p_limit integer default 20
+)
+returns table (kind text, id uuid, date date, created_at timestamptz, rank double precision, highlight text)
+language sql
+stable
+as $$
+    with query as (
+        select websearch_to_tsquery('english', p_query) as q
+    ),
+    matches as (
+        select 'journal' as kind, j.id, j.date, null::timestamptz as created_at,
+               ts_rank_cd(to_tsvector('english', j.entry), query.q)::float8 as rank, j.entry
+        from public.journals j, query
+        where j.user_id = p_user_id
+          and to_tsvector('english', j.entry) @@ query.q
+        union all
+        select 'snippet', s.id, (s.created_at at time zone 'utc')::date, s.created_at,
+               ts_rank_cd(to_tsvector('english', s.entry), query.q)::float8, s.entry
+        from public.snippets s, query
+        where s.user_id = p_user_id
+          and to_tsvector('english', s.entry) @@ query.q
+    ),
+    page as (
+        select *
+        from matches
+        where p_after_rank is null or (rank, id) < (p_after_rank, p_after_id)
+        order by rank desc, id desc
+        limit p_limit
+    )
+    select page.kind, page.id, page.date, page.created_at, page.rank,
+           ts_headline('english', page.entry, query.q,
+                       'StartSel=<mark>, StopSel=</mark>, MaxWords=24, MinWords=8, MaxFragments=2, FragmentDelimiter=" … "')
+    from page, query
+    order by page.rank desc, page.id desc;
+$$;
+
+-- Searches any user's entries, so only the service role may call it
+revoke execute on function public.search_entries(uuid, text, double precision, uuid, integer) from public, anon, authenticated;
+grant execute on function public.search_entries(uuid, text, double precision, uuid, integer) to service_role;
@@ -0,0 +1,23 @@
+-- Journal embeddings for "similar days" (GET /journals/{user_id}/{date}/similar).
+--
+-- One vector per journal, packed as little-endian float32 (EMBEDDING_DIMENSIONS * 4
+-- bytes), written by create_or_update_journal and backend/backfill_embeddings.py.
+-- The vectors live in their own table so the journal rows the backend reads stay
+-- small. model names the embedding method; vectors from another model are ignored.
+
+create table if not exists public.journal_embeddings (
+    user_id uuid not null,
+    date date not null,
+    model text not null,
+    embedding bytea not null,
+    primary key (user_id, date),
+    foreign key (user_id, date) references public.journals (user_id, date)
+        on update cascade on delete cascade
+);
+
+alter table public.journal_embeddings enable row level security;
+
+drop policy if exists "Users can view their own journal embeddings" on public.journal_embeddings;
+create policy "Users can view their own journal embeddings"
+    on public.journal_embeddings for select
+    using (auth.uid() = user_id);
@@ -4,16 +4,35 @@ CREATE TABLE journals (
     user_id UUID NOT NULL REFERENCES auth.users ON DELETE CASCADE,
     entry TEXT NOT NULL,
     sentiment_score DOUBLE PRECISION,
-    date DATE NOT NULL
+    date DATE NOT NULL,
+    -- Snippets the entry was generated from (0 for the concatenation fallback, NULL when
+    -- written directly); summarize_stale_days.py regenerates days where it is out of date
+    snippet_count INTEGER,
+    -- One journal per user and day; journal writes upsert on it
+    CONSTRAINT journals_user_id_date_key UNIQUE (user_id, date)
 );
 
 CREATE TABLE snippets (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
     user_id UUID NOT NULL REFERENCES auth.users ON DELETE CASCADE,
     entry TEXT NOT NULL,
-    created_at TIMESTAMPTZ DEFAULT now()
+    created_at TIMESTAMPTZ DEFAULT now(),
+    -- Set by POST /snippets/batch so retried syncs skip snippets already saved; NULLs never conflict
+    idempotency_key TEXT,
+    CONSTRAINT snippets_user_id_idempotency_key_key UNIQUE (user_id, idempotency_key)
 );
 
+-- Create indexes for per-user date ranges and keyset pagination
+CREATE INDEX snippets_user_id_created_at_idx ON snippets (user_id, created_at DESC, id DESC);
+CREATE INDEX journals_user_id_date_idx ON journals (user_id, date DESC, id DESC);
+-- The batch summarizer scans snippets by creation time across all users
+CREATE INDEX snippets_created_at_idx ON snippets (created_at);
+-- Full-text search (GET /search/{user_id}); btree_gin lets one GIN index cover both the
+-- user_id filter and the text match
+CREATE EXTENSION IF NOT EXISTS btree_gin;
+CREATE INDEX journals_search_idx ON journals USING GIN (user_id, to_tsvector('english', entry));
+CREATE INDEX snippets_search_idx ON snippets USING GIN (user_id, to_tsvector('english', entry));
+
 -- Enable Row-Level Security (RLS) on tables
 ALTER TABLE journals ENABLE ROW LEVEL SECURITY;
 ALTER TABLE snippets ENABLE ROW LEVEL SECURITY;
@@ -68,4 +87,213 @@ CREATE POLICY "Users can view their own snippets"
 ON snippets
 FOR SELECT
 TO authenticated
-USING (auth.uid() = user_id);
\ No newline at end of file
+USING (auth.uid() = user_id);
+
+-- Create per-user mood rollups for the dashboard, kept up to date by a trigger on journals.
+-- Users can only read them, so the trigger functions run as their owner (SECURITY DEFINER).
+CREATE TABLE mood_rollups (
+    user_id UUID NOT NULL,
+    granularity TEXT NOT NULL CHECK (granularity IN ('day', 'week', 'month')),
+    bucket_start DATE NOT NULL,
+    entry_count INTEGER NOT NULL,
+    score_sum DOUBLE PRECISION NOT NULL,
+    score_min DOUBLE PRECISION NOT NULL,
+    score_max DOUBLE PRECISION NOT NULL,
+    PRIMARY KEY (user_id, granularity, bucket_start)
+);
+
+ALTER TABLE mood_rollups ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view their own mood rollups"
+ON mood_rollups
+FOR SELECT
+USING (auth.uid() = user_id);
+
+-- One embedding per journal for "similar days", packed as little-endian float32; model names
+-- the embedding method so vectors from another model are ignored
+CREATE TABLE journal_embeddings (
+    user_id UUID NOT NULL,
+    date DATE NOT NULL,
+    model TEXT NOT NULL,
+    embedding BYTEA NOT NULL,
+    PRIMARY KEY (user_id, date),
+    FOREIGN KEY (user_id, date) REFERENCES journals (user_id, date)
+        ON UPDATE CASCADE ON DELETE CASCADE
+);
+
+ALTER TABLE journal_embeddings ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view their own journal embeddings"
+ON journal_embeddings
+FOR SELECT
+USING (auth.uid() = user_id);
+
+CREATE FUNCTION refresh_mood_rollups(p_user_id UUID, p_date DATE)
+RETURNS VOID
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+declare
+    bucket text;
+    bucket_from date;
+    bucket_to date;
+begin
+    foreach bucket in array array['day', 'week', 'month'] loop
+        bucket_from := date_trunc(bucket, p_date)::date;
+        bucket_to := (date_trunc(bucket, p_date) + ('1 ' || bucket)::interval)::date;
+
+        insert into public.mood_rollups (user_id, granularity, bucket_start, entry_count, score_sum, score_min, score_max)
+        select p_user_id, bucket, bucket_from, count(*), sum(sentiment_score), min(sentiment_score), max(sentiment_score)
+        from public.journals
+        where user_id = p_user_id
+          and date >= bucket_from
+          and date < bucket_to
+          and sentiment_score is not null
+        having count(*) > 0
+        on conflict (user_id, granularity, bucket_start) do update
+            set entry_count = excluded.entry_count,
+                score_sum = excluded.score_sum,
+                score_min = excluded.score_min,
+                score_max = excluded.score_max;
+
+        -- No scored journals left in the bucket
+        if not found then
+            delete from public.mood_rollups
+            where user_id = p_user_id and granularity = bucket and bucket_start = bucket_from;
+        end if;
+    end loop;
+end;
+$$;
+
+CREATE FUNCTION journals_refresh_mood_rollups()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+begin
+    if tg_op in ('UPDATE', 'DELETE') then
+        perform public.refresh_mood_rollups(old.user_id, old.date);
+    end if;
+    if tg_op in ('INSERT', 'UPDATE') then
+        perform public.refresh_mood_rollups(new.user_id, new.date);
+    end if;
+    return null;
+end;
+$$;
+
+-- Rebuilds any user's buckets, so only the trigger and the service role may call it
+REVOKE EXECUTE ON FUNCTION refresh_mood_rollups(UUID, DATE) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION refresh_mood_rollups(UUID, DATE) TO service_role;
+
+CREATE TRIGGER journals_refresh_mood_rollups
+AFTER INSERT OR DELETE OR UPDATE OF sentiment_score, date, user_id ON journals
+FOR EACH ROW EXECUTE FUNCTION journals_refresh_mood_rollups();
+
+-- Stale (user, day) pairs for backend/summarize_stale_days.py: days with snippets created in
+-- [p_from, p_to] (UTC days) and either no journal or one generated from a different number of
+-- snippets, in (date, user_id) order after the keyset (p_after_date, p_after_user)
+CREATE FUNCTION stale_journal_days(
+    p_from DATE,
+    p_to DATE,
+    p_after_date DATE DEFAULT NULL,
+    p_after_user UUID DEFAULT NULL,
+    p_limit INTEGER DEFAULT 100
+)
+RETURNS TABLE (user_id UUID, date DATE, snippet_count INTEGER)
+LANGUAGE sql
+STABLE
+AS $$
+    with days as (
+        select s.user_id, (s.created_at at time zone 'utc')::date as date, count(*)::integer as snippet_count
+        from public.snippets s
+        where s.created_at >= p_from::timestamp at time zone 'utc'
+          and s.created_at < (p_to + 1)::timestamp at time zone 'utc'
+        group by 1, 2
+    )
+    select d.user_id, d.date, d.snippet_count
+    from days d
+    left join public.journals j on j.user_id = d.user_id and j.date = d.date
+    where (j.id is null or j.snippet_count <> d.snippet_count)
+      and (p_after_date is null or (d.date, d.user_id) > (p_after_date, p_after_user))
+    order by d.date, d.user_id
+    limit p_limit;
+$$;
+
+-- Lists every user's activity, so only the service role may call it
+REVOKE EXECUTE ON FUNCTION stale_journal_days(DATE, DATE, DATE, UUID, INTEGER) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION stale_journal_days(DATE, DATE, DATE, UUID, INTEGER) TO service_role;
+
+-- Bulk sentiment updates for backend/rescore_sentiment.py: sets each journal's sentiment_score
+-- only while its entry is still the text that was scored
+CREATE FUNCTION update_sentiment_scores(
+    p_ids UUID[],
+    p_entries TEXT[],
+    p_scores DOUBLE PRECISION[]
+)
+RETURNS INTEGER
+LANGUAGE sql
+AS $$
+    with updated as (
+        update public.journals j
+        set sentiment_score = v.sentiment_score
+        from unnest(p_ids, p_entries, p_scores) as v(id, entry, sentiment_score)
+        where j.id = v.id
+          and j.entry = v.entry
+        returning 1
+    )
+    select count(*)::integer from updated;
+$$;
+
+-- Writes any user's journals, so only the service role may call it
+REVOKE EXECUTE ON FUNCTION update_sentiment_scores(UUID[], TEXT[], DOUBLE PRECISION[]) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION update_sentiment_scores(UUID[], TEXT[], DOUBLE PRECISION[]) TO service_role;
+
+-- A user's journals and snippets matching p_query (websearch syntax: words, "quoted
+-- phrases", or, -excluded), best match first, after the keyset (p_after_rank,
+-- p_after_id). Headlines are only built for the returned page.
+CREATE FUNCTION search_entries(
+    p_user_id UUID,
+    p_query TEXT,
+    p_after_rank DOUBLE PRECISION DEFAULT NULL,
+    p_after_id UUID DEFAULT NULL,
+    p_limit INTEGER DEFAULT 20
+)
+RETURNS TABLE (kind TEXT, id UUID, date DATE, created_at TIMESTAMPTZ, rank DOUBLE PRECISION, highlight TEXT)
+LANGUAGE sql
+STABLE
+AS $$
+    with query as (
+        select websearch_to_tsquery('english', p_query) as q
+    ),
+    matches as (
+        select 'journal' as kind, j.id, j.date, null::timestamptz as created_at,
+               ts_rank_cd(to_tsvector('english', j.entry), query.q)::float8 as rank, j.entry
+        from public.journals j, query
+        where j.user_id = p_user_id
+          and to_tsvector('english', j.entry) @@ query.q
+        union all
+        select 'snippet', s.id, (s.created_at at time zone 'utc')::date, s.created_at,
+               ts_rank_cd(to_tsvector('english', s.entry), query.q)::float8, s.entry
+        from public.snippets s, query
+        where s.user_id = p_user_id
+          and to_tsvector('english', s.entry) @@ query.q
+    ),
+    page as (
+        select *
+        from matches
+        where p_after_rank is null or (rank, id) < (p_after_rank, p_after_id)
+        order by rank desc, id desc
+        limit p_limit
+    )
+    select page.kind, page.id, page.date, page.created_at, page.rank,
+           ts_headline('english', page.entry, query.q,
+                       'StartSel=<mark>, StopSel=</mark>, MaxWords=24, MinWords=8, MaxFragments=2, FragmentDelimiter=" … "')
+    from page, query
+    order by page.rank desc, page.id desc;
+$$;
+
+-- Searches any user's entries, so only the service role may call it
+REVOKE EXECUTE ON FUNCTION search_entries(UUID, TEXT, DOUBLE PRECISION, UUID, INTEGER) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION search_entries(UUID, TEXT, DOUBLE PRECISION, UUID, INTEGER) TO service_role;
@@ -0,0 +1,52 @@
+-- Journal writes by a signed-in user keep their mood rollups up to date.
+--
+-- Users write their own journals directly (RLS on journals allows it) but may only
+-- read mood_rollups, so this checks that the trigger still refreshes the rollups
+-- and that users cannot call refresh_mood_rollups themselves. Run it against a
+-- database with the schema applied, e.g. the local one from `supabase start`:
+--
+--     psql -v ON_ERROR_STOP=1 -f supabase/tests/mood_rollups_rls.sql <database url>
+--
+-- It fails on the first broken check and rolls back everything it writes.
+
+begin;
+
+insert into auth.users (id) values ('00000000-0000-4000-8000-000000000001');
+
+select set_config('request.jwt.claims', '{"sub": "00000000-0000-4000-8000-000000000001", "role": "authenticated"}', true);
+set local role authenticated;
+
+insert into public.journals (user_id, date, entry, sentiment_score)
+values ('00000000-0000-4000-8000-000000000001', '2024-05-01', 'A good day', 0.5);
+
+update public.journals
+set sentiment_score = -0.25
+where user_id = '00000000-0000-4000-8000-000000000001' and date = '2024-05-01';
+
+do $$
+begin
+    assert (select count(*) from public.mood_rollups) = 3,
+        'expected day, week and month rollups for the journal';
+    assert (select score_sum from public.mood_rollups where granularity = 'day') = -0.25,
+        'rollup was not refreshed by the update';
+end;
+$$;
+
+do $$
+begin
+    perform public.refresh_mood_rollups('00000000-0000-4000-8000-000000000001', '2024-05-01');
+    raise exception 'authenticated users can call refresh_mood_rollups';
+exception
+    when insufficient_privilege then null;
+end;
+$$;
+
+delete from public.journals where user_id = '00000000-0000-4000-8000-000000000001';
+
+do $$
+begin
+    assert (select count(*) from public.mood_rollups) = 0, 'rollups left after deleting the journal';
+end;
+$$;
+
+rollback;